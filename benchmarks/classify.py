@@ -0,0 +1,53 @@
+"""Compares character class acceleration with pure Python parsing.
+
+    python -m benchmarks.classify --size 500 --skip-python
+
+The input is generated ASCII text of the given size in megabytes made of
+words, numbers and whitespace. The default is 20 MB: the run-end table of
+each character class takes 4 bytes per character, so the 500 MB run of
+the three classes of this grammar needs about 7 GB of memory, and the
+pure Python parse of it takes several minutes."""
+
+import argparse
+import time
+
+from petitparser import character
+from petitparser.tools.classify import accelerate
+
+
+def generate(size: int) -> str:
+    chunk = 'lorem 12345 ipsum\tdolor 678 sit amet\n' * 1024
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def grammar():
+    token = (character.letter().plus()
+             | character.digit().plus()
+             | character.whitespace().plus())
+    return token.star().end()
+
+
+def measure(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:>12}: {time.perf_counter() - start:8.3f}s')
+    return result
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument('--size', type=int, default=20, help='input size in MB')
+    arguments.add_argument('--skip-python', action='store_true', help='only run the accelerated parser')
+    options = arguments.parse_args()
+
+    text = generate(options.size * 1024 * 1024)
+    parser = grammar()
+
+    accelerated = measure('classify', lambda: accelerate(parser, text))
+    assert measure('accelerated', lambda: accelerated.accept(text))
+    if not options.skip_python:
+        assert measure('python', lambda: parser.accept(text))
+
+
+if __name__ == '__main__':
+    main()
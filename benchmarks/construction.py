@@ -0,0 +1,67 @@
+"""Measures grammar construction throughput.
+
+    python -m benchmarks.construction
+
+Reports the rate of parser node creation through the combinator methods,
+the time of `import petitparser` in a fresh interpreter, and the time to
+create a GrammarDefinition class with many productions."""
+
+import subprocess
+import sys
+import time
+import types
+
+
+def node_creation(rounds: int = 20000) -> float:
+    from petitparser import character, string
+    from petitparser.utils import Mirror
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        ident = (character.letter() & character.word().star()).flatten().trim()
+        number = character.digit().plus().flatten().trim().map(int)
+        keyword = string.of('let').trim()
+        statement = (keyword & ident & character.of('=').trim() & (ident | number)).pick(3)
+        parser = statement.separated_by(character.of(';').trim()).optional().end()
+    elapsed = time.perf_counter() - start
+    return rounds * len(list(Mirror(parser))) / elapsed
+
+
+def import_time(rounds: int = 10) -> float:
+    def run(code):
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            best = min(best, time.perf_counter() - start)
+        return best
+    return run('import petitparser') - run('pass')
+
+
+def grammar_definition(productions: int = 2000) -> float:
+    from petitparser import GrammarDefinition, character, ref
+
+    namespace = {}
+    for i in range(productions):
+        namespace[f'p{i}'] = (character.of('(').trim()
+                              & ref(f'p{(i + 1) % productions}').star()
+                              & character.of(')').trim()).pick(1)
+    namespace['start'] = ref('p0').end()
+
+    def body(ns):
+        for name, parser in namespace.items():
+            ns[name] = parser
+
+    start = time.perf_counter()
+    types.new_class('Generated', (GrammarDefinition,), exec_body=body)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f'node creation:      {node_creation():12,.0f} nodes/s')
+    print(f'import petitparser: {import_time() * 1000:12.1f} ms')
+    print(f'grammar definition: {grammar_definition() * 1000:12.1f} ms (2000 productions)')
+
+
+if __name__ == '__main__':
+    main()
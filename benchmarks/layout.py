@@ -0,0 +1,65 @@
+"""Compares trim() with implicit grammar layout.
+
+    python -m benchmarks.layout --size 2
+
+The input is generated statements of the given size in megabytes, separated
+by whitespace and comments."""
+
+import argparse
+import time
+
+from petitparser import GrammarDefinition, character, ref, string
+from petitparser.tools.layout import layout
+
+
+def generate(size: int) -> str:
+    chunk = 'let x1 = 12 ; # note\nlet  y = x1 ;\n  /* block\n */ let z = 3 ;\n' * 64
+    return (chunk * (size // len(chunk) + 1))[:size].rsplit(';', 1)[0] + ';'
+
+
+class TrimmedGrammar(GrammarDefinition):
+    start = ref('statement').star().end()
+    statement = ref('let') & ref('ident') & ref('equals') & (ref('ident') | ref('number')) & ref('semicolon')
+    let = string.of('let').trim(ref('layout'))
+    ident = (character.letter() & character.word().star()).flatten().trim(ref('layout'))
+    number = character.digit().plus().flatten().trim(ref('layout'))
+    equals = character.of('=').trim(ref('layout'))
+    semicolon = character.of(';').trim(ref('layout'))
+    layout = (character.whitespace()
+              | string.of('#') & character.of('\n').neg().star()
+              | string.of('/*') & string.of('*/').neg().star() & string.of('*/'))
+
+
+class LayoutGrammar(GrammarDefinition):
+    _layout = layout(['#', ('/*', '*/')])
+
+    start = ref('statement').star().end()
+    statement = ref('let') & ref('ident') & ref('equals') & (ref('ident') | ref('number')) & ref('semicolon')
+    let = string.of('let')
+    ident = (character.letter() & character.word().star()).flatten()
+    number = character.digit().plus().flatten()
+    equals = character.of('=')
+    semicolon = character.of(';')
+
+
+def measure(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:>8}: {time.perf_counter() - start:8.3f}s')
+    return result
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument('--size', type=int, default=2, help='input size in MB')
+    options = arguments.parse_args()
+
+    text = generate(options.size * 1024 * 1024)
+    trimmed = measure('trim', lambda: TrimmedGrammar.build().parse(text))
+    layouted = measure('layout', lambda: LayoutGrammar.build().parse(text))
+    assert trimmed.is_success and layouted.is_success
+    assert trimmed.value == layouted.value
+
+
+if __name__ == '__main__':
+    main()
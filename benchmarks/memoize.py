@@ -0,0 +1,59 @@
+"""Compares memoizing nothing, everything and what a trained plan advises.
+
+    python -m benchmarks.memoize --depth 7
+
+The input is generated arithmetic expressions whose parentheses nest up to
+the given depth, which the grammar backtracks over exponentially."""
+
+import argparse
+import random
+import time
+
+from petitparser import GrammarDefinition, Mirror, character, ref
+from petitparser.tools.memoizer import plan_memoization
+
+
+class ExpressionGrammar(GrammarDefinition):
+    start = ref('expression').end()
+    expression = (ref('term') & character.of('+') & ref('expression')
+                  | ref('term') & character.of('-') & ref('expression')
+                  | ref('term'))
+    term = (character.of('(') & ref('expression') & character.of(')')
+            | character.digit().plus().flatten())
+
+
+def generate(depth: int, rng: random.Random) -> str:
+    if depth == 0 or rng.random() < 0.2:
+        return str(rng.randrange(100))
+    terms = [generate(depth - 1, rng) for _ in range(rng.randrange(1, 3))]
+    return '(' + rng.choice('+-').join(terms) + ')'
+
+
+def measure(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f'{name:>8}: {time.perf_counter() - start:8.3f}s')
+    return result
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument('--depth', type=int, default=7, help='maximum nesting depth')
+    arguments.add_argument('--count', type=int, default=20, help='number of expressions')
+    options = arguments.parse_args()
+
+    rng = random.Random(42)
+    texts = [generate(options.depth, rng) for _ in range(options.count)]
+    grammar = ExpressionGrammar.build()
+    memoized = Mirror(grammar).transform(lambda p: p.memoize())
+    plan = measure('training', lambda: plan_memoization(grammar, [generate(3, rng) for _ in range(20)]))
+    planned = plan.apply(grammar)
+    print(f'memoizing {len(plan.nodes)} of {len(plan.estimates)} parsers')
+
+    expected = measure('none', lambda: [grammar.parse(text).value for text in texts])
+    assert measure('all', lambda: [memoized.parse(text).value for text in texts]) == expected
+    assert measure('planned', lambda: [planned.parse(text).value for text in texts]) == expected
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,33 @@
 
-from .statics import epsilon, fail
+from .statics import cut, epsilon, fail
 from .parser import Parser
 from .parser.combinators import SettableParser
 from .utils import Mirror
 from .tools.grammar_definition import GrammarDefinition, GrammarParser, ref, action
 from .tools.expression_builder import ExpressionBuilder
+from .tools.lexer import Lexer, token_kind, token_text
 from . import character, string
 
 
 __all__ = [
-    'character', 'string', 'epsilon', 'fail',
+    'character', 'string', 'epsilon', 'fail', 'cut',
     'Parser',
     'SettableParser',
     'Mirror',
     'GrammarDefinition', 'GrammarParser', 'ref', 'action',
-    'ExpressionBuilder'
+    'ExpressionBuilder',
+    'Lexer', 'token_kind', 'token_text',
+    'analyze',
 ]
 
+
+def __getattr__(name):
+    # The analyzer is only needed by tooling, so it is not imported with the package.
+    if name == 'analyze':
+        from .tools.analyzer import analyze
+        return analyze
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 __version__ = '0.1.2'
 __author__ = 'Nikola Bebić'
@@ -1,5 +1,6 @@
 
 
+from functools import partial
 from .parser.primitive import CharPredicate, CharacterParser
 from typing import Callable, overload
 
@@ -12,10 +13,9 @@ def of(predicate: CharPredicate, message: str) -> CharacterParser: ...
 
 def of(pred, message=None):
     if isinstance(pred, str):
-        def predicate(x):
-            return x == pred
         if len(pred) != 1:
             raise ValueError('expectefd a single character string')
+        predicate = pred.__eq__
         if message is None:
             message = f'{pred!r} expected'
     elif callable(pred):
@@ -30,23 +30,23 @@ def of(pred, message=None):
 
 
 def any(message: str = 'any character expected'):
-    return of(lambda x: True, message)
+    return of(_true, message)
 
 
 def any_of(characters: str, message: str = None):
     if message is None:
         message = f'any of {characters!r} expected'
-    return of(lambda x: x in characters, message)
+    return of(characters.__contains__, message)
 
 
 def none(message: str = 'no character expected'):
-    return of(lambda x: False, message)
+    return of(_false, message)
 
 
 def none_of(characters: str, message: str = None):
     if message is None:
         message = f'none of {characters!r} expected'
-    return of(lambda x: x not in characters, message)
+    return of(partial(_not_in, characters), message)
 
 
 def digit(message: str = 'digit expected'):
@@ -64,7 +64,7 @@ def lowercase(message: str = 'lowercase letter expected'):
 def range(start: str, end: str, message: str = None):
     if message is None:
         message = f'{start}..{end} expected'
-    return of(lambda x: start <= x <= end, message)
+    return of(partial(_in_range, start, end), message)
 
 
 def uppercase(message: str = 'uppercase letter expected'):
@@ -77,3 +77,21 @@ def whitespace(message: str = 'whitespace expected'):
 
 def word(message: str = 'letter or digit expected'):
     return of(str.isalnum, message)
+
+
+# Predicates are module level functions so that parsers can be pickled.
+
+def _true(x):
+    return True
+
+
+def _false(x):
+    return False
+
+
+def _not_in(characters, x):
+    return x not in characters
+
+
+def _in_range(start, end, x):
+    return start <= x <= end
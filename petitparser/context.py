@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Any, Generic, TextIO, TypeVar
+from threading import local
+from typing import Any, Dict, Generic, Optional, Sequence, TextIO, Tuple, TypeVar
 
 T = TypeVar('T')
 
@@ -100,6 +101,66 @@ class Failure(Result[None]):
         return super().__str__() + ': ' + self._message
 
 
+class ParseTimeout(Failure):
+    """A failure of a parse that ran out of its step budget or deadline.
+
+    The position is the furthest position the parse reached."""
+
+    __slots__ = '_steps',
+
+    def __init__(self, buffer: str, position: int, message: str, steps: int):
+        super().__init__(buffer, position, message)
+        self._steps = steps
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+
+class CommittedFailure(Failure):
+    """A failure after a cut, which stops the enclosing choice from trying
+    its other alternatives."""
+
+    __slots__ = ()
+
+
+class ExceptionFailure(Failure):
+    """A failure of a parse that raised an exception, e.g. in an action."""
+
+    __slots__ = '_exception',
+
+    def __init__(self, buffer: str, position: int, exception: Exception):
+        super().__init__(buffer, position, f'{type(exception).__name__}: {exception}')
+        self._exception = exception
+
+    @property
+    def exception(self) -> Exception:
+        return self._exception
+
+
+class MemoTables(local):
+    """The memo tables of the parse in progress on a thread, by memoized
+    parser, and the last layout skipped, by layout. They are dropped when
+    another input is parsed, and when a parse started by parse() or accept()
+    ends."""
+
+    def __init__(self):
+        self.start(None)
+
+    def start(self, buffer: Optional[str]):
+        self.buffer = buffer
+        self.results: Dict[Any, Dict[int, Result]] = {}
+        self.positions: Dict[Any, Dict[int, int]] = {}
+        self.skips: Dict[Any, Tuple[int, int]] = {}
+
+    def release(self):
+        if self.buffer is not None:
+            self.start(None)
+
+
+memo_tables = MemoTables()
+
+
 class ParseError(Exception):
     def __init__(self, failure: Failure):
         super().__init__(failure.message)
@@ -133,11 +194,11 @@ class Token(Generic[T]):
 
     @property
     def line(self):
-        line_and_column_of(self._buffer, self._start)[0]
+        return line_and_column_of(self._buffer, self._start)[0]
 
     @property
     def column(self):
-        line_and_column_of(self._buffer, self._start)[1]
+        return line_and_column_of(self._buffer, self._start)[1]
 
     def __str__(self):
         line, col = line_and_column_of(self._buffer, self._start)
@@ -157,7 +218,127 @@ class Token(Generic[T]):
         return hash((self._start, self._stop, self._buffer, self._value))
 
 
+class Span:
+    """A lazy reference to the text between start and stop in a buffer.
+
+    The text is only copied out of the buffer when needed; spans compare and
+    hash equal to the strings they cover."""
+
+    __slots__ = '_buffer', '_start', '_stop'
+
+    def __init__(self, buffer: str, start: int, stop: int):
+        self._buffer = buffer
+        self._start = start
+        self._stop = stop
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def stop(self):
+        return self._stop
+
+    @property
+    def line(self):
+        return line_and_column_of(self._buffer, self._start)[0]
+
+    @property
+    def column(self):
+        return line_and_column_of(self._buffer, self._start)[1]
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __str__(self):
+        return self._buffer[self._start:self._stop]
+
+    def __repr__(self):
+        return f'Span({str(self)!r}, {self._start}, {self._stop})'
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is Span:
+            if len(self) != len(other):
+                return False
+            if self._buffer is other._buffer and self._start == other._start:
+                return True
+            other = str(other)
+        elif not isinstance(other, str):
+            return NotImplemented
+        return (self._stop - self._start == len(other)
+                and self._buffer.startswith(other, self._start))
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __lt__(self, other):
+        return str(self) < _text_of(other)
+
+    def __le__(self, other):
+        return str(self) <= _text_of(other)
+
+    def __gt__(self, other):
+        return str(self) > _text_of(other)
+
+    def __ge__(self, other):
+        return str(self) >= _text_of(other)
+
+
+class SpanColumns:
+    """Columns of the start, stop and kind index of each match of a scan.
+
+    Its length is the number of matches, and iterating it yields a
+    (start, stop, kind) row per match."""
+
+    __slots__ = '_starts', '_stops', '_kinds'
+
+    def __init__(self, starts: Sequence[int], stops: Sequence[int], kinds: Sequence[int]):
+        self._starts = starts
+        self._stops = stops
+        self._kinds = kinds
+
+    @property
+    def starts(self) -> Sequence[int]:
+        return self._starts
+
+    @property
+    def stops(self) -> Sequence[int]:
+        return self._stops
+
+    @property
+    def kinds(self) -> Sequence[int]:
+        return self._kinds
+
+    def spans(self, buffer: str):
+        for start, stop in zip(self._starts, self._stops):
+            yield Span(buffer, start, stop)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        return zip(self._starts, self._stops, self._kinds)
+
+    def __repr__(self):
+        return f'SpanColumns({len(self)} matches)'
+
+
+def _text_of(value):
+    if type(value) is Span:
+        return str(value)
+    return value
+
+
 def line_and_column_of(buffer: str, position: int):
+    if not isinstance(buffer, str) and hasattr(buffer, 'offset'):
+        # A token stream: the position of the token in its text.
+        buffer, position = buffer.text, buffer.offset(position)
     line = 1
     col = 1
     for i in range(position):
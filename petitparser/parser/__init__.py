@@ -1,11 +1,26 @@
 from __future__ import annotations
 
-from typing import Callable, Generic, List, Literal, Optional, Type, TypeVar, Union, overload
-from ..context import Context, Result
+from array import array
+from functools import partial
+from operator import itemgetter
+from typing import (TYPE_CHECKING, AsyncIterator, Callable, Generic, Iterable, Iterator, List, Literal, Optional, Type,
+                    TypeVar, Union, overload)
+from ..context import CommittedFailure, Context, Result, Span, SpanColumns, memo_tables
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from .parallel import Record
+    from .streaming import PushParser
+    from ..tools.frozen import FrozenParser
+    from ..tools.generalized import Forest
+    from ..tools.layout import Layout
 
 T = TypeVar('T', covariant=True)
 U = TypeVar('U', covariant=True)
 
+# Returned by fast_parse_on for a failure after a cut.
+COMMITTED = -2
+
 
 class Parser(Generic[T]):
     __slots__ = ()
@@ -15,30 +30,112 @@ class Parser(Generic[T]):
 
     def fast_parse_on(self, buffer: str, position: int) -> int:
         res = self.parse_on(Context(buffer, position))
-        return res.position if res.is_success else -1
-
-    def parse(self, inp: str):
-        return self.parse_on(Context(inp, 0))
-
-    def accept(self, inp: str):
-        return self.fast_parse_on(inp, 0) >= 0
+        if res.is_success:
+            return res.position
+        return COMMITTED if type(res) is CommittedFailure else -1
+
+    def parse(self, inp: str, max_steps: int = None, deadline: float = None):
+        try:
+            if max_steps is None and deadline is None:
+                return self.parse_on(Context(inp, 0))
+            from .limits import parse_with_budget
+            return parse_with_budget(self, inp, max_steps, deadline)
+        finally:
+            memo_tables.release()
+
+    def accept(self, inp: str, max_steps: int = None, deadline: float = None):
+        try:
+            if max_steps is None and deadline is None:
+                return self.fast_parse_on(inp, 0) >= 0
+            from .limits import accept_with_budget
+            return accept_with_budget(self, inp, max_steps, deadline)
+        finally:
+            memo_tables.release()
+
+    def parse_many(self, inputs: Iterable[str], executor: Union[None, str, Executor] = None,
+                   chunksize: int = 256, workers: int = None) -> Iterator[Result[T]]:
+        """Parses many inputs, streaming back their results in order.
+
+        The inputs are parsed in chunks, inline when executor is None, else on
+        a new pool of workers when it is 'thread' or 'process', or on the
+        given executor. Process workers receive the grammar once, so it must
+        be picklable. Exceptions are returned as ExceptionFailure results."""
+        from .batch import parse_many
+        return parse_many(self, inputs, executor, chunksize, workers)
+
+    def parse_parallel(self, buffer: str, boundary: Parser, workers: int = None,
+                       chunksize: int = None) -> Result[List[Record]]:
+        """Parses buffer as records of this parser separated by boundary, in
+        chunks on a pool of worker processes.
+
+        The value is the list of records, with their absolute start and stop
+        offsets. A boundary may follow the last record, and may occur within
+        records, at the cost of parsing the chunks starting there again. It
+        must consume input, or ValueError is raised."""
+        from .parallel import parse_parallel
+        return parse_parallel(self, buffer, boundary, workers, chunksize)
+
+    def push(self, lookahead: int = 1, layout: Layout = None, max_size: int = None) -> PushParser[T]:
+        """Returns a push parser parsing records of this parser from input fed in chunks."""
+        from .streaming import PushParser
+        return PushParser(self, lookahead, layout, max_size)
+
+    def aparse(self, reader, chunksize: int = 65536, encoding: str = 'utf-8', **options) -> AsyncIterator[Result[T]]:
+        """Parses records from an asyncio stream reader as its chunks arrive,
+        see PushParser."""
+        from .streaming import aparse
+        return aparse(self, reader, chunksize, encoding, **options)
+
+    def parse_all(self, inp: str) -> Result[Forest[T]]:
+        """Parses inp as a context-free grammar, where choices and repetitions
+        are ambiguous, and returns the shared forest of all the longest parses."""
+        from ..tools.generalized import parse_all
+        return parse_all(self, inp)
 
     def matches(self, inp: str) -> List[T]:
-        from .. import character
         l = []
         self.and_().map_with_side_effects(l.append).seq(character.any()).or_(character.any()).star()\
             .fast_parse_on(inp, 0)
         return l
 
     def matches_skipping(self, inp: str) -> List[T]:
-        from .. import character
         l = []
         self.map_with_side_effects(l.append).or_(character.any()).star()\
             .fast_parse_on(inp, 0)
         return l
 
+    def scan_spans(self, inp: str, kinds: List[Parser] = None, numpy: bool = False) -> SpanColumns:
+        if kinds is None:
+            kinds = [self]
+        scanners = [kind.fast_parse_on for kind in kinds]
+        starts = array('q')
+        stops = array('q')
+        indexes = array('B' if len(kinds) <= 256 else 'H')
+        add_start, add_stop, add_index = starts.append, stops.append, indexes.append
+
+        position = 0
+        length = len(inp)
+        while position < length:
+            for index, scanner in enumerate(scanners):
+                stop = scanner(inp, position)
+                if stop > position:
+                    add_start(position)
+                    add_stop(stop)
+                    add_index(index)
+                    position = stop
+                    break
+            else:
+                position += 1
+
+        if numpy:
+            import numpy as np
+            return SpanColumns(
+                np.frombuffer(starts, dtype=np.int64),
+                np.frombuffer(stops, dtype=np.int64),
+                np.frombuffer(indexes, dtype=np.uint8 if indexes.typecode == 'B' else np.uint16))
+        return SpanColumns(starts, stops, indexes)
+
     def optional(self, otherwise: Parser[U] = None) -> Parser[Union[T, U]]:
-        from .combinators import OptionalParser
         return OptionalParser(self, otherwise)
 
     def star(self) -> Parser[List[T]]:
@@ -60,60 +157,50 @@ class Parser(Generic[T]):
         return self.repeat_lazy(limit, 1, -1)
 
     def repeat(self, min: int, max: int) -> Parser[List[T]]:
-        from .repeating import PossesiveRepeatingParser
         return PossesiveRepeatingParser(self, min, max)
 
     def repeat_greedy(self, limit: Parser, min: int, max: int) -> Parser[List[T]]:
-        from .repeating import GreedyRepeatingParser
         return GreedyRepeatingParser(self, limit, min, max)
 
     def repeat_lazy(self, limit: Parser, min: int, max: int) -> Parser[List[T]]:
-        from .repeating import LazyRepeatingParser
         return LazyRepeatingParser(self, limit, min, max)
 
     def times(self, count: int) -> Parser[List[T]]:
         return self.repeat(count, count)
 
     def seq(self, *others: Parser[U]) -> Parser[List[Union[T, U]]]:
-        from .combinators import SequenceParser
         return SequenceParser(self, *others)
 
     def or_(self, *others: Parser[U]) -> Parser[Union[T, U]]:
-        from .combinators import ChoiceParser
         return ChoiceParser(self, *others)
 
     def and_(self) -> Parser[T]:
-        from .combinators import AndParser
         return AndParser(self)
 
     def call_cc(self, handler: Callable[[Callable[[Context], Result[T]], Context], Result[U]]) -> Parser[U]:
-        from .actions import ContinuationParser
         return ContinuationParser(self, handler)
 
     def not_(self, message: str = 'unexpected') -> Parser[None]:
-        from .combinators import NotParser
         return NotParser(self, message)
 
     def neg(self, message: str = None) -> Parser[None]:
-        from .. import character
         if message is None:
             message = f'{self} not expected'
 
         return self.not_(message).seq(character.any()).pick(1)
 
-    def flatten(self, message: str = None) -> Parser[str]:
-        from .actions import FlattenParser
-        return FlattenParser(self, message)
+    def flatten(self, message: str = None, lazy: bool = False) -> Parser[str]:
+        return FlattenParser(self, message, lazy)
+
+    def span(self, message: str = None) -> Parser[Span]:
+        return self.flatten(message, lazy=True)
 
     def token(self) -> Parser[str]:
-        from .actions import TokenParser
         return TokenParser(self)
 
     def trim(self, before: Parser = None, after: Parser = None) -> Parser[T]:
-        from .. import character
-        from .actions import TrimmingParser
         if before is None:
-            before = character.whitespace()
+            before = _WHITESPACE
 
         if after is None:
             after = before
@@ -121,44 +208,44 @@ class Parser(Generic[T]):
         return TrimmingParser(self, before, after)
 
     def end(self, message: str = 'end of input expected') -> Parser[T]:
-        from .combinators import SequenceParser, EndOfInputParser
-        return SequenceParser(self, EndOfInputParser(message)).pick(0)
+        return EndParser(self, message)
 
     def settable(self):
-        from .combinators import SettableParser
         return SettableParser(self)
 
+    def cached(self, maxsize: Optional[int] = 128, key: Callable[[str], object] = None,
+               successes_only: bool = False) -> Parser[T]:
+        """Returns a parser that remembers the results of the last maxsize
+        inputs (all of them when maxsize is None), identified by key(input)
+        or the input itself. It is safe to share between threads."""
+        from .caching import CachingParser, ResultCache
+        return CachingParser(self, ResultCache(maxsize), key, successes_only)
+
+    def memoize(self) -> Parser[T]:
+        """Returns a parser that remembers its results by position within the
+        input being parsed, which turns repeated backtracking over the same
+        input into lookups."""
+        from .caching import MemoParser
+        return MemoParser(self)
+
     def map(self, func: Callable[[T], U]) -> Parser[U]:
-        from .actions import ActionParser
         return ActionParser(self, func)
 
     def map_with_side_effects(self, func: Callable[[T], U]) -> Parser[U]:
-        from .actions import ActionParser
         return ActionParser(self, func, True)
 
     def pick(self, index: int) -> Parser:  # TODO: add generics
-        return self.map(lambda x: x[index])
+        return self.map(itemgetter(index))
 
     def permute(self, *indexes: int) -> Parser[T]:
-        return self.map(lambda x: [x[i] for i in indexes])
-
-    def separated_by(self, separator: Parser[U]) -> Parser[List[Union[T, U]]]:
-        from .combinators import SequenceParser
-
-        def _m(res):
-            result = [res[0]]
-            for elem in res[1]:
-                result.extend(elem)
-            return result
-        return SequenceParser(self, SequenceParser(separator, self).star()).map(_m)
-
-    def delimited_by(self, separator: Parser[U]) -> Parser[List[Union[T, U]]]:
-        def _m(res):
-            result = list(res[0])
-            if res[1] is not None:
-                result.append(res[1])
-            return result
-        return self.separated_by(separator).seq(separator.optional()).map(_m)
+        return self.map(partial(_permute, indexes))
+
+    def separated_by(self, separator: Parser[U], keep_separators: bool = True,
+                     trailing: bool = False) -> Parser[List[Union[T, U]]]:
+        return SeparatedParser(self, separator, keep_separators, trailing)
+
+    def delimited_by(self, separator: Parser[U], keep_separators: bool = True) -> Parser[List[Union[T, U]]]:
+        return SeparatedParser(self, separator, keep_separators, trailing=True)
 
     def copy(self) -> Parser[T]:
         raise NotImplementedError()
@@ -169,6 +256,7 @@ class Parser(Generic[T]):
 
         if self == other or self in seen:
             return True
+        seen.add(self)
 
         return type(self) is type(other) and self.has_equal_properties(other) and self.has_equal_children(other, seen)
 
@@ -177,7 +265,7 @@ class Parser(Generic[T]):
 
     def has_equal_children(self, other: Parser, seen: set) -> bool:
         selfChildren = self.get_children()
-        otherChildren = self.get_children()
+        otherChildren = other.get_children()
 
         if len(selfChildren) != len(otherChildren):
             return False
@@ -230,11 +318,28 @@ class Parser(Generic[T]):
     def __pos__(self):
         return self.and_()
 
+    def freeze(self) -> FrozenParser[T]:
+        """Returns an immutable copy of the parser graph, with its analysis,
+        which threads can share."""
+        from ..tools.frozen import freeze
+        return freeze(self)
+
     def deep_copy(self):
-        copy = self.copy()
-        for child in copy.get_children():
-            copy.replace(child, child.deep_copy())
-        return copy
+        copies = {self: self.copy()}
+        todo = [self]
+        while todo:
+            original = todo.pop()
+            copy = copies[original]
+            for child in original.get_children():
+                if child not in copies:
+                    copies[child] = child.copy()
+                    todo.append(child)
+                copy.replace(child, copies[child])
+        return copies[self]
+
+
+def _permute(indexes, x):
+    return [x[i] for i in indexes]
 
 
 def _resolve_slots(entry):
@@ -245,3 +350,14 @@ def _resolve_slots(entry):
         res.extend(_resolve_slots(b))
     res.extend(entry.__slots__)
     return tuple(res)
+
+
+# The combinator modules depend on Parser, so they are imported once it is defined.
+from .combinators import (AndParser, ChoiceParser, EndParser, NotParser, OptionalParser,  # noqa: E402
+                          SequenceParser, SettableParser)
+from .actions import ActionParser, ContinuationParser, FlattenParser, TokenParser, TrimmingParser  # noqa: E402
+from .repeating import GreedyRepeatingParser, LazyRepeatingParser, PossesiveRepeatingParser, SeparatedParser  # noqa: E402
+from .. import character  # noqa: E402
+
+# Shared by all parsers trimmed with the default whitespace.
+_WHITESPACE = character.whitespace()
@@ -1,7 +1,8 @@
 
-from ..context import Context, Result, Token
+from ..context import CommittedFailure, Context, Result, Span, Token
 from . import Parser
 from .combinators import DelegateParser
+from .primitive import COMMITTED
 from typing import Callable, Generic, List, TypeVar
 
 
@@ -26,7 +27,8 @@ class ActionParser(DelegateParser[R], Generic[T, R]):
 
     def fast_parse_on(self, buffer: str, position: int) -> int:
         if self._has_side_effects:
-            return super().fast_parse_on(buffer, position)
+            # The function must see the value, so it has to be built.
+            return Parser.fast_parse_on(self, buffer, position)
         else:
             return self._delegate.fast_parse_on(buffer, position)
 
@@ -49,6 +51,10 @@ class ContinuationParser(DelegateParser[R], Generic[T, R]):
     def parse_on(self, context: Context) -> Result[T]:
         return self._handler(super().parse_on, context)
 
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        # The handler works on contexts and results, which have to be built.
+        return Parser.fast_parse_on(self, buffer, position)
+
     def has_equal_properties(self, other: Parser) -> bool:
         return (super().has_equal_properties(other)
                 and self._handler == other._handler)
@@ -58,30 +64,66 @@ class ContinuationParser(DelegateParser[R], Generic[T, R]):
 
 
 class FlattenParser(DelegateParser[str]):
-    __slots__ = '_message',
+    __slots__ = '_message', '_lazy'
 
-    def __init__(self, delegate: Parser[T], message: str = None):
+    def __init__(self, delegate: Parser[T], message: str = None, lazy: bool = False):
         super().__init__(delegate)
         self._message = message
+        self._lazy = lazy
 
     def parse_on(self, context: Context) -> Result[T]:
         if self._message is None:
             result = self._delegate.parse_on(context)
             if result.is_success:
-                flattened = context.buffer[context.position:result.position]
-                return result.success(flattened)
+                return result.success(self._flatten(context.buffer, context.position, result.position))
             else:
                 return result
         else:
             position = self._delegate.fast_parse_on(
                 context.buffer, context.position)
             if position < 0:
+                if position == COMMITTED:
+                    return CommittedFailure(context.buffer, context.position, self._message)
                 return context.failure(self._message)
-            output = context.buffer[context.position:position]
+            output = self._flatten(context.buffer, context.position, position)
             return context.success(output, position)
 
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        return self._delegate.fast_parse_on(buffer, position)
+
+    def _flatten(self, buffer: str, start: int, stop: int):
+        if self._lazy:
+            return Span(buffer, start, stop)
+        return buffer[start:stop]
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._message == other._message
+                and self._lazy == other._lazy)
+
     def copy(self) -> Parser[T]:
-        return FlattenParser(self._delegate, self._message)
+        return FlattenParser(self._delegate, self._message, self._lazy)
+
+
+class RecognizerParser(DelegateParser[None]):
+    """Recognizes the delegate without building its value.
+
+    On failure the delegate is parsed again, so that the failure is the one
+    the delegate reports."""
+
+    __slots__ = ()
+
+    def parse_on(self, context: Context) -> Result[None]:
+        position = self._delegate.fast_parse_on(context.buffer, context.position)
+        if position < 0:
+            return self._delegate.parse_on(context)
+        return context.success(None, position)
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        return self._delegate.fast_parse_on(buffer, position)
+
+    def copy(self) -> Parser[None]:
+        return RecognizerParser(self._delegate)
 
 
 class TokenParser(DelegateParser[Token]):
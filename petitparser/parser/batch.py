@@ -0,0 +1,142 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar, Union
+
+from ..context import Context, ExceptionFailure, Result, memo_tables
+from . import Parser
+
+T = TypeVar('T', covariant=True)
+
+# Number of chunks kept in flight per worker, so that results stream back in
+# order while workers stay busy.
+CHUNKS_PER_WORKER = 2
+
+# The grammar of a worker process, sent once by the pool initializer.
+_worker_parser: Optional[Parser] = None
+
+# Number of grammars a worker of an executor created by the caller keeps.
+WORKER_GRAMMARS = 8
+
+# Grammars sent to the workers of executors created by the caller, by
+# digest, least recently used first.
+_worker_parsers: OrderedDict = OrderedDict()
+
+
+def parse_chunk(parser: Parser[T], chunk: List[str]) -> List[Result[T]]:
+    """Parses each input of chunk, capturing exceptions as failures."""
+    parse_on = parser.parse_on
+    results = []
+    append = results.append
+    for inp in chunk:
+        try:
+            append(parse_on(Context(inp, 0)))
+        except Exception as e:
+            append(ExceptionFailure(inp, 0, e))
+    memo_tables.release()
+    return results
+
+
+def _initialize_worker(payload: bytes):
+    global _worker_parser
+    _worker_parser = pickle.loads(payload)
+
+
+def _parse_chunk_in_worker(chunk: List[str]) -> List[Result]:
+    return parse_chunk(_worker_parser, chunk)
+
+
+def _parse_chunk_by_digest(digest: bytes, chunk: List[str]) -> Optional[List[Result]]:
+    """Parses chunk with a grammar the worker received before, or returns None."""
+    parser = _worker_parsers.get(digest)
+    if parser is None:
+        return None
+    _worker_parsers.move_to_end(digest)
+    return parse_chunk(parser, chunk)
+
+
+def _parse_chunk_with_payload(digest: bytes, payload: bytes, chunk: List[str]) -> List[Result]:
+    parser = _worker_parsers[digest] = pickle.loads(payload)
+    if len(_worker_parsers) > WORKER_GRAMMARS:
+        _worker_parsers.popitem(last=False)
+    return parse_chunk(parser, chunk)
+
+
+def _chunks(inputs: Iterable[str], chunksize: int) -> Iterator[List[str]]:
+    iterator = iter(inputs)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _submit_all(executor: Executor, workers: int, chunks: Iterator[List[str]], function, *args,
+                fallback: Callable[[List[str]], List[Result]] = None) -> Iterator[Result]:
+    """Streams the results of function on every chunk, in order. Chunks for
+    which function returns None are parsed again with fallback."""
+    pending = deque()
+
+    def results():
+        chunk, future = pending.popleft()
+        chunk_results = future.result()
+        if chunk_results is None:
+            chunk_results = executor.submit(fallback, chunk).result()
+        return chunk_results
+
+    try:
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(function, *args, chunk)))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield from results()
+        while pending:
+            yield from results()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def _parse_inline(parser: Parser[T], chunks: Iterator[List[str]]) -> Iterator[Result[T]]:
+    for chunk in chunks:
+        yield from parse_chunk(parser, chunk)
+
+
+def _parse_on_pool(create: Callable[[], Executor], workers: int, chunks: Iterator[List[str]], function,
+                   *args) -> Iterator[Result]:
+    # The pool is only created once results are asked for, and shut down
+    # when they all were or the iterator is closed.
+    pool = create()
+    try:
+        yield from _submit_all(pool, workers, chunks, function, *args)
+    finally:
+        pool.shutdown()
+
+
+def parse_many(parser: Parser[T], inputs: Iterable[str], executor: Union[None, str, Executor] = None,
+               chunksize: int = 256, workers: int = None) -> Iterator[Result[T]]:
+    chunks = _chunks(inputs, chunksize)
+    if executor is None:
+        return _parse_inline(parser, chunks)
+
+    if workers is None:
+        workers = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+
+    if isinstance(executor, ProcessPoolExecutor):
+        # Workers are sent the grammar only when they do not have it yet.
+        payload = pickle.dumps(parser, pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).digest()
+        return _submit_all(executor, workers, chunks, _parse_chunk_by_digest, digest,
+                           fallback=partial(_parse_chunk_with_payload, digest, payload))
+    if isinstance(executor, Executor):
+        return _submit_all(executor, workers, chunks, parse_chunk, parser)
+    if executor == 'thread':
+        return _parse_on_pool(partial(ThreadPoolExecutor, workers), workers, chunks, parse_chunk, parser)
+    if executor == 'process':
+        payload = pickle.dumps(parser, pickle.HIGHEST_PROTOCOL)
+        create = partial(ProcessPoolExecutor, workers, initializer=_initialize_worker, initargs=(payload,))
+        return _parse_on_pool(create, workers, chunks, _parse_chunk_in_worker)
+    raise ValueError(f'unknown executor: {executor!r}')
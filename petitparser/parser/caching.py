@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, NamedTuple, Optional, TypeVar
+
+from ..context import Context, Result, memo_tables
+from . import Parser
+from .combinators import DelegateParser
+
+T = TypeVar('T', covariant=True)
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class ResultCache:
+    """A thread-safe LRU mapping of input keys to results."""
+
+    __slots__ = '_results', '_lock', '_maxsize', 'hits', 'misses'
+
+    def __init__(self, maxsize: Optional[int]):
+        self._results = OrderedDict()
+        self._lock = Lock()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Result]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key: Hashable, result: Result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            if self._maxsize is not None and len(self._results) > self._maxsize:
+                self._results.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self._maxsize, len(self._results))
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = 0
+
+
+class CachingParser(DelegateParser[T], Generic[T]):
+    """Caches the results of parses starting at the beginning of the input.
+
+    Parses at other positions go straight to the delegate, so the cache is
+    meant for the root of a grammar. Cached results, and their values, are
+    shared between all the parses of the same input."""
+
+    __slots__ = '_cache', '_key', '_successes_only'
+
+    def __init__(self, delegate: Parser[T], cache: ResultCache, key: Callable[[str], Hashable] = None,
+                 successes_only: bool = False):
+        super().__init__(delegate)
+        self._cache = cache
+        self._key = key
+        self._successes_only = successes_only
+
+    def parse_on(self, context: Context) -> Result[T]:
+        if context.position != 0:
+            return self._delegate.parse_on(context)
+        key = context.buffer if self._key is None else self._key(context.buffer)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._delegate.parse_on(context)
+            if result.is_success or not self._successes_only:
+                self._cache.put(key, result)
+        return result
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        if position == 0:
+            result = self._cache.get(buffer if self._key is None else self._key(buffer))
+            if result is not None:
+                return result.position if result.is_success else -1
+        return self._delegate.fast_parse_on(buffer, position)
+
+    def cache_info(self) -> CacheInfo:
+        return self._cache.info()
+
+    def cache_clear(self):
+        self._cache.clear()
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._cache is other._cache
+                and self._key == other._key
+                and self._successes_only == other._successes_only)
+
+    def copy(self) -> Parser[T]:
+        return CachingParser(self._delegate, self._cache, self._key, self._successes_only)
+
+
+class MemoParser(DelegateParser[T], Generic[T]):
+    """Remembers the results of its delegate by position in the input.
+
+    The memo is kept per thread and per parse: it is dropped as soon as
+    another input is parsed on the thread, when parse() or accept() return,
+    or by clear(). The delegate must not have side effects."""
+
+    __slots__ = ()
+
+    def parse_on(self, context: Context) -> Result[T]:
+        memos = memo_tables
+        if context.buffer is not memos.buffer:
+            memos.start(context.buffer)
+        results = memos.results.get(self)
+        if results is None:
+            results = memos.results[self] = {}
+        position = context.position
+        result = results.get(position)
+        if result is None:
+            result = results[position] = self._delegate.parse_on(context)
+        return result
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        memos = memo_tables
+        if buffer is not memos.buffer:
+            memos.start(buffer)
+        positions = memos.positions.get(self)
+        if positions is None:
+            positions = memos.positions[self] = {}
+        stop = positions.get(position)
+        if stop is None:
+            result = memos.results.get(self, {}).get(position)
+            if result is not None and result.is_success:
+                stop = result.position
+            else:
+                # A failure does not tell whether it happened after a cut.
+                stop = self._delegate.fast_parse_on(buffer, position)
+            positions[position] = stop
+        return stop
+
+    def clear(self):
+        """Drops the memo of this parser on the calling thread."""
+        memo_tables.results.pop(self, None)
+        memo_tables.positions.pop(self, None)
+
+    def copy(self) -> Parser[T]:
+        return MemoParser(self._delegate)
@@ -1,6 +1,6 @@
-from typing import Coroutine, Generic, List, Optional, TypeVar, Union
+from typing import Coroutine, Generic, List, Optional, Tuple, TypeVar, Union
 from . import Parser
-from ..context import Context, Result
+from ..context import CommittedFailure, Context, Result
 
 T = TypeVar('T', covariant=True)
 U = TypeVar('U', covariant=True)
@@ -15,6 +15,9 @@ class DelegateParser(Parser[T], Generic[T]):
     def parse_on(self, context: Context) -> Result[T]:
         return self._delegate.parse_on(context)
 
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        return self._delegate.fast_parse_on(buffer, position)
+
     def replace(self, source: Parser[T], target: Parser[T]):
         if self._delegate is source:
             self._delegate = target
@@ -38,7 +41,7 @@ class AndParser(DelegateParser[T], Generic[T]):
 
     def fast_parse_on(self, buffer: str, position: int) -> int:
         i = self._delegate.fast_parse_on(buffer, position)
-        return -1 if i < 0 else position
+        return i if i < 0 else position
 
     def copy(self) -> Parser[T]:
         return AndParser(self._delegate)
@@ -48,7 +51,7 @@ class ListParser(Parser[T], Generic[T]):
     __slots__ = '_parsers',
 
     def __init__(self, *parsers: Parser):
-        if any(parser is None for parser in parsers):
+        if None in parsers:
             raise TypeError(str(parsers))
         self._parsers = list(parsers)
 
@@ -74,6 +77,8 @@ class ChoiceParser(ListParser[Optional[T]], Generic[T]):
             res = parser.parse_on(context)
             if res.is_success:
                 return res
+            if type(res) is CommittedFailure:
+                return res.failure(res.message)
         return context.failure('expected ' + ' or '.join(str(p) for p in self._parsers))
 
     def fast_parse_on(self, buffer: str, position: int) -> int:
@@ -81,6 +86,8 @@ class ChoiceParser(ListParser[Optional[T]], Generic[T]):
             res = parser.fast_parse_on(buffer, position)
             if res >= 0:
                 return res
+            if res == COMMITTED:
+                return -1
         return -1
 
     def or_(self, *others: Parser[U]) -> Parser[Union[T, U]]:
@@ -90,6 +97,40 @@ class ChoiceParser(ListParser[Optional[T]], Generic[T]):
         return ChoiceParser(*self._parsers)
 
 
+class ReorderedChoiceParser(ChoiceParser[T], Generic[T]):
+    """A choice trying its alternatives in another order than they were
+    listed in, which is only equivalent when no two of them can succeed at
+    the same position. Failures still list the alternatives in their
+    original order."""
+
+    __slots__ = '_listed',
+
+    def __init__(self, parsers: List[Parser[T]], listed: Tuple[int, ...]):
+        super().__init__(*parsers)
+        self._listed = listed
+
+    def parse_on(self, context: Context) -> Result[Optional[T]]:
+        for parser in self._parsers:
+            res = parser.parse_on(context)
+            if res.is_success:
+                return res
+            if type(res) is CommittedFailure:
+                return res.failure(res.message)
+        return context.failure('expected ' + ' or '.join(str(p) for p in self.listed_parsers()))
+
+    def listed_parsers(self) -> List[Parser[T]]:
+        return [self._parsers[index] for index in self._listed]
+
+    def or_(self, *others: Parser[U]) -> Parser[Union[T, U]]:
+        return ChoiceParser(*self.listed_parsers(), *others)
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return super().has_equal_properties(other) and self._listed == other._listed
+
+    def copy(self) -> Parser[T]:
+        return ReorderedChoiceParser(self._parsers, self._listed)
+
+
 class EndOfInputParser(Parser[None]):
     __slots__ = '_message',
 
@@ -102,6 +143,9 @@ class EndOfInputParser(Parser[None]):
         else:
             return context.success(None)
 
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        return position if position >= len(buffer) else -1
+
     def has_equal_properties(self, other: Parser) -> bool:
         return (super().has_equal_properties(other)
                 and self._message == other._message)
@@ -113,6 +157,38 @@ class EndOfInputParser(Parser[None]):
         return super().__str__() + '[' + self._message + ']'
 
 
+class EndParser(DelegateParser[T], Generic[T]):
+    """Parses the delegate and succeeds only at the end of the input."""
+
+    __slots__ = '_message',
+
+    def __init__(self, delegate: Parser[T], message: str):
+        super().__init__(delegate)
+        self._message = message
+
+    def parse_on(self, context: Context) -> Result[T]:
+        res = self._delegate.parse_on(context)
+        if res.is_failure or res.position >= len(res.buffer):
+            return res
+        return res.failure(self._message)
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        position = self._delegate.fast_parse_on(buffer, position)
+        if position < 0 or position >= len(buffer):
+            return position
+        return -1
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._message == other._message)
+
+    def copy(self) -> Parser[T]:
+        return EndParser(self._delegate, self._message)
+
+    def __str__(self):
+        return super().__str__() + '[' + self._message + ']'
+
+
 class NotParser(DelegateParser[None]):
     __slots__ = '_message'
 
@@ -121,8 +197,7 @@ class NotParser(DelegateParser[None]):
         self._message = message
 
     def parse_on(self, context: Context) -> Result[T]:
-        res = self._delegate.parse_on(context)
-        if res.is_failure:
+        if self._delegate.fast_parse_on(context.buffer, context.position) < 0:
             return context.success(None)
         else:
             return context.failure(self._message)
@@ -151,26 +226,30 @@ class OptionalParser(DelegateParser[Union[T, U]], Generic[T, U]):
 
     def parse_on(self, context: Context) -> Result[T]:
         res = self._delegate.parse_on(context)
-        if res.is_success:
+        if res.is_success or type(res) is CommittedFailure:
             return res
         else:
             return context.success(self._otherwise)
 
     def fast_parse_on(self, buffer: str, position: int) -> int:
         res = self._delegate.fast_parse_on(buffer, position)
-        return position if res < 0 else res
+        return position if res == -1 else res
 
     def copy(self) -> Parser[T]:
         return OptionalParser(self._delegate, self._otherwise)
 
 
 class SequenceParser(ListParser[List[T]], Generic[T]):
-    __slots__ = ()
+    __slots__ = '_cut',
 
     def __init__(self, *parsers: Parser[T]):
         super().__init__(*parsers)
+        # The index of the first cut, or None, found on the first parse.
+        self._cut = -1
 
     def parse_on(self, context: Context) -> Result[List[T]]:
+        if self._cut is not None:
+            return self._parse_committing(context)
         cur = context
         elems = []
         for parser in self._parsers:
@@ -183,13 +262,47 @@ class SequenceParser(ListParser[List[T]], Generic[T]):
 
         return cur.success(elems)
 
+    def _parse_committing(self, context: Context) -> Result[List[T]]:
+        if self._cut < 0:
+            self._cut = _cut_index(self._parsers)
+            return self.parse_on(context)
+        cur = context
+        elems = []
+        for index, parser in enumerate(self._parsers):
+            res = parser.parse_on(cur)
+            if res.is_failure:
+                if index > self._cut and type(res) is not CommittedFailure:
+                    return CommittedFailure(res.buffer, res.position, res.message)
+                return res
+
+            elems.append(res.value)
+            cur = res
+
+        return cur.success(elems)
+
     def fast_parse_on(self, buffer: str, position: int) -> int:
+        if self._cut is not None:
+            return self._fast_parse_committing(buffer, position)
         for parser in self._parsers:
             position = parser.fast_parse_on(buffer, position)
             if position < 0:
                 return position
         return position
 
+    def _fast_parse_committing(self, buffer: str, position: int) -> int:
+        if self._cut < 0:
+            self._cut = _cut_index(self._parsers)
+            return self.fast_parse_on(buffer, position)
+        for index, parser in enumerate(self._parsers):
+            position = parser.fast_parse_on(buffer, position)
+            if position < 0:
+                return COMMITTED if index > self._cut else position
+        return position
+
+    def replace(self, source, target):
+        super().replace(source, target)
+        self._cut = -1
+
     def seq(self, *others: Parser[U]) -> Parser[List[Union[T, U]]]:
         return SequenceParser(*self._parsers, *others)
 
@@ -197,6 +310,88 @@ class SequenceParser(ListParser[List[T]], Generic[T]):
         return SequenceParser(*self._parsers)
 
 
+class PickParser(SequenceParser[T], Generic[T]):
+    """A sequence fused with pick() or permute(), which only builds the values
+    it returns.
+
+    Elements that are not demanded are recognized with fast_parse_on, and
+    parsed again only to report their failure."""
+
+    __slots__ = '_indexes', '_single', '_demanded'
+
+    def __init__(self, parsers: List[Parser], indexes: Tuple[int, ...], single: bool = True,
+                 demanded: Tuple[bool, ...] = None):
+        super().__init__(*parsers)
+        self._indexes = tuple(index % len(parsers) for index in indexes)
+        self._single = single
+        if demanded is None:
+            demanded = tuple(index in self._indexes for index in range(len(parsers)))
+        self._demanded = demanded
+
+    def parse_on(self, context: Context) -> Result[T]:
+        if self._cut is not None and self._cut < 0:
+            self._cut = _cut_index(self._parsers)
+        if self._cut is not None:
+            result = super().parse_on(context)
+            return result if result.is_failure else result.success(self._select(result.value))
+
+        buffer = context.buffer
+        position = context.position
+        current = context
+        values = [None] * len(self._parsers)
+        for index, parser in enumerate(self._parsers):
+            if self._demanded[index]:
+                if current is None:
+                    current = Context(buffer, position)
+                result = parser.parse_on(current)
+                if result.is_failure:
+                    return result
+                values[index] = result.value
+                current = result
+                position = result.position
+            else:
+                stop = parser.fast_parse_on(buffer, position)
+                if stop < 0:
+                    return parser.parse_on(current or Context(buffer, position))
+                if stop != position:
+                    position = stop
+                    current = None
+        return context.success(self._select(values), position)
+
+    def _select(self, values: List) -> T:
+        if self._single:
+            return values[self._indexes[0]]
+        return [values[index] for index in self._indexes]
+
+    def seq(self, *others: Parser[U]) -> Parser[List[Union[T, U]]]:
+        return SequenceParser(self, *others)
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._indexes == other._indexes
+                and self._single == other._single
+                and self._demanded == other._demanded)
+
+    def copy(self) -> Parser[T]:
+        return PickParser(self._parsers, self._indexes, self._single, self._demanded)
+
+
+def _cut_index(parsers: List[Parser]) -> Optional[int]:
+    """Returns the index of the first cut of a sequence, looking through the
+    wrappers that pass their delegate exactly once when they succeed: not
+    through optionals, repetitions and lookaheads."""
+    from .repeating import RepeatingParser, SeparatedParser
+    opaque = AndParser, NotParser, OptionalParser, RepeatingParser, SeparatedParser
+    for index, parser in enumerate(parsers):
+        seen = set()
+        while isinstance(parser, DelegateParser) and not isinstance(parser, opaque) and parser not in seen:
+            seen.add(parser)
+            parser = parser._delegate
+        if isinstance(parser, CutParser):
+            return index
+    return None
+
+
 class SettableParser(DelegateParser[T], Generic[T]):
     __slots__ = ()
 
@@ -216,3 +411,6 @@ class SettableParser(DelegateParser[T], Generic[T]):
 
     def copy(self) -> Parser[T]:
         return SettableParser(self._delegate)
+
+
+from .primitive import COMMITTED, CutParser  # noqa: E402
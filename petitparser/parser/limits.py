@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from operator import is_not
+from threading import Lock
+from time import monotonic
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from ..context import Context, ParseTimeout, Result
+from ..utils import Mirror
+from . import Parser
+from .combinators import DelegateParser
+
+T = TypeVar('T', covariant=True)
+
+# Number of steps between two looks at the clock.
+CLOCK_INTERVAL = 1024
+
+# Number of parsers whose instrumented graphs are kept for reuse.
+INSTRUMENTED_CACHE_SIZE = 64
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class StepBudget:
+    """Counts parser invocations of a single parse against its limits."""
+
+    __slots__ = 'steps', 'furthest', 'checkpoint', '_max_steps', '_deadline'
+
+    def __init__(self, max_steps: Optional[int] = None, deadline: Optional[float] = None):
+        self.reset(max_steps, deadline)
+
+    def reset(self, max_steps: Optional[int] = None, deadline: Optional[float] = None):
+        """Starts counting a new parse against new limits."""
+        self.steps = 0
+        self.furthest = 0
+        self._max_steps = max_steps
+        self._deadline = deadline
+        self.checkpoint = 0
+
+    def check(self):
+        """Called once steps reach checkpoint, raises if a limit is exceeded."""
+        if self._max_steps is not None and self.steps > self._max_steps:
+            raise BudgetExceeded('step budget exhausted')
+        if self._deadline is not None:
+            if monotonic() > self._deadline:
+                raise BudgetExceeded('deadline exceeded')
+            checkpoint = self.steps + CLOCK_INTERVAL
+        else:
+            checkpoint = self._max_steps + 1
+        if self._max_steps is not None and checkpoint > self._max_steps:
+            checkpoint = self._max_steps + 1
+        self.checkpoint = checkpoint
+
+
+class BudgetParser(DelegateParser[T], Generic[T]):
+    __slots__ = '_budget',
+
+    def __init__(self, delegate: Parser[T], budget: StepBudget):
+        super().__init__(delegate)
+        self._budget = budget
+
+    def parse_on(self, context: Context) -> Result[T]:
+        budget = self._budget
+        budget.steps += 1
+        if context.position > budget.furthest:
+            budget.furthest = context.position
+        if budget.steps >= budget.checkpoint:
+            budget.check()
+        return self._delegate.parse_on(context)
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        budget = self._budget
+        budget.steps += 1
+        if position > budget.furthest:
+            budget.furthest = position
+        if budget.steps >= budget.checkpoint:
+            budget.check()
+        return self._delegate.fast_parse_on(buffer, position)
+
+    def copy(self) -> Parser[T]:
+        return BudgetParser(self._delegate, self._budget)
+
+
+def instrument(parser: Parser[T], budget: StepBudget) -> Parser[T]:
+    """Returns a copy of the parser graph where every parser is charged to the budget."""
+    return Mirror(parser).transform(lambda p: BudgetParser(p, budget))
+
+
+class Instrumented:
+    """An instrumented copy of a parser graph and its budget, with the
+    children of the original nodes, to tell when the graph was changed."""
+
+    __slots__ = 'parser', 'budget', '_shape'
+
+    def __init__(self, parser: Parser[T]):
+        self.budget = StepBudget()
+        self._shape: List[Tuple[Parser, List[Parser]]] = [(p, list(p.get_children())) for p in Mirror(parser)]
+        self.parser = instrument(parser, self.budget)
+
+    def is_current(self) -> bool:
+        for node, children in self._shape:
+            current = node.get_children()
+            if len(current) != len(children) or any(map(is_not, current, children)):
+                return False
+        return True
+
+
+# Instrumented graphs by parser, least recently used first. A graph is
+# taken out while it parses, so concurrent and nested parses of the same
+# parser instrument their own.
+_instrumented: OrderedDict = OrderedDict()
+_instrumented_lock = Lock()
+
+
+def _checkout(parser: Parser[T], max_steps: Optional[int], deadline: Optional[float]) -> Instrumented:
+    with _instrumented_lock:
+        instrumented = _instrumented.pop(parser, None)
+    if instrumented is None or not instrumented.is_current():
+        instrumented = Instrumented(parser)
+    instrumented.budget.reset(max_steps, deadline)
+    return instrumented
+
+
+def _checkin(parser: Parser[T], instrumented: Instrumented):
+    with _instrumented_lock:
+        _instrumented[parser] = instrumented
+        if len(_instrumented) > INSTRUMENTED_CACHE_SIZE:
+            _instrumented.popitem(last=False)
+
+
+def parse_with_budget(parser: Parser[T], inp: str, max_steps: Optional[int], deadline: Optional[float]) -> Result[T]:
+    instrumented = _checkout(parser, max_steps, deadline)
+    budget = instrumented.budget
+    try:
+        return instrumented.parser.parse_on(Context(inp, 0))
+    except BudgetExceeded as e:
+        return ParseTimeout(inp, budget.furthest, e.message, budget.steps)
+    finally:
+        _checkin(parser, instrumented)
+
+
+def accept_with_budget(parser: Parser, inp: str, max_steps: Optional[int], deadline: Optional[float]) -> bool:
+    instrumented = _checkout(parser, max_steps, deadline)
+    try:
+        return instrumented.parser.fast_parse_on(inp, 0) >= 0
+    except BudgetExceeded:
+        return False
+    finally:
+        _checkin(parser, instrumented)
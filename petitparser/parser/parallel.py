@@ -0,0 +1,178 @@
+"""Parallel parsing of one large buffer of records separated by boundaries.
+
+The buffer is split into chunks parsed in worker processes. Each chunk
+but the first starts after the first boundary in it, which is a guess: a
+boundary can also occur inside a record, e.g. a newline in a quoted CSV
+field. Chunks are therefore checked against where the previous chunk
+actually stopped, and misaligned ones are parsed again sequentially until
+they agree with the worker's records.
+
+Workers started by fork share the buffer of the parent. Otherwise the
+buffer is put in shared memory once, and each worker decodes its own copy
+of it from there, so every worker still holds the whole buffer."""
+
+from __future__ import annotations
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, TypeVar, Union
+
+from ..context import Context, Failure, Result, Success
+from . import Parser
+
+T = TypeVar('T', covariant=True)
+
+# Number of chunks per worker, so that workers finishing early get more work.
+CHUNKS_PER_WORKER = 4
+
+# Chunks are never smaller than this, so that each is worth sending to a worker.
+MIN_CHUNKSIZE = 1 << 20
+
+# The grammars and buffer of a worker process, set by the pool initializer.
+_worker_state: Optional[Tuple[Parser, Parser, str]] = None
+
+
+class Record(NamedTuple):
+    start: int
+    stop: int
+    value: Any
+
+
+class ChunkResult(NamedTuple):
+    start: int
+    stop: int
+    records: List[Record]
+    next: int
+    failure: Optional[Tuple[int, str]]
+
+
+def parse_records(record: Parser, boundary: Parser, buffer: str, position: int, stop: int,
+                  starts: Dict[int, int] = None) -> ChunkResult:
+    """Parses the records starting from position until one starts at or after
+    stop, or at one of starts."""
+    start = position
+    records = []
+    length = len(buffer)
+    parse_on = record.parse_on
+    while position < stop and position < length:
+        if starts is not None and position in starts and position != start:
+            break
+        result = parse_on(Context(buffer, position))
+        if result.is_failure:
+            return ChunkResult(start, stop, records, position, (result.position, result.message))
+        records.append(Record(position, result.position, result.value))
+        position = result.position
+        if position >= length:
+            break
+        after = boundary.fast_parse_on(buffer, position)
+        if after < 0:
+            return ChunkResult(start, stop, records, position, (position, 'boundary expected'))
+        position = after
+    return ChunkResult(start, stop, records, position, None)
+
+
+def _resync(boundary: Parser, buffer: str, start: int, stop: int) -> int:
+    for position in range(max(start - 1, 0), stop):
+        after = boundary.fast_parse_on(buffer, position)
+        if after >= start:
+            return after
+    return -1
+
+
+def parse_chunk(record: Parser, boundary: Parser, buffer: str, start: int, stop: int) -> ChunkResult:
+    """Parses the records starting in buffer[start:stop], from the first boundary on."""
+    if start > 0:
+        position = _resync(boundary, buffer, start, stop)
+        if position < 0:
+            return ChunkResult(stop, stop, [], stop, None)
+        start = position
+    return parse_records(record, boundary, buffer, start, stop)
+
+
+def _share(buffer: str) -> Tuple[shared_memory.SharedMemory, Tuple[str, int, str]]:
+    """Returns shared memory holding buffer, in the narrowest encoding with a
+    fixed number of bytes per character, and the arguments of _attach."""
+    encoding = 'latin-1' if not buffer or max(buffer) <= '\xff' else 'utf-32-le'
+    data = buffer.encode(encoding, 'surrogatepass')
+    memory = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    memory.buf[:len(data)] = data
+    return memory, (memory.name, len(data), encoding)
+
+
+def _attach(name: str, size: int, encoding: str) -> str:
+    """Returns the buffer held by the shared memory called name."""
+    memory = shared_memory.SharedMemory(name)
+    try:
+        with memory.buf[:size] as view:
+            return str(view, encoding, 'surrogatepass')
+    finally:
+        memory.close()
+
+
+def _initialize_worker(payload: bytes, buffer: Union[str, Tuple[str, int, str]]):
+    global _worker_state
+    record, boundary = pickle.loads(payload)
+    if not isinstance(buffer, str):
+        buffer = _attach(*buffer)
+    _worker_state = record, boundary, buffer
+
+
+def _parse_chunk_in_worker(start: int, stop: int) -> ChunkResult:
+    record, boundary, buffer = _worker_state
+    return parse_chunk(record, boundary, buffer, start, stop)
+
+
+def _stitch(record: Parser, boundary: Parser, buffer: str, chunks: List[ChunkResult]) -> Result[List[Record]]:
+    records: List[Record] = []
+    expected = 0
+    for chunk in chunks:
+        if expected >= chunk.stop or expected >= len(buffer):
+            continue
+        starts = {r.start: i for i, r in enumerate(chunk.records)}
+        if chunk.start != expected and expected not in starts:
+            repaired = parse_records(record, boundary, buffer, expected, chunk.stop, starts)
+            records.extend(repaired.records)
+            if repaired.failure is not None:
+                return Failure(buffer, *repaired.failure)
+            expected = repaired.next
+            if expected not in starts:
+                continue
+        records.extend(chunk.records[starts.get(expected, 0):])
+        if chunk.failure is not None:
+            return Failure(buffer, *chunk.failure)
+        expected = chunk.next
+    return Success(buffer, expected, records)
+
+
+def parse_parallel(record: Parser, buffer: str, boundary: Parser, workers: int = None,
+                   chunksize: int = None) -> Result[List[Record]]:
+    from ..tools.analyzer import Analyzer
+
+    if Analyzer(boundary).is_nullable(boundary):
+        raise ValueError(f'boundary {boundary} can succeed without consuming input')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(MIN_CHUNKSIZE, -(-len(buffer) // (workers * CHUNKS_PER_WORKER)))
+    bounds = [(start, min(start + chunksize, len(buffer))) for start in range(0, len(buffer), chunksize)]
+
+    if workers <= 1 or len(bounds) <= 1:
+        chunks = [parse_chunk(record, boundary, buffer, start, stop) for start, stop in bounds]
+    else:
+        payload = pickle.dumps((record, boundary), pickle.HIGHEST_PROTOCOL)
+        context = multiprocessing.get_context()
+        memory = None
+        shared: Union[str, Tuple[str, int, str]] = buffer
+        if context.get_start_method() != 'fork':
+            memory, shared = _share(buffer)
+        try:
+            with ProcessPoolExecutor(min(workers, len(bounds)), context, _initialize_worker,
+                                     (payload, shared)) as pool:
+                chunks = list(pool.map(_parse_chunk_in_worker, *zip(*bounds)))
+        finally:
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+    return _stitch(record, boundary, buffer, chunks)
@@ -1,7 +1,8 @@
 from __future__ import annotations
-from petitparser.context import Context, Result
+from functools import partial
+from petitparser.context import Context, Result, Token
 from typing import Callable, TypeVar, Union, overload
-from petitparser.parser import Parser
+from petitparser.parser import COMMITTED, Parser  # noqa: F401
 
 T = TypeVar('T')
 
@@ -31,7 +32,7 @@ class CharacterParser(Parser[str]):
     def neg(self, message: str = None) -> Parser[None]:
         if message is None:
             message = 'not ' + self._message
-        return CharacterParser(lambda x: not self._predicate(x), message)
+        return CharacterParser(partial(_negate, self._predicate), message)
 
     def has_equal_properties(self, other: Parser) -> bool:
         return (super().has_equal_properties(other)
@@ -45,6 +46,10 @@ class CharacterParser(Parser[str]):
         return super().__str__() + '[' + self._message + ']'
 
 
+def _negate(predicate: CharPredicate, x: str) -> bool:
+    return not predicate(x)
+
+
 class EpsilonParser(Parser[None]):
     def parse_on(self, context: Context) -> Result[None]:
         return context.success(None)
@@ -56,6 +61,20 @@ class EpsilonParser(Parser[None]):
         return EpsilonParser()
 
 
+class CutParser(Parser[None]):
+    """Consumes nothing; once passed in a sequence, a failure of the rest of
+    the sequence commits the enclosing choice to its current alternative."""
+
+    def parse_on(self, context: Context) -> Result[None]:
+        return context.success(None)
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        return position
+
+    def copy(self) -> Parser[None]:
+        return CutParser()
+
+
 class FailureParser(Parser[None]):
     __slots__ = '_message',
 
@@ -80,12 +99,20 @@ class FailureParser(Parser[None]):
 
 
 class StringParser(Parser[str]):
-    __slots__ = '_size', '_predicate', '_message'
+    __slots__ = '_size', '_predicate', '_message', '_literal'
 
     def __init__(self, size: int, predicate: Callable[[str], bool], message: str):
         self._size = size
         self._predicate = predicate
         self._message = message
+        # Exact literals are matched in place and return the literal itself
+        # instead of a copy of the input.
+        literal = getattr(predicate, '__self__', None)
+        if (type(literal) is str and len(literal) == size
+                and getattr(predicate, '__name__', None) == '__eq__'):
+            self._literal = literal
+        else:
+            self._literal = None
 
     def parse_on(self, context: Context) -> Result[str]:
         buffer = context.buffer
@@ -93,17 +120,26 @@ class StringParser(Parser[str]):
 
         stop = start + self._size
         if stop <= len(buffer):
-            result = buffer[start:stop]
-            if self._predicate(result):
-                return context.success(result, stop)
+            literal = self._literal
+            if literal is not None:
+                if buffer.startswith(literal, start):
+                    return context.success(literal, stop)
+            else:
+                result = buffer[start:stop]
+                if self._predicate(result):
+                    return context.success(result, stop)
         return context.failure(self._message)
 
     def fast_parse_on(self, buffer: str, position: int) -> int:
         stop = position + self._size
-        if stop <= len(buffer) and self._predicate(buffer[position:stop]):
-            return stop
-        else:
-            return -1
+        if stop <= len(buffer):
+            literal = self._literal
+            if literal is not None:
+                if buffer.startswith(literal, position):
+                    return stop
+            elif self._predicate(buffer[position:stop]):
+                return stop
+        return -1
 
     def has_equal_properties(self, other: Parser) -> bool:
         return (super().has_equal_properties(other)
@@ -116,3 +152,69 @@ class StringParser(Parser[str]):
 
     def __str__(self):
         return super().__str__() + '[' + self._message + ']'
+
+
+class TokenKindParser(Parser[Token]):
+    """Parses a token of a kind, in a token stream."""
+
+    __slots__ = '_kind', '_message'
+
+    def __init__(self, kind: str, message: str):
+        self._kind = kind
+        self._message = message
+
+    def parse_on(self, context: Context) -> Result[Token]:
+        buffer = context.buffer
+        position = context.position
+        if position < len(buffer) and buffer.kinds[position] == buffer.kind_ids.get(self._kind):
+            return context.success(buffer[position], position + 1)
+        return context.failure(self._message)
+
+    def fast_parse_on(self, buffer, position: int) -> int:
+        if position < len(buffer) and buffer.kinds[position] == buffer.kind_ids.get(self._kind):
+            return position + 1
+        return -1
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._kind == other._kind
+                and self._message == other._message)
+
+    def copy(self) -> Parser[Token]:
+        return TokenKindParser(self._kind, self._message)
+
+    def __str__(self):
+        return super().__str__() + '[' + self._message + ']'
+
+
+class TokenTextParser(Parser[Token]):
+    """Parses a token with the given text, in a token stream."""
+
+    __slots__ = '_text', '_message'
+
+    def __init__(self, text: str, message: str):
+        self._text = text
+        self._message = message
+
+    def parse_on(self, context: Context) -> Result[Token]:
+        buffer = context.buffer
+        position = context.position
+        if position < len(buffer) and buffer.has_text(position, self._text):
+            return context.success(buffer[position], position + 1)
+        return context.failure(self._message)
+
+    def fast_parse_on(self, buffer, position: int) -> int:
+        if position < len(buffer) and buffer.has_text(position, self._text):
+            return position + 1
+        return -1
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._text == other._text
+                and self._message == other._message)
+
+    def copy(self) -> Parser[Token]:
+        return TokenTextParser(self._text, self._message)
+
+    def __str__(self):
+        return super().__str__() + '[' + self._message + ']'
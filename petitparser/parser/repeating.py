@@ -1,7 +1,10 @@
-from petitparser.context import Context, Result
+from array import array
+
+from petitparser.context import CommittedFailure, Context, Result
 from . import Parser
 from typing import Generic, List, TypeVar
 from .combinators import DelegateParser
+from .primitive import COMMITTED
 
 T = TypeVar('T')
 
@@ -31,11 +34,13 @@ class RepeatingParser(DelegateParser[List[T]], Generic[T]):
 
 
 class LimitedRepeatingParser(RepeatingParser[T], Generic[T]):
-    __slots__ = '_limit',
+    __slots__ = '_limit', '_filter'
 
     def __init__(self, delegate: Parser[T], limit: Parser, min: int, max: int):
         super().__init__(delegate, min, max)
         self._limit = limit
+        # The StartFilter of the limit, or None, found on the first parse.
+        self._filter = -1
 
     def get_children(self) -> List[Parser]:
         return [self._delegate, self._limit]
@@ -44,6 +49,25 @@ class LimitedRepeatingParser(RepeatingParser[T], Generic[T]):
         super().replace(source, target)
         if source is self._limit:
             self._limit = target
+        self._filter = -1
+
+    def _start_filter(self):
+        if self._filter == -1:
+            from ..tools.analyzer import Analyzer, start_filter
+            self._filter = start_filter(Analyzer(self._limit), self._limit)
+        return self._filter
+
+    def _may_stop(self, buffer: str, position: int) -> bool:
+        """Tests if the limit may succeed at position, without calling it."""
+        start = self._start_filter()
+        if start is None:
+            return True
+        if position > len(buffer) - start.min_length:
+            return False
+        if start.chars is None:
+            return True
+        char = buffer[position]
+        return char in start.chars or (start.other and char > '\xff')
 
 
 class GreedyRepeatingParser(LimitedRepeatingParser[T], Generic[T]):
@@ -61,25 +85,29 @@ class GreedyRepeatingParser(LimitedRepeatingParser[T], Generic[T]):
             elements.append(result.value)
             current = result
 
-        contexts = [current]
+        buffer = context.buffer
+        positions = array('q', [current.position])
         while self._max == -1 or len(elements) < self._max:
             result = self._delegate.parse_on(current)
             if result.is_failure:
+                if type(result) is CommittedFailure:
+                    return result
                 break
             elements.append(result.value)
-            contexts.append(result)
+            positions.append(result.position)
             current = result
 
+        # The limit is only recognized, except where its failure is the result.
+        limit = self._limit.fast_parse_on
         while True:
-            limiter = self._limit.parse_on(contexts[-1])
-            if limiter.is_success:
-                return contexts[-1].success(elements)
-            if not elements:
-                return limiter
-            contexts.pop()
+            position = positions[-1]
+            if not elements or len(positions) == 1:
+                limiter = self._limit.parse_on(Context(buffer, position))
+                return context.success(elements, position) if limiter.is_success else limiter
+            if self._may_stop(buffer, position) and limit(buffer, position) >= 0:
+                return context.success(elements, position)
+            positions.pop()
             elements.pop()
-            if not contexts:
-                return limiter
 
     def fast_parse_on(self, buffer: str, position: int) -> int:
         count = 0
@@ -87,24 +115,35 @@ class GreedyRepeatingParser(LimitedRepeatingParser[T], Generic[T]):
         while count < self._min:
             result = self._delegate.fast_parse_on(buffer, current)
             if result < 0:
-                return -1
+                return result
             current = result
             count += 1
 
-        positions = [current]
+        positions = array('q', [current])
 
         while self._max == -1 or count < self._max:
             result = self._delegate.fast_parse_on(buffer, current)
             if result < 0:
+                if result == COMMITTED:
+                    return result
                 break
             positions.append(result)
             current = result
             count += 1
 
+        limit = self._limit.fast_parse_on
+        start = self._start_filter()
+        if start is None:
+            last, chars, other = len(buffer), None, True
+        else:
+            last, chars, other = len(buffer) - start.min_length, start.chars, start.other
+
         while True:
-            limiter = self._limit.fast_parse_on(buffer, positions[-1])
-            if limiter >= 0:
-                return positions[-1]
+            current = positions[-1]
+            if current <= last:
+                char = buffer[current] if chars is not None else None
+                if (chars is None or char in chars or other and char > '\xff') and limit(buffer, current) >= 0:
+                    return current
 
             if count == 0:
                 return -1
@@ -134,17 +173,21 @@ class LazyRepeatingParser(LimitedRepeatingParser[T], Generic[T]):
             elements.append(result.value)
             current = result
 
+        # The limit is only recognized, except where its failure is the result.
+        limit = self._limit.fast_parse_on
         while True:
-            limiter = self._limit.parse_on(current)
-            if limiter.is_success:
-                return current.success(elements)
-
             if self._max != -1 and len(elements) >= self._max:
-                return limiter
+                limiter = self._limit.parse_on(current)
+                return current.success(elements) if limiter.is_success else limiter
+
+            if self._may_stop(current.buffer, current.position) and limit(current.buffer, current.position) >= 0:
+                return current.success(elements)
 
             result = self._delegate.parse_on(current)
             if result.is_failure:
-                return limiter
+                if type(result) is CommittedFailure:
+                    return result
+                return self._limit.parse_on(current)
 
             elements.append(result.value)
             current = result
@@ -155,25 +198,33 @@ class LazyRepeatingParser(LimitedRepeatingParser[T], Generic[T]):
         while count < self._min:
             result = self._delegate.fast_parse_on(buffer, current)
             if result < 0:
-                return -1
+                return result
 
             current = result
             count += 1
 
+        limit = self._limit.fast_parse_on
+        start = self._start_filter()
+        if start is None:
+            last, chars, other = len(buffer), None, True
+        else:
+            last, chars, other = len(buffer) - start.min_length, start.chars, start.other
+
         while True:
-            limiter = self._limit.fast_parse_on(buffer, current)
-            if limiter >= 0:
-                return current
-            else:
-                if self._max != -1 and count >= self._max:
-                    return -1
+            if current <= last:
+                char = buffer[current] if chars is not None else None
+                if (chars is None or char in chars or other and char > '\xff') and limit(buffer, current) >= 0:
+                    return current
 
-                result = self._delegate.fast_parse_on(buffer, current)
-                if result < 0:
-                    return -1
+            if self._max != -1 and count >= self._max:
+                return -1
 
-                current = result
-                count += 1
+            result = self._delegate.fast_parse_on(buffer, current)
+            if result < 0:
+                return result
+
+            current = result
+            count += 1
 
     def copy(self) -> Parser[T]:
         return LazyRepeatingParser(self._delegate, self._limit, self._min, self._max)
@@ -197,6 +248,8 @@ class PossesiveRepeatingParser(RepeatingParser[T], Generic[T]):
         while self._max == -1 or len(elements) < self._max:
             result = self._delegate.parse_on(current)
             if result.is_failure:
+                if type(result) is CommittedFailure:
+                    return result
                 return current.success(elements)
 
             elements.append(result.value)
@@ -219,7 +272,7 @@ class PossesiveRepeatingParser(RepeatingParser[T], Generic[T]):
         while self._max == -1 or count < self._max:
             result = self._delegate.fast_parse_on(buffer, current)
             if result < 0:
-                return current
+                return result if result == COMMITTED else current
 
             count += 1
             current = result
@@ -228,3 +281,85 @@ class PossesiveRepeatingParser(RepeatingParser[T], Generic[T]):
 
     def copy(self) -> Parser[T]:
         return PossesiveRepeatingParser(self._delegate, self._min, self._max)
+
+
+class SeparatedParser(DelegateParser[List[T]], Generic[T]):
+    """Parses one or more elements separated by separators into one list.
+
+    Separators are kept in the list between the elements unless
+    keep_separators is off. With trailing, a separator after the last
+    element is consumed too (and kept)."""
+
+    __slots__ = '_separator', '_keep_separators', '_trailing'
+
+    def __init__(self, delegate: Parser[T], separator: Parser, keep_separators: bool = True, trailing: bool = False):
+        super().__init__(delegate)
+        self._separator = separator
+        self._keep_separators = keep_separators
+        self._trailing = trailing
+
+    def parse_on(self, context: Context) -> Result[List[T]]:
+        parse_element = self._delegate.parse_on
+        parse_separator = self._separator.parse_on
+        keep_separators = self._keep_separators
+        result = parse_element(context)
+        if result.is_failure:
+            return result
+        elements = [result.value]
+        current = result
+
+        while True:
+            separator = parse_separator(current)
+            if separator.is_failure:
+                if type(separator) is CommittedFailure:
+                    return separator
+                break
+            result = parse_element(separator)
+            if result.is_failure:
+                if type(result) is CommittedFailure:
+                    return result
+                if self._trailing:
+                    if keep_separators:
+                        elements.append(separator.value)
+                    current = separator
+                break
+            if keep_separators:
+                elements.append(separator.value)
+            elements.append(result.value)
+            current = result
+
+        return current.success(elements)
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        parse_element = self._delegate.fast_parse_on
+        parse_separator = self._separator.fast_parse_on
+        current = parse_element(buffer, position)
+        if current < 0:
+            return current
+
+        while True:
+            separator = parse_separator(buffer, current)
+            if separator < 0:
+                return separator if separator == COMMITTED else current
+            result = parse_element(buffer, separator)
+            if result < 0:
+                if result == COMMITTED:
+                    return result
+                return separator if self._trailing else current
+            current = result
+
+    def replace(self, source: Parser, target: Parser):
+        super().replace(source, target)
+        if self._separator is source:
+            self._separator = target
+
+    def get_children(self) -> List[Parser]:
+        return [self._delegate, self._separator]
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._keep_separators == other._keep_separators
+                and self._trailing == other._trailing)
+
+    def copy(self) -> Parser[List[T]]:
+        return SeparatedParser(self._delegate, self._separator, self._keep_separators, self._trailing)
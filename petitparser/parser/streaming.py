@@ -0,0 +1,243 @@
+"""Push parsing of records from input arriving in chunks."""
+
+from __future__ import annotations
+import codecs
+import math
+from typing import TYPE_CHECKING, AsyncIterator, Generic, List, TypeVar, Union
+
+from ..context import Context, Failure, ParseError, Result, memo_tables
+from ..utils import Mirror
+from . import Parser
+from .combinators import DelegateParser, EndOfInputParser, EndParser
+from .primitive import (CharacterParser, CutParser, EpsilonParser, FailureParser, StringParser, TokenKindParser,
+                        TokenTextParser)
+from .repeating import LimitedRepeatingParser
+
+if TYPE_CHECKING:
+    from ..tools.layout import Layout
+
+T = TypeVar('T', covariant=True)
+
+
+class ReadTracker:
+    """The furthest a parse read into its buffer, as one past the last
+    position read: a parse that tried to read at the end of the buffer
+    reads past it, and may change once more input arrives."""
+
+    __slots__ = 'furthest',
+
+    def __init__(self):
+        self.furthest = 0
+
+
+class TrackingParser(DelegateParser[T], Generic[T]):
+    """Records how far the copy of a node it wraps reads: reach characters
+    from where it is invoked, and the character after its end when after is
+    set, or after the layout it skips when layout is set."""
+
+    __slots__ = '_tracker', '_reach', '_after', '_layout'
+
+    def __init__(self, delegate: Parser[T], tracker: ReadTracker, reach: float, after: bool = False,
+                 layout: Layout = None):
+        super().__init__(delegate)
+        self._tracker = tracker
+        self._reach = reach
+        self._after = after
+        self._layout = layout
+
+    def _invoke(self, buffer: str, position: int):
+        tracker = self._tracker
+        reach = position + self._reach
+        if self._layout is not None:
+            reach = max(reach, self._layout.skip(buffer, position) + 1)
+        if reach > tracker.furthest:
+            tracker.furthest = reach
+
+    def _stop(self, position: int):
+        if position + 1 > self._tracker.furthest:
+            self._tracker.furthest = position + 1
+
+    def parse_on(self, context: Context) -> Result[T]:
+        self._invoke(context.buffer, context.position)
+        result = self._delegate.parse_on(context)
+        if self._after and result.is_success:
+            self._stop(result.position)
+        return result
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        self._invoke(buffer, position)
+        stop = self._delegate.fast_parse_on(buffer, position)
+        if self._after and stop >= 0:
+            self._stop(stop)
+        return stop
+
+    def copy(self) -> Parser[T]:
+        return TrackingParser(self._delegate, self._tracker, self._reach, self._after, self._layout)
+
+
+def track_reads(parser: Parser[T], tracker: ReadTracker) -> Parser[T]:
+    """Returns a copy of the parser graph recording how far it reads into its
+    buffer in tracker.
+
+    Terminals read the characters they match, the end of the input is read
+    by end(), expression builders and layout, and parsers of unknown types
+    without children are taken to read everything."""
+    from ..tools.expression_builder import ExpressionParser
+    from ..tools.layout import LayoutParser
+
+    def transform(p: Parser) -> Parser:
+        if isinstance(p, LimitedRepeatingParser):
+            # Without its prefilter, which looks ahead by the length of the
+            # limit, the limit is invoked and tracked wherever it may stop.
+            p._filter = None
+        if isinstance(p, StringParser):
+            return TrackingParser(p, tracker, p._size)
+        if isinstance(p, (CharacterParser, EndOfInputParser, TokenKindParser, TokenTextParser)):
+            return TrackingParser(p, tracker, 1)
+        if isinstance(p, (EndParser, ExpressionParser)):
+            return TrackingParser(p, tracker, 0, after=True)
+        if isinstance(p, LayoutParser):
+            return TrackingParser(p, tracker, 0, after=p._after, layout=None if p._after else p._layout)
+        if isinstance(p, (EpsilonParser, CutParser, FailureParser)) or p.get_children():
+            return p
+        return TrackingParser(p, tracker, math.inf)
+
+    return Mirror(parser).transform(transform)
+
+
+class PushParser(Generic[T]):
+    """Parses the records of input fed in chunks.
+
+    A record is parsed once it succeeds without reading at the end of the
+    buffered input, so that more input cannot change it, and at least
+    lookahead characters before it. While a record is incomplete, it is
+    parsed again only after the unconsumed input has doubled, which keeps
+    the total work linear in the size of the input. Consumed input is
+    dropped, so memory is bounded by the unconsumed tail, which max_size
+    limits.
+
+    The optional layout is skipped between records. Once closed, the rest of
+    the input is parsed as a last record, and its result may be a failure."""
+
+    def __init__(self, parser: Parser[T], lookahead: int = 1, layout: Layout = None, max_size: int = None):
+        if lookahead < 1:
+            raise ValueError('records need a lookahead of at least one character')
+        self._parse_on = parser.parse_on
+        self._tracker = ReadTracker()
+        self._tracked_parse_on = track_reads(parser, self._tracker).parse_on
+        self._lookahead = lookahead
+        self._layout = layout
+        self._max_size = max_size
+        self._buffer = ''
+        # Chunks fed since the last drain, and the length of the input with them.
+        self._chunks: List[str] = []
+        self._length = 0
+        self._start = 0
+        self._retry = 0
+        self._offset = 0
+        self._closed = False
+
+    @property
+    def offset(self) -> int:
+        """The number of characters consumed, and dropped, so far."""
+        return self._offset + self._start
+
+    @property
+    def pending(self) -> int:
+        """The number of characters waiting for the rest of their record."""
+        return self._length - self._start
+
+    def feed(self, chunk: str) -> List[Result[T]]:
+        """Adds chunk to the input and returns the results of the records it completes."""
+        if self._closed:
+            raise ValueError('push parser is closed')
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        results = self._drain(False) if self.pending >= self._retry else []
+        if self._max_size is not None and self.pending > self._max_size:
+            self._join()
+            raise ParseError(Failure(self._buffer, self._start, f'record longer than {self._max_size} characters'))
+        return results
+
+    def close(self) -> List[Result[T]]:
+        """Ends the input and returns the results of the remaining records."""
+        if self._closed:
+            return []
+        self._closed = True
+        results = self._drain(True)
+        self._offset += self._start
+        self._buffer = ''
+        self._length = self._start = 0
+        return results
+
+    def _join(self):
+        """Drops the consumed input and appends the chunks fed since."""
+        if self._chunks:
+            self._buffer = self._buffer[self._start:] + ''.join(self._chunks)
+            self._chunks = []
+            self._offset += self._start
+            self._length -= self._start
+            self._start = 0
+
+    def _drain(self, final: bool) -> List[Result[T]]:
+        self._join()
+        buffer = self._buffer
+        length = len(buffer)
+        settled = length - self._lookahead
+        tracker = self._tracker
+        results = []
+        while self._start < length:
+            if self._layout is not None:
+                position = self._layout.skip(buffer, self._start)
+                if position >= length and not final:
+                    break
+                self._start = position
+                if position >= length:
+                    break
+            if not final and length - self._start < self._retry:
+                break
+
+            if final:
+                result = self._parse_on(Context(buffer, self._start))
+                results.append(result)
+                if result.is_failure or result.position == self._start:
+                    self._start = length
+                else:
+                    self._start = result.position
+                continue
+            tracker.furthest = 0
+            result = self._tracked_parse_on(Context(buffer, self._start))
+            if (result.is_success and self._start < result.position <= settled
+                    and tracker.furthest <= length):
+                results.append(result)
+                self._start = result.position
+                self._retry = 0
+            else:
+                self._retry = 2 * (length - self._start)
+                break
+        memo_tables.release()
+        return results
+
+
+async def aparse(parser: Parser[T], reader, chunksize: int = 65536, encoding: str = 'utf-8',
+                 **options) -> AsyncIterator[Result[T]]:
+    """Reads chunks from reader, an asyncio.StreamReader or any object with an
+    awaitable read(n), and yields the results of the records parsed from them.
+
+    Bytes are decoded with encoding, keeping characters split across chunks
+    whole, and strings are parsed as they are. The remaining options are
+    those of PushParser."""
+    push = PushParser(parser, **options)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while True:
+        chunk: Union[bytes, str] = await reader.read(chunksize)
+        if not chunk:
+            break
+        for result in push.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk):
+            yield result
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        for result in push.feed(tail):
+            yield result
+    for result in push.close():
+        yield result
@@ -1,4 +1,4 @@
-from ..parser.primitive import EpsilonParser, FailureParser
+from ..parser.primitive import CutParser, EpsilonParser, FailureParser
 from ..parser import Parser
 
 
@@ -8,3 +8,9 @@ def epsilon() -> Parser[None]:
 
 def fail(message: str = 'impossible'):
     return FailureParser(message)
+
+
+def cut() -> Parser[None]:
+    """Commits the enclosing choice to the current alternative once the
+    sequence containing it gets past it."""
+    return CutParser()
@@ -1,3 +1,4 @@
+from functools import partial
 from .parser.primitive import StringParser
 
 
@@ -11,4 +12,8 @@ def of(value: str, message: str = None):
 def of_ignoring_case(value: str, message: str = None):
     if message is None:
         message = f'{value!r} expected'
-    return StringParser(len(value), lambda x: value.casefold() == x.casefold(), message)
+    return StringParser(len(value), partial(_equals_ignoring_case, value.casefold()), message)
+
+
+def _equals_ignoring_case(folded: str, x: str):
+    return folded == x.casefold()
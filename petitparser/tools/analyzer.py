@@ -0,0 +1,447 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..parser import Parser
+from ..parser.actions import ContinuationParser, TrimmingParser
+from ..parser.combinators import (AndParser, ChoiceParser, DelegateParser, EndOfInputParser, EndParser, NotParser,
+                                  OptionalParser, SequenceParser, SettableParser)
+from ..parser.primitive import (CharacterParser, CutParser, EpsilonParser, FailureParser, StringParser, TokenKindParser,
+                                TokenTextParser)
+from ..parser.repeating import LimitedRepeatingParser, RepeatingParser, SeparatedParser
+from ..utils import Mirror
+from .layout import LayoutParser
+
+
+def _any_character(char: str) -> bool:
+    return True
+
+
+# A first set is a frozenset of single characters and character predicates.
+FirstSet = FrozenSet[Any]
+
+EMPTY: FirstSet = frozenset()
+ANY: FirstSet = frozenset([_any_character])
+
+# The minimum length of parsers which never succeed.
+INFINITE = float('inf')
+
+# Pairs of builtin predicates that hold for no common character.
+_DISJOINT_PREDICATES = {
+    frozenset(pair) for pair in [
+        (str.isdigit, str.isalpha), (str.isdigit, str.isspace),
+        (str.isdigit, str.isupper), (str.isdigit, str.islower),
+        (str.isalpha, str.isspace), (str.isalnum, str.isspace),
+        (str.isupper, str.isspace), (str.islower, str.isspace),
+        (str.isupper, str.islower),
+    ]
+}
+
+
+def literal_of(parser: Parser) -> Optional[str]:
+    """Returns the literal matched by a character or string parser, if known."""
+    if isinstance(parser, StringParser):
+        return parser._literal
+    if isinstance(parser, CharacterParser):
+        predicate = parser._predicate
+        owner = getattr(predicate, '__self__', None)
+        if type(owner) is str and getattr(predicate, '__name__', None) == '__eq__':
+            return owner
+    return None
+
+
+def _predicate_elements(predicate: Callable[[str], bool]) -> FirstSet:
+    owner = getattr(predicate, '__self__', None)
+    if type(owner) is str:
+        name = getattr(predicate, '__name__', None)
+        if name == '__eq__' and len(owner) == 1:
+            return frozenset(owner)
+        if name == '__contains__':
+            return frozenset(owner)
+    return frozenset([predicate])
+
+
+def _overlaps(a, b) -> bool:
+    if type(a) is str:
+        if type(b) is str:
+            return a == b
+        a, b = b, a
+    if type(b) is str:
+        try:
+            return bool(a(b))
+        except Exception:
+            return True
+    return a is b or a == b or frozenset((a, b)) not in _DISJOINT_PREDICATES
+
+
+def is_disjoint(first: FirstSet, other: FirstSet) -> bool:
+    """Tests if no character can be in both first sets."""
+    return not any(_overlaps(a, b) for a in first for b in other)
+
+
+class FirstCharTable(NamedTuple):
+    """The items whose parser can match, by the character at the position."""
+    by_char: Dict[str, Tuple[Any, ...]]
+    # For characters outside of Latin-1, and at the end of the input.
+    other: Tuple[Any, ...]
+    at_end: Tuple[Any, ...]
+
+
+def first_char_table(analyzer: Analyzer, items: Iterable, parser_of: Callable[[Any], Parser] = None) -> FirstCharTable:
+    """Tabulates, for every Latin-1 character, the items (in order) whose
+    parser can match at a position holding that character."""
+    items = tuple(items)
+    admits = []
+    for item in items:
+        parser = item if parser_of is None else parser_of(item)
+        if analyzer.is_nullable(parser):
+            admits.append(None)
+        else:
+            first = analyzer.first_set(parser)
+            admits.append((frozenset(e for e in first if isinstance(e, str)),
+                           tuple(e for e in first if not isinstance(e, str))))
+
+    def candidates(char):
+        return tuple(item for item, a in zip(items, admits)
+                     if a is None or char in a[0] or any(predicate(char) for predicate in a[1]))
+
+    shared = {}
+    by_char = {}
+    for code in range(256):
+        found = candidates(chr(code))
+        by_char[chr(code)] = shared.setdefault(found, found)
+    other = tuple(item for item, a in zip(items, admits)
+                  if a is None or a[1] or any(char > '\xff' for char in a[0]))
+    at_end = tuple(item for item, a in zip(items, admits) if a is None)
+    return FirstCharTable(by_char, other, at_end)
+
+
+class StartFilter(NamedTuple):
+    """Where a parser that cannot succeed without consuming input may succeed."""
+    min_length: float
+    # The Latin-1 characters it can start with, None for any character.
+    chars: Optional[FrozenSet[str]]
+    # Whether it can start with characters outside of Latin-1.
+    other: bool
+
+
+def start_filter(analyzer: Analyzer, parser: Parser) -> Optional[StartFilter]:
+    """Returns the filter of positions where parser may succeed, None when it is nullable."""
+    if analyzer.is_nullable(parser):
+        return None
+    table = first_char_table(analyzer, [parser])
+    chars = frozenset(char for char, found in table.by_char.items() if found)
+    other = bool(table.other)
+    if other and len(chars) == len(table.by_char):
+        chars = None
+    # A parser that is not nullable consumes at least one character.
+    return StartFilter(max(analyzer.min_length(parser), 1), chars, other)
+
+
+def _children(parser: Parser) -> List[Parser]:
+    return parser.get_children()
+
+
+def _solve(parsers: List[Parser], parents: Dict[Parser, List[Parser]], rule, initial):
+    """Computes the least fixed point of a monotone rule over the graph."""
+    values = dict.fromkeys(parsers, initial)
+    todo = deque(parsers)
+    queued = set(parsers)
+    while todo:
+        parser = todo.popleft()
+        queued.discard(parser)
+        value = rule(parser, values)
+        if value != values[parser]:
+            values[parser] = value
+            for parent in parents[parser]:
+                if parent not in queued:
+                    queued.add(parent)
+                    todo.append(parent)
+    return values
+
+
+def _nullable_rule(parser: Parser, nullable: Dict[Parser, bool]) -> bool:
+    if isinstance(parser, (CharacterParser, FailureParser, TokenKindParser, TokenTextParser)):
+        return False
+    if isinstance(parser, StringParser):
+        return parser._size == 0
+    if isinstance(parser, (EpsilonParser, CutParser, EndOfInputParser, AndParser, NotParser, OptionalParser)):
+        return True
+    if isinstance(parser, SequenceParser):
+        return all(nullable[p] for p in parser._parsers)
+    if isinstance(parser, ChoiceParser):
+        return any(nullable[p] for p in parser._parsers)
+    if isinstance(parser, RepeatingParser):
+        return parser._min == 0 or nullable[parser._delegate]
+    if isinstance(parser, ContinuationParser):
+        return True
+    if isinstance(parser, DelegateParser):
+        return nullable[parser._delegate]
+    return True
+
+
+def _first_rule(nullable: Dict[Parser, bool]):
+    def rule(parser: Parser, first: Dict[Parser, FirstSet]) -> FirstSet:
+        if isinstance(parser, CharacterParser):
+            return _predicate_elements(parser._predicate)
+        if isinstance(parser, StringParser):
+            if parser._size == 0:
+                return EMPTY
+            literal = literal_of(parser)
+            return ANY if literal is None else frozenset(literal[0])
+        if isinstance(parser, (EpsilonParser, CutParser, EndOfInputParser, FailureParser, AndParser, NotParser)):
+            return EMPTY
+        if isinstance(parser, SequenceParser):
+            result = EMPTY
+            for p in parser._parsers:
+                result = result | first[p]
+                if not nullable[p]:
+                    break
+            return result
+        if isinstance(parser, ChoiceParser):
+            return EMPTY.union(*(first[p] for p in parser._parsers))
+        if isinstance(parser, TrimmingParser):
+            result = first[parser._left] | first[parser._delegate]
+            if nullable[parser._delegate]:
+                result = result | first[parser._right]
+            return result
+        if isinstance(parser, ContinuationParser):
+            return ANY
+        if isinstance(parser, LayoutParser) and not parser._after:
+            return ANY
+        if isinstance(parser, DelegateParser):
+            return first[parser._delegate]
+        return ANY
+    return rule
+
+
+def _never_fails_rule(parser: Parser, total: Dict[Parser, bool]) -> bool:
+    if isinstance(parser, (EpsilonParser, CutParser, OptionalParser)):
+        return True
+    if isinstance(parser, RepeatingParser) and not isinstance(parser, LimitedRepeatingParser):
+        return parser._min == 0 or total[parser._delegate]
+    if isinstance(parser, SequenceParser):
+        return all(total[p] for p in parser._parsers)
+    if isinstance(parser, ChoiceParser):
+        return any(total[p] for p in parser._parsers)
+    if isinstance(parser, (AndParser, NotParser, EndParser, ContinuationParser, LimitedRepeatingParser)):
+        return False
+    if isinstance(parser, DelegateParser):
+        return total[parser._delegate]
+    return False
+
+
+def _min_length_rule(parser: Parser, lengths: Dict[Parser, float]) -> float:
+    if isinstance(parser, (CharacterParser, TokenKindParser, TokenTextParser)):
+        return 1
+    if isinstance(parser, StringParser):
+        return parser._size
+    if isinstance(parser, FailureParser):
+        return INFINITE
+    if isinstance(parser, (EpsilonParser, CutParser, EndOfInputParser, AndParser, NotParser, OptionalParser,
+                           ContinuationParser)):
+        return 0
+    if isinstance(parser, SequenceParser):
+        return sum(lengths[p] for p in parser._parsers)
+    if isinstance(parser, ChoiceParser):
+        return min(lengths[p] for p in parser._parsers)
+    if isinstance(parser, RepeatingParser):
+        return 0 if parser._min == 0 else parser._min * lengths[parser._delegate]
+    if isinstance(parser, DelegateParser):
+        return lengths[parser._delegate]
+    return 0
+
+
+class Analyzer:
+    """Computes nullability and first sets of all parsers reachable from a root."""
+
+    def __init__(self, root: Parser):
+        self._root = root
+        self._parsers = list(Mirror(root))
+        parents = {p: [] for p in self._parsers}
+        for parent in self._parsers:
+            for child in _children(parent):
+                parents[child].append(parent)
+        self._parents = parents
+        self._nullable = _solve(self._parsers, parents, _nullable_rule, False)
+        self._first = _solve(self._parsers, parents,
+                             _first_rule(self._nullable), EMPTY)
+        self._total = None
+        self._min_length = None
+
+    @property
+    def root(self) -> Parser:
+        return self._root
+
+    @property
+    def parsers(self) -> List[Parser]:
+        return self._parsers
+
+    def is_nullable(self, parser: Parser) -> bool:
+        """Tests if the parser can succeed without consuming input."""
+        return self._nullable[parser]
+
+    def first_set(self, parser: Parser) -> FirstSet:
+        """Returns the characters (and character predicates) a non-empty match of parser can start with."""
+        return self._first[parser]
+
+    def never_fails(self, parser: Parser) -> bool:
+        """Tests if the parser succeeds on every input."""
+        if self._total is None:
+            self._total = _solve(self._parsers, self._parents,
+                                 _never_fails_rule, False)
+        return self._total[parser]
+
+    def min_length(self, parser: Parser) -> float:
+        """Returns the length of the shortest input the parser succeeds on,
+        INFINITE when it never succeeds."""
+        if self._min_length is None:
+            self._min_length = _solve(self._parsers, self._parents,
+                                      _min_length_rule, INFINITE)
+        return self._min_length[parser]
+
+    def path_to(self, parser: Parser) -> Tuple[Parser, ...]:
+        """Returns the shortest path of parsers from the root to the given parser."""
+        return _paths(self._root, {parser})[parser]
+
+
+def _paths(root: Parser, targets) -> Dict[Parser, Tuple[Parser, ...]]:
+    previous = {root: None}
+    todo = deque([root])
+    remaining = set(targets)
+    remaining.discard(root)
+    while todo and remaining:
+        parent = todo.popleft()
+        for child in _children(parent):
+            if child not in previous:
+                previous[child] = parent
+                remaining.discard(child)
+                todo.append(child)
+
+    result = {}
+    for target in targets:
+        path = []
+        current = target
+        while current is not None:
+            path.append(current)
+            current = previous[current]
+        result[target] = tuple(reversed(path))
+    return result
+
+
+class GrammarWarning(NamedTuple):
+    kind: str
+    message: str
+    parser: Parser
+    path: Tuple[Parser, ...]
+
+    def __str__(self):
+        return self.kind + ': ' + self.message + ' at ' + ' > '.join(str(p) for p in self.path)
+
+
+def _nested_rule(parser: Parser, nested: Dict[Parser, FrozenSet[LimitedRepeatingParser]]) -> FrozenSet[LimitedRepeatingParser]:
+    result = frozenset()
+    for child in _children(parser):
+        if isinstance(child, LimitedRepeatingParser):
+            result = result | {child}
+        elif not isinstance(child, SettableParser):
+            result = result | nested[child]
+    return result
+
+
+def _nested_repetitions(analyzer: Analyzer) -> Dict[LimitedRepeatingParser, List[LimitedRepeatingParser]]:
+    """Returns the limited repetitions nested in each limited repetition,
+    without looking into other repetitions or across rule boundaries, in the
+    order of the parsers of analyzer."""
+    repetitions = [p for p in analyzer.parsers if isinstance(p, LimitedRepeatingParser)]
+    if not repetitions:
+        return {}
+    nested = _solve(analyzer.parsers, analyzer._parents, _nested_rule, frozenset())
+    order = {p: index for index, p in enumerate(repetitions)}
+    result = {}
+    for p in repetitions:
+        delegate = p._delegate
+        if isinstance(delegate, LimitedRepeatingParser):
+            inner = {delegate}
+        elif isinstance(delegate, SettableParser):
+            inner = ()
+        else:
+            inner = nested[delegate]
+        result[p] = sorted(inner, key=order.__getitem__)
+    return result
+
+
+def analyze(parser: Parser) -> List[GrammarWarning]:
+    """Lints the grammar of parser.
+
+    Reports unbounded repetitions (and trimmers) of nullable parsers which loop
+    forever, choice alternatives which can never be reached, and greedy or lazy
+    repetitions nested in each other whose limiters overlap and can therefore
+    backtrack exponentially."""
+    analyzer = Analyzer(parser)
+    nested = _nested_repetitions(analyzer)
+    found: List[Tuple[str, str, Parser]] = []
+
+    for p in analyzer.parsers:
+        if isinstance(p, RepeatingParser):
+            if p._max == -1 and analyzer.is_nullable(p._delegate):
+                found.append(('nullable-repetition',
+                              f'repeated parser {p._delegate} can succeed without consuming input', p))
+        elif isinstance(p, SeparatedParser):
+            if analyzer.is_nullable(p._delegate) and analyzer.is_nullable(p._separator):
+                found.append(('nullable-repetition',
+                              f'separated parser {p._delegate} and its separator can succeed without consuming input', p))
+        elif isinstance(p, TrimmingParser):
+            for layout in {p._left, p._right}:
+                if analyzer.is_nullable(layout):
+                    found.append(('nullable-repetition',
+                                  f'trimmed parser {layout} can succeed without consuming input', p))
+        elif isinstance(p, ChoiceParser):
+            alternatives = p._parsers
+            for j, reason in _shadowed(analyzer, alternatives):
+                found.append(('unreachable-alternative',
+                              f'alternative {j} ({alternatives[j]}) is never tried, {reason}', p))
+
+        if isinstance(p, LimitedRepeatingParser):
+            limit = analyzer.first_set(p._limit)
+            for inner in nested[p]:
+                if (not is_disjoint(analyzer.first_set(inner._delegate), limit)
+                        or not is_disjoint(analyzer.first_set(inner._limit), limit)):
+                    found.append(('nested-repetition',
+                                  f'nested repetition {inner} overlaps the limit of the outer one and can backtrack exponentially', p))
+
+    paths = _paths(parser, {p for _, _, p in found})
+    return [GrammarWarning(kind, message, p, paths[p]) for kind, message, p in found]
+
+
+def _shape(parser: Parser, depth: int = 3):
+    children = ()
+    if depth > 0 and not isinstance(parser, SettableParser):
+        children = tuple(_shape(c, depth - 1) for c in _children(parser))
+    return type(parser), str(parser), literal_of(parser), children
+
+
+def _shadowed(analyzer: Analyzer, alternatives: List[Parser]) -> Iterable[Tuple[int, str]]:
+    literals: Dict[str, int] = {}
+    shapes: Dict[Any, List[int]] = {}
+    for index, current in enumerate(alternatives):
+        literal = literal_of(current)
+        if literal is not None:
+            for size in range(1, len(literal) + 1):
+                previous = literals.get(literal[:size])
+                if previous is not None:
+                    yield index, f'alternative {previous} matches its prefix {literal[:size]!r}'
+                    break
+            literals.setdefault(literal, index)
+
+        shape = _shape(current)
+        for previous in shapes.get(shape, ()):
+            if alternatives[previous].is_equal_to(current):
+                yield index, f'it is equal to alternative {previous}'
+                break
+        shapes.setdefault(shape, []).append(index)
+
+        if analyzer.never_fails(current):
+            for later in range(index + 1, len(alternatives)):
+                yield later, f'alternative {index} ({current}) always succeeds'
+            return
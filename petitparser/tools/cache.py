@@ -0,0 +1,202 @@
+"""A persistent cache of built grammars.
+
+Entries are pickles, so the cache directory must only be writable by trusted
+users."""
+
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import tempfile
+import types
+import warnings
+from functools import partial
+from typing import Callable, Dict, NamedTuple, Optional, Type
+
+from ..parser import Parser, _resolve_slots
+from .analyzer import Analyzer
+from .grammar_definition import GrammarDefinition, Reference
+
+MAGIC = b'PPGC1\n'
+
+
+class CachedGrammar(NamedTuple):
+    parser: Parser
+    analyzer: Analyzer
+
+
+def _code_fingerprint(code: types.CodeType):
+    consts = tuple(_code_fingerprint(c) if isinstance(c, types.CodeType) else repr(c)
+                   for c in code.co_consts)
+    return code.co_code.hex(), consts, code.co_names
+
+
+def _cell_fingerprint(cell, active: set):
+    try:
+        contents = cell.cell_contents
+    except ValueError:
+        return 'empty cell'
+    return _value_fingerprint(contents, active)
+
+
+def _value_fingerprint(value, active: set = None):
+    """Returns a picklable key of value that is the same in every process.
+
+    active holds the ids of the values being fingerprinted, so that a value
+    reached again through itself, like a recursive closure, is only named."""
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+    if active is None:
+        active = set()
+    if id(value) in active:
+        return 'recursive', type(value).__qualname__, getattr(value, '__qualname__', None)
+    active.add(id(value))
+    try:
+        return _compound_fingerprint(value, active)
+    finally:
+        active.discard(id(value))
+
+
+def _compound_fingerprint(value, active: set):
+    if isinstance(value, (tuple, list)):
+        return type(value).__name__, tuple(_value_fingerprint(v, active) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return 'set', tuple(sorted(repr(_value_fingerprint(v, active)) for v in value))
+    if isinstance(value, dict):
+        return 'dict', tuple(sorted((repr(k), repr(_value_fingerprint(v, active))) for k, v in value.items()))
+    if isinstance(value, Parser):
+        return 'parser', str(value)
+    if isinstance(value, partial):
+        return ('partial', _value_fingerprint(value.func, active),
+                _value_fingerprint(value.args, active), _value_fingerprint(value.keywords, active))
+    if isinstance(value, types.FunctionType):
+        cells = tuple(_cell_fingerprint(c, active) for c in value.__closure__ or ())
+        return ('function', value.__module__, value.__qualname__,
+                _code_fingerprint(value.__code__), _value_fingerprint(value.__defaults__, active), cells)
+    if isinstance(value, type):
+        return 'type', value.__module__, value.__qualname__
+    owner = getattr(value, '__self__', None)
+    if owner is not None and not isinstance(owner, types.ModuleType):
+        return 'method', _value_fingerprint(owner, active), getattr(value, '__name__', None)
+    if isinstance(value, (types.BuiltinFunctionType, types.MethodDescriptorType, types.WrapperDescriptorType)):
+        return 'builtin', getattr(value, '__module__', None), value.__qualname__
+    return type(value).__qualname__, repr(value)
+
+
+# Slots caching facts derived from the children of a parser.
+_DERIVED_SLOTS = frozenset(['_cut', '_dispatch', '_filter'])
+
+
+def _is_children(value) -> bool:
+    if isinstance(value, (list, tuple)):
+        return all(isinstance(v, Parser) for v in value)
+    return isinstance(value, Parser)
+
+
+def fingerprint(definition: Type[GrammarDefinition], name: str = 'start', build: Callable = None) -> str:
+    """Returns a key identifying the structure of a grammar definition and the library version.
+
+    Productions are fingerprinted before and after they are built alike, since
+    references to productions are fingerprinted by name."""
+    from .. import __version__
+
+    productions: Dict[str, Parser] = definition._parsers
+    names = {id(p): n for n, p in productions.items() if not isinstance(p, Reference)}
+    digest = hashlib.sha256()
+    digest.update(repr((__version__, name, _value_fingerprint(build),
+                        _value_fingerprint(definition._layout))).encode())
+
+    for production in sorted(productions):
+        root = productions[production]
+        ids = {id(root): 0}
+        todo = [root]
+        while todo:
+            parser = todo.pop()
+            children = []
+            for child in parser.get_children():
+                if isinstance(child, Reference):
+                    children.append(('ref', child._name))
+                elif id(child) in names:
+                    children.append(('ref', names[id(child)]))
+                else:
+                    if id(child) not in ids:
+                        ids[id(child)] = len(ids)
+                        todo.append(child)
+                    children.append(ids[id(child)])
+            properties = tuple(
+                _value_fingerprint(value)
+                for value in (getattr(parser, slot, None) for slot in _resolve_slots(type(parser))
+                              if slot not in _DERIVED_SLOTS)
+                if not _is_children(value))
+            record = (production, ids[id(parser)], type(parser).__module__,
+                      type(parser).__qualname__, properties, tuple(children))
+            digest.update(repr(record).encode())
+
+    return digest.hexdigest()
+
+
+class GrammarCache:
+    """Stores built grammars, with their analysis, in a directory."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+    def path_of(self, definition: Type[GrammarDefinition], name: str = 'start') -> str:
+        filename = f'{definition.__module__}.{definition.__qualname__}.{name}.grammar'
+        return os.path.join(self._directory, filename)
+
+    def load(self, definition: Type[GrammarDefinition], name: str = 'start',
+             build: Callable[[Type[GrammarDefinition], str], Parser] = None) -> CachedGrammar:
+        """Loads the grammar from the cache, building and storing it when
+        the entry is missing, stale or corrupt.
+
+        build can customize building (e.g. optimize the parser), it defaults
+        to GrammarDefinition.build and is part of the cache key."""
+        key = fingerprint(definition, name, build)
+        path = self.path_of(definition, name)
+
+        entry = self._read(path, key)
+        if entry is not None:
+            return entry
+
+        parser = definition.build(name) if build is None else build(definition, name)
+        entry = CachedGrammar(parser, Analyzer(parser))
+        self._write(path, key, entry)
+        return entry
+
+    def _read(self, path: str, key: str) -> Optional[CachedGrammar]:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        header = MAGIC + key.encode()
+        checksum = data[len(header):len(header) + 32]
+        payload = data[len(header) + 32:]
+        if not data.startswith(header) or hashlib.sha256(payload).digest() != checksum:
+            return None
+        try:
+            entry = pickle.loads(payload)
+        except Exception:
+            return None
+        return entry if isinstance(entry, CachedGrammar) else None
+
+    def _write(self, path: str, key: str, entry: CachedGrammar):
+        try:
+            payload = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            warnings.warn(f'grammar cannot be cached: {e}')
+            return
+
+        fd, temporary = tempfile.mkstemp(dir=self._directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC + key.encode())
+                f.write(hashlib.sha256(payload).digest())
+                f.write(payload)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
@@ -0,0 +1,146 @@
+"""Character class acceleration for large ASCII buffers, using NumPy.
+
+The buffer is classified once into a per-character bitmask of the character
+classes used in repeated character parsers, and for each class a table of
+where the run of that class starting at every position ends. Repetitions of
+character parsers then find the end of their run with a single lookup."""
+
+from __future__ import annotations
+from typing import Dict, List, Union
+
+from ..context import Context, Result
+from ..parser import Parser
+from ..parser.primitive import CharacterParser
+from ..parser.repeating import PossesiveRepeatingParser
+from ..utils import Mirror
+
+# Width of the per-character class bitmask.
+MAX_CLASSES = 64
+
+
+class CharacterClasses:
+    """The character classes of every character of a buffer."""
+
+    def __init__(self, text: str, predicates: List):
+        import numpy as np
+
+        if len(predicates) > MAX_CLASSES:
+            raise ValueError(f'at most {MAX_CLASSES} character classes are supported')
+        try:
+            data = np.frombuffer(text.encode('latin-1'), dtype=np.uint8)
+        except UnicodeEncodeError:
+            raise ValueError('only ASCII and Latin-1 text can be classified')
+
+        for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+            if len(predicates) <= np.iinfo(dtype).bits:
+                break
+        table = np.zeros(256, dtype=dtype)
+        for bit, predicate in enumerate(predicates):
+            mask = dtype(1 << bit)
+            for code in range(256):
+                if predicate(chr(code)):
+                    table[code] |= mask
+
+        self._np = np
+        self._text = text
+        self._bits = {predicate: bit for bit, predicate in enumerate(predicates)}
+        self._classes = table[data]
+        self._run_ends: Dict[int, object] = {}
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def run_ends(self, predicate):
+        """Returns the table of where the run of predicate starting at each position ends."""
+        bit = self._bits[predicate]
+        ends = self._run_ends.get(bit)
+        if ends is None:
+            np = self._np
+            size = len(self._classes)
+            dtype = np.uint32 if size < 2 ** 32 else np.uint64
+            member = (self._classes & self._classes.dtype.type(1 << bit)) != 0
+            ends = np.arange(size + 1, dtype=dtype)
+            ends[:size][member] = size
+            del member
+            backwards = ends[::-1]
+            np.minimum.accumulate(backwards, out=backwards)
+            self._run_ends[bit] = ends
+        return ends
+
+
+class CharacterRunParser(PossesiveRepeatingParser[str]):
+    """A repetition of a character parser that looks up run ends on its classified buffer."""
+
+    __slots__ = '_classes', '_text', '_ends'
+
+    def __init__(self, delegate: CharacterParser, min: int, max: int, classes: CharacterClasses):
+        super().__init__(delegate, min, max)
+        self._classes = classes
+        self._text = classes.text
+        # Indexing a memoryview is much cheaper than indexing the array.
+        self._ends = memoryview(classes.run_ends(delegate._predicate))
+
+    def _run_end(self, position: int) -> int:
+        end = self._ends[position]
+        if self._max != -1 and end - position > self._max:
+            end = position + self._max
+        return end
+
+    def parse_on(self, context: Context) -> Result[List[str]]:
+        buffer = context.buffer
+        if buffer is not self._text:
+            return super().parse_on(context)
+        position = context.position
+        end = self._run_end(position)
+        if end - position < self._min:
+            return self._delegate.parse_on(Context(buffer, end))
+        return context.success(list(buffer[position:end]), end)
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        if buffer is not self._text:
+            return super().fast_parse_on(buffer, position)
+        end = self._ends[position]
+        if self._max != -1 and end - position > self._max:
+            end = position + self._max
+        if end - position < self._min:
+            return -1
+        return end
+
+    def copy(self) -> Parser[List[str]]:
+        return CharacterRunParser(self._delegate, self._min, self._max, self._classes)
+
+
+def _is_character_run(parser: Parser) -> bool:
+    # Frozen repetitions are subclasses; runs that are already accelerated are not.
+    return (isinstance(parser, PossesiveRepeatingParser) and not isinstance(parser, CharacterRunParser)
+            and isinstance(parser._delegate, CharacterParser))
+
+
+def accelerate(parser: Parser, text: str) -> Parser:
+    """Returns a copy of parser where repetitions of character parsers are
+    answered from character class tables precomputed for text.
+
+    The copy only uses the tables when parsing exactly this text object, and
+    falls back to regular parsing on anything else. Requires NumPy."""
+    predicates = []
+    for p in Mirror(parser):
+        if _is_character_run(p) and p._delegate._predicate not in predicates:
+            predicates.append(p._delegate._predicate)
+    del predicates[MAX_CLASSES:]
+    if not predicates:
+        return parser
+    classes = CharacterClasses(text, predicates)
+
+    def transformer(p):
+        if _is_character_run(p) and p._delegate._predicate in classes._bits:
+            return CharacterRunParser(p._delegate, p._min, p._max, classes)
+        return p
+    return Mirror(parser).transform(transformer)
+
+
+def parse_accelerated(parser: Parser, buffer: Union[str, bytes]) -> Result:
+    """Parses an ASCII string or a bytes buffer (as Latin-1) with character class acceleration."""
+    if not isinstance(buffer, str):
+        buffer = bytes(buffer).decode('latin-1')
+    return accelerate(parser, buffer).parse(buffer)
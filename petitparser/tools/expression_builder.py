@@ -1,10 +1,14 @@
 from __future__ import annotations
 from functools import reduce
-from typing import Callable, Generic, List, TypeVar
+from typing import TYPE_CHECKING, Callable, Generic, List, NamedTuple, Tuple, TypeVar
+from petitparser.context import CommittedFailure, Context, Result
 from petitparser.parser import Parser
-from petitparser.parser.primitive import FailureParser
+from petitparser.parser.primitive import COMMITTED, FailureParser
 from ..parser.combinators import ChoiceParser, SequenceParser, SettableParser
 
+if TYPE_CHECKING:
+    from .analyzer import FirstCharTable
+
 T = TypeVar('T')
 U = TypeVar('U')
 V = TypeVar('V')
@@ -33,9 +37,21 @@ class ExpressionBuilder(Generic[T]):
         self._groups.append(g)
         return g
 
-    def build(self) -> Parser:
-        parser = FailureParser(
-            'Highest priority group should define a primitive parser.')
+    def build(self, engine: str = 'peg') -> Parser:
+        """Builds the expression parser.
+
+        The 'peg' engine stacks a layer of parsers per group and kind of
+        operator. The 'pratt' engine compiles the groups into a single
+        ExpressionParser that climbs the operator table, with the same
+        results."""
+        if engine == 'pratt':
+            parser = ExpressionParser([group._level() for group in self._groups])
+            self._loopback.set(parser)
+            return parser
+        if engine != 'peg':
+            raise ValueError(f'unknown engine: {engine!r}')
+
+        parser = FailureParser(_MISSING_PRIMITIVE)
 
         for group in self._groups:
             parser = group._build(parser)
@@ -84,7 +100,7 @@ class ExpressionGroup(Generic[T]):
         if not self._prefix:
             return inner
 
-        sequence = SequenceParser(_build_choice(self._prefix).star(), inner)
+        sequence = SequenceParser(_build_choice(_tagged(self._prefix)).star(), inner)
 
         def _m(tup):
             tuples, value = tup
@@ -100,7 +116,7 @@ class ExpressionGroup(Generic[T]):
         if not self._postfix:
             return inner
 
-        sequence = SequenceParser(inner, _build_choice(self._postfix).star())
+        sequence = SequenceParser(inner, _build_choice(_tagged(self._postfix)).star())
 
         def _m(tup):
             value = tup[0]
@@ -116,7 +132,7 @@ class ExpressionGroup(Generic[T]):
         if not self._right:
             return inner
 
-        sequence = inner.separated_by(_build_choice(self._right))
+        sequence = inner.separated_by(_build_choice(_tagged(self._right)))
 
         def _m(seq):
             result = seq[-1]
@@ -134,7 +150,7 @@ class ExpressionGroup(Generic[T]):
         if not self._left:
             return inner
 
-        sequence = inner.separated_by(_build_choice(self._left))
+        sequence = inner.separated_by(_build_choice(_tagged(self._left)))
 
         def _m(seq):
             result = seq[0]
@@ -150,8 +166,304 @@ class ExpressionGroup(Generic[T]):
         if action is None:
             action = self._defaultAction
 
-        l.append(parser.map(lambda op: (op, action)))
+        l.append((parser, action))
         return self
 
     def _build(self, inner: Parser) -> Parser:
         return self._build_left(self._build_right(self._build_postfix(self._build_prefix(self._build_wrapper(self._build_primitive(inner))))))
+
+    def _level(self) -> Level:
+        def operators(l):
+            return tuple(Operator(parser, action) for parser, action in l)
+        return Level(tuple(self._primitives), tuple(self._wrappers), operators(self._prefix),
+                     operators(self._postfix), operators(self._right), operators(self._left))
+
+
+def _tagged(operators: List[Tuple[Parser, Callable]]) -> List[Parser]:
+    return [parser.map(lambda op, action=action: (op, action)) for parser, action in operators]
+
+
+_MISSING_PRIMITIVE = 'Highest priority group should define a primitive parser.'
+
+
+class Operator(NamedTuple):
+    parser: Parser
+    action: Callable
+
+
+class Level(NamedTuple):
+    primitives: Tuple[Parser, ...]
+    wrappers: Tuple[Parser, ...]
+    prefix: Tuple[Operator, ...]
+    postfix: Tuple[Operator, ...]
+    right: Tuple[Operator, ...]
+    left: Tuple[Operator, ...]
+
+
+def _operator_parser(operator: Operator) -> Parser:
+    return operator.parser
+
+
+def _match(dispatch: FirstCharTable, context: Context):
+    """Returns the result and operator of the first operator matching at context, or None."""
+    buffer, position = context.buffer, context.position
+    if position < len(buffer):
+        operators = dispatch.by_char.get(buffer[position], dispatch.other)
+    else:
+        operators = dispatch.at_end
+    for operator in operators:
+        res = operator.parser.parse_on(context)
+        if res.is_success:
+            return res, operator
+        if type(res) is CommittedFailure:
+            return None
+    return None
+
+
+def _fast_match(dispatch: FirstCharTable, buffer: str, position: int) -> int:
+    if position < len(buffer):
+        operators = dispatch.by_char.get(buffer[position], dispatch.other)
+    else:
+        operators = dispatch.at_end
+    for operator in operators:
+        res = operator.parser.fast_parse_on(buffer, position)
+        if res >= 0:
+            return res
+        if res == COMMITTED:
+            return -1
+    return -1
+
+
+class ExpressionParser(Parser[T], Generic[T]):
+    """Parses the groups of an expression builder with precedence climbing.
+
+    Each level is parsed in a single call, trying its operators directly
+    and folding their actions as it goes, the way the layered parsers of
+    the 'peg' engine would. Operators are only tried where the character
+    at the position can start them."""
+
+    __slots__ = '_levels', '_dispatch'
+
+    def __init__(self, levels: List[Level]):
+        self._levels = tuple(levels)
+        # Dispatch tables of the prefix, postfix, right and left operators
+        # of each level, built on the first parse.
+        self._dispatch = None
+
+    def _compile(self):
+        from .analyzer import Analyzer, first_char_table
+
+        analyzer = Analyzer(self)
+        self._dispatch = tuple(
+            tuple(first_char_table(analyzer, operators, _operator_parser)
+                  for operators in (level.prefix, level.postfix, level.right, level.left))
+            for level in self._levels)
+
+    def parse_on(self, context: Context) -> Result[T]:
+        if self._dispatch is None:
+            self._compile()
+        return self._parse_level(len(self._levels) - 1, context)
+
+    def _parse_level(self, index: int, context: Context) -> Result:
+        if index < 0:
+            return context.failure(_MISSING_PRIMITIVE)
+        level = self._levels[index]
+        tables = self._dispatch[index]
+        operand = self._parse_chain if level.right else self._parse_operand
+
+        res = operand(index, level, tables, context)
+        if res.is_failure or not level.left:
+            return res
+        value = res.value
+        while True:
+            match = _match(tables[3], res)
+            if match is None:
+                break
+            op, operator = match
+            rhs = operand(index, level, tables, op)
+            if rhs.is_failure:
+                if type(rhs) is CommittedFailure:
+                    return rhs
+                break
+            value = operator.action(value, op.value, rhs.value)
+            res = rhs
+        return res.success(value)
+
+    def _parse_chain(self, index: int, level: Level, tables: Tuple[FirstCharTable, ...], context: Context) -> Result:
+        res = self._parse_operand(index, level, tables, context)
+        if res.is_failure:
+            return res
+        pending = []
+        while True:
+            match = _match(tables[2], res)
+            if match is None:
+                break
+            op, operator = match
+            rhs = self._parse_operand(index, level, tables, op)
+            if rhs.is_failure:
+                if type(rhs) is CommittedFailure:
+                    return rhs
+                break
+            pending.append((res.value, op.value, operator))
+            res = rhs
+        if not pending:
+            return res
+        value = res.value
+        for lhs, op, operator in reversed(pending):
+            value = operator.action(lhs, op, value)
+        return res.success(value)
+
+    def _parse_operand(self, index: int, level: Level, tables: Tuple[FirstCharTable, ...], context: Context) -> Result:
+        prefixes = []
+        if level.prefix:
+            while True:
+                match = _match(tables[0], context)
+                if match is None:
+                    break
+                prefixes.append(match)
+                context = match[0]
+
+        res = self._parse_primary(index, level, context)
+        if res.is_failure:
+            return res
+
+        if prefixes or level.postfix:
+            value = res.value
+            for op, operator in reversed(prefixes):
+                value = operator.action(op.value, value)
+            while True:
+                match = _match(tables[1], res)
+                if match is None:
+                    break
+                op, operator = match
+                value = operator.action(value, op.value)
+                res = op
+            res = res.success(value)
+        return res
+
+    def _parse_primary(self, index: int, level: Level, context: Context) -> Result:
+        for wrapper in level.wrappers:
+            res = wrapper.parse_on(context)
+            if res.is_success:
+                return res
+            if type(res) is CommittedFailure:
+                return res.failure(res.message)
+        if level.primitives:
+            for primitive in level.primitives:
+                res = primitive.parse_on(context)
+                if res.is_success or type(res) is CommittedFailure:
+                    break
+        else:
+            res = self._parse_level(index - 1, context)
+        if res.is_success or not (level.wrappers or len(level.primitives) > 1):
+            return res
+        # Inside a choice, the commitment ends there, and other failures
+        # are reported where the choice started.
+        if type(res) is CommittedFailure:
+            return res.failure(res.message)
+        return context.failure('expected ' + ' or '.join(str(p) for p in level.wrappers + level.primitives))
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        if self._dispatch is None:
+            self._compile()
+        return self._fast_level(len(self._levels) - 1, buffer, position)
+
+    def _fast_level(self, index: int, buffer: str, position: int) -> int:
+        if index < 0:
+            return -1
+        level = self._levels[index]
+        tables = self._dispatch[index]
+        operand = self._fast_chain if level.right else self._fast_operand
+
+        position = operand(index, level, tables, buffer, position)
+        if position < 0 or not level.left:
+            return position
+        while True:
+            op = _fast_match(tables[3], buffer, position)
+            if op < 0:
+                return position
+            rhs = operand(index, level, tables, buffer, op)
+            if rhs < 0:
+                return rhs if rhs == COMMITTED else position
+            position = rhs
+
+    def _fast_chain(self, index: int, level: Level, tables: Tuple[FirstCharTable, ...], buffer: str, position: int) -> int:
+        position = self._fast_operand(index, level, tables, buffer, position)
+        if position < 0:
+            return position
+        while True:
+            op = _fast_match(tables[2], buffer, position)
+            if op < 0:
+                return position
+            rhs = self._fast_operand(index, level, tables, buffer, op)
+            if rhs < 0:
+                return rhs if rhs == COMMITTED else position
+            position = rhs
+
+    def _fast_operand(self, index: int, level: Level, tables: Tuple[FirstCharTable, ...], buffer: str, position: int) -> int:
+        if level.prefix:
+            while True:
+                op = _fast_match(tables[0], buffer, position)
+                if op < 0:
+                    break
+                position = op
+
+        for wrapper in level.wrappers:
+            res = wrapper.fast_parse_on(buffer, position)
+            if res >= 0:
+                break
+            if res == COMMITTED:
+                return -1
+        else:
+            if level.primitives:
+                for primitive in level.primitives:
+                    res = primitive.fast_parse_on(buffer, position)
+                    if res >= 0 or res == COMMITTED:
+                        break
+            else:
+                res = self._fast_level(index - 1, buffer, position)
+            if res == COMMITTED and (level.wrappers or len(level.primitives) > 1):
+                return -1
+        if res < 0:
+            return res
+
+        while level.postfix:
+            op = _fast_match(tables[1], buffer, res)
+            if op < 0:
+                break
+            res = op
+        return res
+
+    def get_children(self) -> List[Parser]:
+        children = []
+        for level in self._levels:
+            children.extend(level.primitives)
+            children.extend(level.wrappers)
+            for kind in (level.prefix, level.postfix, level.right, level.left):
+                children.extend(operator.parser for operator in kind)
+        return children
+
+    def replace(self, source: Parser, target: Parser):
+        def parsers(l):
+            return tuple(target if p is source else p for p in l)
+
+        def operators(l):
+            return tuple(o._replace(parser=target) if o.parser is source else o for o in l)
+
+        self._levels = tuple(
+            Level(parsers(level.primitives), parsers(level.wrappers), operators(level.prefix),
+                  operators(level.postfix), operators(level.right), operators(level.left))
+            for level in self._levels)
+        self._dispatch = None
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        def shape(levels):
+            return tuple(
+                (len(level.primitives), len(level.wrappers))
+                + tuple(tuple(o.action for o in kind)
+                        for kind in (level.prefix, level.postfix, level.right, level.left))
+                for level in levels)
+        return super().has_equal_properties(other) and shape(self._levels) == shape(other._levels)
+
+    def copy(self) -> Parser[T]:
+        return ExpressionParser(self._levels)
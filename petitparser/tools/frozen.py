@@ -0,0 +1,122 @@
+"""Immutable snapshots of parser graphs.
+
+A frozen graph is a private copy whose nodes refuse to be changed, whose
+lazily derived state is computed upfront and whose analysis is done once,
+so it can be shared between threads without locks or copies."""
+
+from __future__ import annotations
+from typing import Dict, Generic, List, Tuple, TypeVar, Union
+
+from ..context import Context, Result
+from ..parser import Parser
+from ..parser.combinators import DelegateParser, ListParser, SequenceParser, SettableParser, _cut_index
+from ..parser.repeating import LimitedRepeatingParser
+from .analyzer import Analyzer, FirstSet
+from .expression_builder import ExpressionParser
+from ..utils import Mirror
+
+T = TypeVar('T', covariant=True)
+
+# Frozen subclasses of parser classes, by class.
+_frozen_classes: Dict[type, type] = {}
+
+
+def _refuse(self, *args):
+    raise TypeError(f'{type(self).__name__} is frozen and cannot be changed')
+
+
+def _reduce_frozen(self, protocol):
+    reduced = super(type(self), self).__reduce_ex__(protocol)
+    return (_new_frozen, (type(self).__bases__[0],)) + tuple(reduced[2:])
+
+
+def _new_frozen(cls: type) -> Parser:
+    return object.__new__(frozen_class(cls))
+
+
+def frozen_class(cls: type) -> type:
+    """Returns the subclass of a parser class whose instances cannot be changed."""
+    frozen = _frozen_classes.get(cls)
+    if frozen is None:
+        namespace = {'__slots__': (), '__module__': cls.__module__,
+                     'replace': _refuse, '__reduce_ex__': _reduce_frozen}
+        if issubclass(cls, SettableParser):
+            namespace['set'] = _refuse
+        frozen = _frozen_classes.setdefault(cls, type('Frozen' + cls.__name__, (cls,), namespace))
+    return frozen
+
+
+class FrozenParser(DelegateParser[T], Generic[T]):
+    """The root of a frozen parser graph, with the analysis of its nodes.
+
+    Nodes are numbered densely from 0 in depth-first order, so tables of
+    per-node data, such as memoization slots, can be indexed by node id.
+    Copies, e.g. by Mirror.transform, are ordinary mutable parsers."""
+
+    __slots__ = '_nodes', '_ids', '_children', '_nullable', '_first', '_min_length'
+
+    def __init__(self, delegate: Parser[T]):
+        super().__init__(delegate)
+        analyzer = Analyzer(delegate)
+        self._nodes: Tuple[Parser, ...] = tuple(analyzer.parsers)
+        self._ids: Dict[int, int] = {id(node): index for index, node in enumerate(self._nodes)}
+        self._children = tuple(tuple(self._ids[id(child)] for child in node.get_children()) for node in self._nodes)
+        self._nullable = tuple(analyzer.is_nullable(node) for node in self._nodes)
+        self._first = tuple(analyzer.first_set(node) for node in self._nodes)
+        self._min_length = tuple(analyzer.min_length(node) for node in self._nodes)
+
+    @property
+    def nodes(self) -> Tuple[Parser, ...]:
+        return self._nodes
+
+    def node_id(self, parser: Parser) -> int:
+        return self._ids[id(parser)]
+
+    def children_of(self, node: Union[int, Parser]) -> Tuple[int, ...]:
+        return self._children[self._index(node)]
+
+    def is_nullable(self, node: Union[int, Parser]) -> bool:
+        return self._nullable[self._index(node)]
+
+    def first_set(self, node: Union[int, Parser]) -> FirstSet:
+        return self._first[self._index(node)]
+
+    def min_length(self, node: Union[int, Parser]) -> float:
+        return self._min_length[self._index(node)]
+
+    def _index(self, node: Union[int, Parser]) -> int:
+        return node if isinstance(node, int) else self._ids[id(node)]
+
+    def parse_on(self, context: Context) -> Result[T]:
+        return self._delegate.parse_on(context)
+
+    def freeze(self) -> FrozenParser[T]:
+        return self
+
+    replace = _refuse
+
+    def copy(self) -> Parser[T]:
+        return DelegateParser(self._delegate)
+
+    def __setstate__(self, state):
+        _, slots = state
+        for slot, value in slots.items():
+            object.__setattr__(self, slot, value)
+        self._ids = {id(node): index for index, node in enumerate(self._nodes)}
+
+
+def freeze(parser: Parser[T]) -> FrozenParser[T]:
+    root = parser.deep_copy()
+    nodes: List[Parser] = list(Mirror(root))
+    for node in nodes:
+        if isinstance(node, ListParser):
+            node._parsers = tuple(node._parsers)
+        if isinstance(node, SequenceParser):
+            node._cut = _cut_index(node._parsers)
+        if isinstance(node, LimitedRepeatingParser):
+            node._start_filter()
+        if isinstance(node, ExpressionParser) and node._dispatch is None:
+            node._compile()
+    for node in nodes:
+        node.__class__ = frozen_class(type(node))
+    return FrozenParser(root)
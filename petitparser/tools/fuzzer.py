@@ -0,0 +1,339 @@
+"""Searches for short inputs that make a grammar do the most work.
+
+Inputs are seeded with sentences derived by walking the grammar, then
+mutated: characters and literals of the grammar are inserted, replaced and
+deleted, slices are repeated and inputs are spliced. A mutant is kept when
+it costs more than its parent, or when it covers something new: a parser
+succeeding or failing for the first time, or invoked a new order of
+magnitude of times. The cost of an input is the number of parser
+invocations it takes to parse it.
+
+The worst inputs found at increasing lengths make the growth curve, from
+which the growth of the worst case is classified as linear, polynomial or
+exponential. The search is random and only finds lower bounds: a grammar
+reported linear may still have worse inputs."""
+
+from __future__ import annotations
+import math
+import random
+import string
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Set, Tuple
+
+from ..context import Context
+from ..parser import Parser
+from ..parser.actions import TrimmingParser
+from ..parser.combinators import (AndParser, ChoiceParser, DelegateParser, NotParser, OptionalParser,
+                                  SequenceParser)
+from ..parser.limits import BudgetExceeded
+from ..parser.primitive import CharacterParser, StringParser
+from ..parser.repeating import RepeatingParser, SeparatedParser
+from ..utils import Mirror
+from .analyzer import INFINITE, Analyzer, literal_of
+from .profiler import instrument
+
+LINEAR, POLYNOMIAL, EXPONENTIAL = 'linear', 'polynomial', 'exponential'
+
+# Characters tried against the predicates of character parsers.
+SAMPLE_CHARACTERS = string.printable
+
+# Depth of the derivations of seeds after which the shortest ones are taken.
+SEED_DEPTH = 8
+
+# Number of seeds derived from the grammar.
+SEEDS = 32
+
+# Number of repetitions of slices tried to scale up the worst inputs.
+PUMPS = 24
+
+# Growth exponents up to this one are reported as linear.
+LINEAR_DEGREE = 1.4
+
+
+class Meter:
+    """Counts the invocations and successes of each parser of a graph during
+    one parse, and stops it after max_steps invocations."""
+
+    __slots__ = 'steps', 'max_steps', 'invocations', 'successes'
+
+    def __init__(self, size: int, max_steps: int):
+        self.max_steps = max_steps
+        self.steps = 0
+        self.invocations = [0] * size
+        self.successes = [0] * size
+
+    def enter(self, index: int, buffer: str, position: int, full: bool):
+        self.steps += 1
+        self.invocations[index] += 1
+        if self.steps > self.max_steps:
+            raise BudgetExceeded('step budget exhausted')
+
+    def leave(self, index: int, token, success: bool):
+        if success:
+            self.successes[index] += 1
+
+    def reset(self):
+        self.steps = 0
+        self.invocations = [0] * len(self.invocations)
+        self.successes = [0] * len(self.successes)
+
+    def features(self) -> FrozenSet[Tuple[int, int]]:
+        """The coverage of the parse: for each parser invoked, the order of
+        magnitude of its invocations, and whether it ever succeeded or failed."""
+        features = set()
+        for index, (invocations, successes) in enumerate(zip(self.invocations, self.successes)):
+            if invocations:
+                features.add((index, invocations.bit_length()))
+                features.add((index, -1 if successes else -2))
+                if successes < invocations:
+                    features.add((index, -3))
+        return frozenset(features)
+
+
+class CurvePoint(NamedTuple):
+    """The worst input found of a length and its cost. A capped cost reached
+    max_steps and is only a lower bound."""
+
+    length: int
+    cost: int
+    input: str
+    capped: bool = False
+
+
+class WorstCase(NamedTuple):
+    """The worst inputs found by length, and how their cost grows: the growth
+    and its degree, the exponent of the cost in the length between the
+    two longest inputs whose cost is not capped. errors holds the shortest
+    input found raising each type of exception, e.g. in an action, with the
+    exception."""
+
+    points: Tuple[CurvePoint, ...]
+    growth: str
+    degree: float
+    errors: Tuple[Tuple[str, Exception], ...] = ()
+
+    def __str__(self):
+        lines = [f'{self.growth} growth, degree {self.degree:.1f}']
+        for point in self.points:
+            cost = f'at least {point.cost}' if point.capped else str(point.cost)
+            lines.append(f'{point.length:>8} {cost:>16}  {point.input!r}')
+        lines.extend(f'{type(error).__name__}: {error}  {text!r}' for text, error in self.errors)
+        return '\n'.join(lines)
+
+
+def classify(points: Iterable[Tuple[int, int]], max_steps: int = None) -> Tuple[str, float]:
+    """Returns the growth and degree of a curve of (length, cost) points.
+
+    Costs growing exponentially in the length have degrees, the exponents
+    between consecutive points, that keep growing. Costs reaching max_steps
+    are only lower bounds, so those points are left out of the fit."""
+    points = sorted((length, cost) for length, cost in points
+                    if length > 0 and cost > 0 and (max_steps is None or cost < max_steps))
+    degrees = [math.log(cost / previous_cost) / math.log(length / previous_length)
+               for (previous_length, previous_cost), (length, cost) in zip(points, points[1:])
+               if length > previous_length]
+    degree = degrees[-1] if degrees else 1.0
+    if len(degrees) >= 2 and degree > 2 and degree > 1.5 * degrees[0] + 0.5:
+        return EXPONENTIAL, degree
+    if degree <= LINEAR_DEGREE:
+        return LINEAR, degree
+    return POLYNOMIAL, degree
+
+
+class Fuzzer:
+    """Measures, derives and mutates inputs of a parser graph, which is left
+    untouched."""
+
+    def __init__(self, parser: Parser, max_steps: int = 100000, seed: int = None):
+        self._random = random.Random(seed)
+        self._analyzer = Analyzer(parser)
+        self.meter = Meter(sum(1 for _ in Mirror(parser)), max_steps)
+        parsers, self._parser = instrument(parser, self.meter)
+        self._root = parser
+        # The shortest input raising each type of exception.
+        self.errors: Dict[type, Tuple[str, Exception]] = {}
+        self.literals, self.alphabet = self._vocabulary(parsers)
+
+    def _vocabulary(self, parsers: List[Parser]) -> Tuple[List[str], str]:
+        literals: Set[str] = set()
+        characters: Set[str] = set()
+        for p in parsers:
+            literal = literal_of(p)
+            if literal:
+                literals.add(literal)
+                characters.update(literal)
+            elif isinstance(p, CharacterParser):
+                matches = [char for char in SAMPLE_CHARACTERS if _accepts(p, char)]
+                characters.update(matches[:1] + matches[-1:])
+        # A character no parser asked for, to provoke failures.
+        characters.add(next(char for char in '~\x00' + SAMPLE_CHARACTERS if char not in characters))
+        return sorted(literals), ''.join(sorted(characters))
+
+    def cost(self, text: str) -> Tuple[int, FrozenSet[Tuple[int, int]]]:
+        """Returns the number of parser invocations parsing text takes, at most
+        max_steps, and the coverage of the parse.
+
+        A parse raising an exception costs the invocations made until then,
+        and is recorded in errors."""
+        meter = self.meter
+        meter.reset()
+        try:
+            self._parser.parse_on(Context(text, 0))
+        except BudgetExceeded:
+            pass
+        except Exception as error:
+            known = self.errors.get(type(error))
+            if known is None or len(text) < len(known[0]):
+                self.errors[type(error)] = text, error
+        return min(meter.steps, meter.max_steps), meter.features()
+
+    def seeds(self, count: int = SEEDS) -> List[str]:
+        """Returns sentences derived by random walks of the grammar."""
+        seeds = {''}
+        for _ in range(count):
+            seeds.add(self.derive(self._root))
+        seeds.update(self.literals)
+        return sorted(seeds, key=lambda seed: (len(seed), seed))
+
+    def derive(self, parser: Parser, depth: int = 0) -> str:
+        """Returns a random sentence of parser, taking the shortest choices
+        once deeper than SEED_DEPTH."""
+        rng = self._random
+        shallow = depth < SEED_DEPTH
+        if depth > SEED_DEPTH + len(self.meter.invocations):
+            return ''
+        literal = literal_of(parser)
+        if literal is not None:
+            return literal
+        if isinstance(parser, CharacterParser):
+            matches = [char for char in SAMPLE_CHARACTERS if _accepts(parser, char)]
+            return rng.choice(matches) if matches else ''
+        if isinstance(parser, StringParser):
+            return ''
+        if isinstance(parser, (AndParser, NotParser)):
+            return ''
+        if isinstance(parser, ChoiceParser):
+            alternatives = parser.get_children()
+            if shallow:
+                return self.derive(rng.choice(alternatives), depth + 1)
+            return self.derive(min(alternatives, key=self._min_length), depth + 1)
+        if isinstance(parser, SequenceParser):
+            return ''.join(self.derive(child, depth + 1) for child in parser.get_children())
+        if isinstance(parser, RepeatingParser):
+            maximum = parser._min + 3 if parser._max == -1 else parser._max
+            times = rng.randint(parser._min, maximum) if shallow else parser._min
+            return ''.join(self.derive(parser._delegate, depth + 1) for _ in range(times))
+        if isinstance(parser, SeparatedParser):
+            times = rng.randint(0, 3) if shallow else 0
+            parts = [self.derive(parser._delegate, depth + 1)]
+            for _ in range(times):
+                parts.append(self.derive(parser._separator, depth + 1))
+                parts.append(self.derive(parser._delegate, depth + 1))
+            return ''.join(parts)
+        if isinstance(parser, OptionalParser):
+            return self.derive(parser._delegate, depth + 1) if shallow and rng.random() < 0.5 else ''
+        if isinstance(parser, TrimmingParser):
+            return self.derive(parser._delegate, depth + 1) + (' ' if shallow and rng.random() < 0.3 else '')
+        if isinstance(parser, DelegateParser):
+            return self.derive(parser._delegate, depth + 1)
+        children = parser.get_children()
+        return self.derive(rng.choice(children), depth + 1) if children else ''
+
+    def _min_length(self, parser: Parser) -> float:
+        length = self._analyzer.min_length(parser)
+        return length if length < INFINITE else math.inf
+
+    def mutate(self, text: str, corpus: List[str]) -> str:
+        """Returns a random mutant of text."""
+        rng = self._random
+        position = rng.randint(0, len(text))
+        operation = rng.randrange(7 if text else 3)
+        if operation == 0:
+            return text[:position] + rng.choice(self.alphabet) + text[position:]
+        if operation == 1 and self.literals:
+            return text[:position] + rng.choice(self.literals) + text[position:]
+        if operation <= 2:
+            other = rng.choice(corpus)
+            return text[:position] + other[rng.randint(0, len(other)):]
+        start = min(position, len(text) - 1)
+        stop = rng.randint(start + 1, min(len(text), start + 4))
+        if operation == 3:
+            return text[:start] + rng.choice(self.alphabet) + text[start + 1:]
+        if operation == 4:
+            return text[:start] + text[stop:]
+        if operation == 5:
+            return text[:stop] + text[start:stop] * rng.randint(1, 8) + text[stop:]
+        return self.pump(text, len(text) * 2)
+
+    def pump(self, text: str, length: int) -> str:
+        """Returns text grown to about length by repeating one or two of its
+        slices, like the nested parentheses of an expression."""
+        if not text:
+            return text
+        rng = self._random
+        cuts = sorted(rng.randint(0, len(text)) for _ in range(4))
+        if rng.random() < 0.5 or cuts[1] == cuts[0]:
+            start, stop = cuts[0], max(cuts[0] + 1, min(cuts[3], cuts[0] + 4))
+            stop = min(stop, len(text))
+            if stop <= start:
+                return text
+            times = max(1, (length - len(text)) // (stop - start))
+            return text[:stop] + text[start:stop] * times + text[stop:]
+        (first, middle), (second, last) = cuts[:2], cuts[2:]
+        pumped = (middle - first) + (last - second)
+        times = max(1, (length - len(text)) // max(1, pumped))
+        return (text[:middle] + text[first:middle] * times + text[middle:last]
+                + text[second:last] * times + text[last:])
+
+
+def find_worst_case(parser: Parser, lengths: Iterable[int] = (4, 8, 16, 32, 64), iterations: int = 300,
+                    max_steps: int = 100000, seed: int = None) -> WorstCase:
+    """Searches for the inputs of each length that take parser the most
+    invocations to parse, and classifies how that cost grows.
+
+    The search stops at the first length whose worst input reaches
+    max_steps, whose cost is then capped: a lower bound left out of the
+    classification."""
+    fuzzer = Fuzzer(parser, max_steps, seed)
+    rng = random.Random(seed)
+    corpus = fuzzer.seeds()
+    coverage: Set[Tuple[int, int]] = set()
+    points: List[CurvePoint] = []
+    previous: List[str] = []
+    for length in sorted(lengths):
+        population: Dict[str, int] = {}
+        candidates = [text[:length] for text in corpus]
+        candidates += [fuzzer.pump(text, length)[:length] for text in previous for _ in range(PUMPS)]
+        for text in candidates:
+            if text not in population:
+                population[text], features = fuzzer.cost(text)
+                coverage |= features
+        for _ in range(iterations):
+            if max(population.values()) >= max_steps:
+                break
+            # The costliest of a few random inputs is the parent.
+            parent = max(rng.sample(list(population), min(3, len(population))), key=population.get)
+            child = fuzzer.mutate(parent, corpus)[:length]
+            if child in population:
+                continue
+            cost, features = fuzzer.cost(child)
+            if cost > population[parent] or not features <= coverage:
+                population[child] = cost
+                coverage |= features
+        ranked = sorted(population, key=lambda text: (-population[text], len(text)))
+        best = ranked[0]
+        points.append(CurvePoint(len(best), population[best], best, population[best] >= max_steps))
+        if population[best] >= max_steps:
+            # Longer inputs cannot be told apart from this one.
+            break
+        previous = ranked[:3]
+        corpus = sorted(set(corpus) | set(previous))
+    growth, degree = classify(((point.length, point.cost) for point in points), max_steps)
+    errors = sorted(fuzzer.errors.values(), key=lambda error: (len(error[0]), error[0]))
+    return WorstCase(tuple(points), growth, degree, tuple(errors))
+
+
+def _accepts(parser: CharacterParser, char: str) -> bool:
+    try:
+        return bool(parser._predicate(char))
+    except Exception:
+        return False
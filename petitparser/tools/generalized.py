@@ -0,0 +1,429 @@
+"""All the parses of an input by an ambiguous grammar.
+
+parse_all() runs a parser graph as a context-free grammar instead of a
+parsing expression grammar: a choice tries all its alternatives and a
+repetition every number of repetitions, not just the first that works.
+Every (parser, start) pair is evaluated once into the set of positions it
+can end at, and parents are notified as those sets grow, so left
+recursion terminates and the time is at worst cubic in the input.
+
+The result is a shared packed parse forest: a symbol (parser, start, end)
+has one packed node per way the parser can cover its span, and symbols
+are shared by all the parses that contain them. Trees are enumerated
+lazily from it, sharing the values of common subtrees.
+
+Lookaheads, the limits of greedy and lazy repetitions, the layout of
+trim() and parsers the engine does not know, such as expression builders
+and continuations, run as they do in a PEG parse."""
+
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from ..context import Context, Failure, Result, Success, Token
+from ..parser import Parser
+from ..parser.actions import ActionParser, FlattenParser, RecognizerParser, TokenParser, TrimmingParser, _consume
+from ..parser.caching import CachingParser, MemoParser
+from ..parser.combinators import (ChoiceParser, DelegateParser, EndParser, OptionalParser, PickParser, SequenceParser,
+                                  SettableParser)
+from ..parser.repeating import LimitedRepeatingParser, RepeatingParser, SeparatedParser
+from ..utils import Mirror
+from .frozen import FrozenParser
+from .layout import LayoutParser
+
+T = TypeVar('T', covariant=True)
+
+# How the engine runs a parser.
+(OPAQUE, CHOICE, SEQUENCE, REPEAT, SEPARATED, OPTIONAL, END, ACTION, FLATTEN, TOKEN, RECOGNIZE, TRIM, LAYOUT,
+ DELEGATE) = range(14)
+
+# Kinds whose values are lists built along a chain of slots.
+_LISTS = frozenset([SEQUENCE, REPEAT, SEPARATED])
+
+# Kinds with a single value however their delegate is parsed.
+_SINGLE = frozenset([OPAQUE, FLATTEN, RECOGNIZE])
+
+# What a listener does with an end of the key it listens to.
+COPY, FILTER, MAP, THEN, JOIN = range(5)
+
+# A key is a parser, by index, in a slot (the position in a sequence, the
+# count of a repetition, ...) at a start position; a symbol is a key with
+# an end position, and a packed node the symbols of the children it spans.
+Key = Tuple[int, int, int]
+Symbol = Tuple[Key, int]
+Pack = Tuple[Symbol, ...]
+
+
+def _kind(parser: Parser) -> int:
+    if isinstance(parser, ChoiceParser):
+        return CHOICE
+    if isinstance(parser, SequenceParser):
+        return SEQUENCE
+    if isinstance(parser, RepeatingParser):
+        return REPEAT
+    if isinstance(parser, SeparatedParser):
+        return SEPARATED
+    if isinstance(parser, OptionalParser):
+        return OPTIONAL
+    if isinstance(parser, EndParser):
+        return END
+    if isinstance(parser, ActionParser):
+        return ACTION
+    if isinstance(parser, FlattenParser):
+        return FLATTEN
+    if isinstance(parser, TokenParser):
+        return TOKEN
+    if isinstance(parser, RecognizerParser):
+        return RECOGNIZE
+    if isinstance(parser, TrimmingParser):
+        return TRIM
+    if isinstance(parser, LayoutParser):
+        return LAYOUT
+    if type(parser) is DelegateParser or isinstance(parser, (SettableParser, MemoParser, CachingParser, FrozenParser)):
+        return DELEGATE
+    return OPAQUE
+
+
+class _Engine:
+    """Computes the end positions and packed nodes of the keys reachable from a root."""
+
+    def __init__(self, parser: Parser, buffer: str):
+        self.parsers: List[Parser] = list(Mirror(parser))
+        indexes = {p: index for index, p in enumerate(self.parsers)}
+        self.kinds = [_kind(p) for p in self.parsers]
+        self.children: List[Tuple[int, ...]] = []
+        for p, kind in zip(self.parsers, self.kinds):
+            if kind in (CHOICE, SEQUENCE):
+                children = p.get_children()
+            elif kind == SEPARATED:
+                children = [p._delegate, p._separator]
+            elif kind == OPAQUE:
+                children = []
+            else:
+                children = [p._delegate]
+            self.children.append(tuple(indexes[child] for child in children))
+        self.buffer = buffer
+        self.ends: Dict[Key, Dict[int, None]] = {}
+        self.packs: Dict[Symbol, List[Pack]] = {}
+        self.values: Dict[Key, Any] = {}
+        self.failure: Optional[Tuple[int, str]] = None
+        self._listeners: Dict[Key, List[tuple]] = {}
+        self._queue: Deque[tuple] = deque()
+
+    def run(self, key: Key):
+        self.request(key, None)
+        queue = self._queue
+        while queue:
+            listener, key, end = queue.popleft()
+            if listener is None:
+                self._expand(key)
+                continue
+            op, parent, argument = listener
+            if op == COPY:
+                self.add(parent, end, ((key, end),))
+            elif op == FILTER:
+                if end >= len(self.buffer):
+                    self.add(parent, end, ((key, end),))
+            elif op == MAP:
+                self.add(parent, argument(end), ((key, end),))
+            elif op == THEN:
+                slot, advancing = argument
+                if not advancing or end != parent[2]:
+                    self.request((parent[0], slot, end), (JOIN, parent, (key, end)))
+            else:
+                self.add(parent, end, (argument, (key, end)))
+
+    def request(self, key: Key, listener: Optional[tuple]):
+        listeners = self._listeners.get(key)
+        if listeners is None:
+            self._listeners[key] = [] if listener is None else [listener]
+            self.ends[key] = {}
+            self._queue.append((None, key, 0))
+        else:
+            listeners.append(listener)
+            for end in self.ends[key]:
+                self._queue.append((listener, key, end))
+
+    def add(self, key: Key, end: int, pack: Pack):
+        symbol = key, end
+        packs = self.packs.get(symbol)
+        if packs is not None:
+            packs.append(pack)
+            return
+        self.packs[symbol] = [pack]
+        self.ends[key][end] = None
+        for listener in self._listeners[key]:
+            self._queue.append((listener, key, end))
+
+    def _expand(self, key: Key):
+        index, slot, start = key
+        kind = self.kinds[index]
+        parser = self.parsers[index]
+        children = self.children[index]
+        buffer = self.buffer
+        if kind == OPAQUE:
+            result = parser.parse_on(Context(buffer, start))
+            if result.is_success:
+                self.values[key] = result.value
+                self.add(key, result.position, ())
+            elif self.failure is None or result.position >= self.failure[0]:
+                self.failure = result.position, result.message
+        elif kind == CHOICE:
+            for child in children:
+                self.request((child, 0, start), (COPY, key, None))
+        elif kind == SEQUENCE:
+            if slot == len(children):
+                self.add(key, start, ())
+            else:
+                self.request((children[slot], 0, start), (THEN, key, (slot + 1, False)))
+        elif kind == REPEAT:
+            minimum, maximum = parser._min, parser._max
+            if slot >= minimum and (not isinstance(parser, LimitedRepeatingParser)
+                                    or parser._limit.fast_parse_on(buffer, start) >= 0):
+                self.add(key, start, ())
+            if maximum == -1 or slot < maximum:
+                # Unbounded counts past the minimum are all the same slot.
+                following = min(slot + 1, minimum) if maximum == -1 else slot + 1
+                self.request((children[0], 0, start), (THEN, key, (following, True)))
+        elif kind == SEPARATED:
+            # Slots: before the first element, after an element, after a separator.
+            if slot == 1 or slot == 2 and parser._trailing:
+                self.add(key, start, ())
+            child, following = (children[1], 2) if slot == 1 else (children[0], 1)
+            self.request((child, 0, start), (THEN, key, (following, False)))
+        elif kind == OPTIONAL:
+            self.add(key, start, ())
+            self.request((children[0], 0, start), (COPY, key, None))
+        elif kind == END:
+            self.request((children[0], 0, start), (FILTER, key, None))
+        elif kind == TRIM:
+            right = parser._right
+            self.request((children[0], 0, _consume(parser._left, buffer, start)),
+                         (MAP, key, lambda end: _consume(right, buffer, end)))
+        elif kind == LAYOUT:
+            layout = parser._layout
+            if parser._after:
+                self.request((children[0], 0, start), (MAP, key, lambda end: layout.skip(buffer, end)))
+            else:
+                self.request((children[0], 0, layout.skip(buffer, start)), (COPY, key, None))
+        else:
+            self.request((children[0], 0, start), (COPY, key, None))
+
+
+class _Values:
+    """The trees of a symbol, enumerated on demand and kept."""
+
+    __slots__ = '_values', '_iterator'
+
+    def __init__(self, iterator: Iterator):
+        self._values = []
+        self._iterator = iterator
+
+    def has(self, index: int) -> bool:
+        while len(self._values) <= index and self._iterator is not None:
+            try:
+                self._values.append(next(self._iterator))
+            except StopIteration:
+                self._iterator = None
+        return index < len(self._values)
+
+    def __getitem__(self, index: int):
+        return self._values[index]
+
+    def __iter__(self) -> Iterator:
+        index = 0
+        while self.has(index):
+            yield self._values[index]
+            index += 1
+
+
+def _product(columns: List[_Values]) -> Iterator[List]:
+    if not all(column.has(0) for column in columns):
+        return
+    indexes = [0] * len(columns)
+    while True:
+        yield [column[index] for column, index in zip(columns, indexes)]
+        digit = len(columns) - 1
+        while digit >= 0:
+            indexes[digit] += 1
+            if columns[digit].has(indexes[digit]):
+                break
+            indexes[digit] = 0
+            digit -= 1
+        if digit < 0:
+            return
+
+
+class Forest(Generic[T]):
+    """The shared packed parse forest of the parses of the input between
+    start and stop.
+
+    Iterating enumerates the values of the trees lazily. Derivations that
+    loop back to a symbol they are part of, which grammars deriving a
+    parser from itself without consuming input have, are left out, so the
+    trees are finite."""
+
+    def __init__(self, engine: _Engine, symbol: Symbol):
+        self._engine = engine
+        self._symbol = symbol
+        self._packs: Dict[Symbol, List[Pack]] = {}
+        self._counts: Dict[Symbol, int] = {}
+        self._values: Dict[Symbol, _Values] = {}
+        self._prune()
+
+    @property
+    def start(self) -> int:
+        return self._symbol[0][2]
+
+    @property
+    def stop(self) -> int:
+        return self._symbol[1]
+
+    @property
+    def symbols(self) -> int:
+        """The number of symbols in the forest."""
+        return len(self._packs)
+
+    def count(self) -> int:
+        """The number of trees."""
+        return self._counts[self._symbol]
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.count() > 1
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._trees(self._symbol))
+
+    def _prune(self):
+        """Keeps the packed nodes whose children are not on the path from the
+        root, and counts the trees of each symbol in post-order."""
+        packs = self._engine.packs
+        active = set()
+        stack = [(self._symbol, 0, 0)]
+        active.add(self._symbol)
+        kept: Dict[Symbol, List[Pack]] = {self._symbol: []}
+        while stack:
+            symbol, pack_index, child_index = stack.pop()
+            alternatives = packs[symbol]
+            if pack_index == len(alternatives):
+                active.discard(symbol)
+                self._counts[symbol] = self._count(symbol, kept[symbol])
+                continue
+            pack = alternatives[pack_index]
+            if child_index == len(pack):
+                kept[symbol].append(pack)
+                stack.append((symbol, pack_index + 1, 0))
+                continue
+            child = pack[child_index]
+            if child in active:
+                stack.append((symbol, pack_index + 1, 0))
+                continue
+            stack.append((symbol, pack_index, child_index + 1))
+            if child not in kept:
+                kept[child] = []
+                active.add(child)
+                stack.append((child, 0, 0))
+        self._packs = kept
+
+    def _included(self, symbol: Symbol, pack: Pack) -> Pack:
+        """Returns the children of a packed node whose values are part of the symbol's."""
+        (index, slot, _), _ = symbol
+        kind = self._engine.kinds[index]
+        if kind in _SINGLE or not pack:
+            return ()
+        if kind in _LISTS:
+            first = pack[0]
+            if kind == SEPARATED and slot == 1 and not self._engine.parsers[index]._keep_separators:
+                return ()
+            return first,
+        return pack
+
+    def _count(self, symbol: Symbol, packs: List[Pack]) -> int:
+        (index, _, _), _ = symbol
+        counts = self._counts
+        viable = [pack for pack in packs if all(counts[child] for child in pack)]
+        if self._engine.kinds[index] in _SINGLE:
+            return 1 if viable else 0
+        total = 0
+        for pack in viable:
+            product = 1
+            for child in self._included(symbol, pack):
+                product *= counts[child]
+            if self._engine.kinds[index] in _LISTS and pack:
+                product *= counts[pack[1]]
+            total += product
+        return total
+
+    def _trees(self, symbol: Symbol) -> _Values:
+        values = self._values.get(symbol)
+        if values is None:
+            values = self._values[symbol] = _Values(self._enumerate(symbol))
+        return values
+
+    def _enumerate(self, symbol: Symbol) -> Iterator:
+        engine = self._engine
+        key, end = symbol
+        index, slot, start = key
+        kind = engine.kinds[index]
+        parser = engine.parsers[index]
+        if not self._counts[symbol]:
+            return
+        if kind == OPAQUE:
+            yield engine.values[key]
+        elif kind == FLATTEN:
+            yield parser._flatten(engine.buffer, start, end)
+        elif kind == RECOGNIZE:
+            yield None
+        elif kind in _LISTS:
+            for chain in self._chains(symbol):
+                for values in _product([self._trees(child) for child in chain]):
+                    yield parser._select(values) if isinstance(parser, PickParser) else values
+        else:
+            for pack in self._packs[symbol]:
+                if not pack:
+                    yield parser._otherwise
+                    continue
+                child, = pack
+                for value in self._trees(child):
+                    if kind == ACTION:
+                        yield parser._function(value)
+                    elif kind == TOKEN:
+                        yield Token(engine.buffer, start, child[1], value)
+                    else:
+                        yield value
+
+    def _chains(self, symbol: Symbol) -> Iterator[List[Symbol]]:
+        """Yields the included children along each chain of slots of a list symbol."""
+        stack: List[Tuple[Optional[Symbol], Any]] = [(symbol, None)]
+        while stack:
+            current, chain = stack.pop()
+            if current is None:
+                children = []
+                while chain is not None:
+                    child, chain = chain
+                    children.append(child)
+                children.reverse()
+                yield children
+                continue
+            for pack in reversed(self._packs[current]):
+                if not pack:
+                    stack.append((None, chain))
+                    continue
+                included = self._included(current, pack)
+                stack.append((pack[1], (included[0], chain) if included else chain))
+
+
+def parse_all(parser: Parser[T], buffer: str, start: int = 0) -> Result[Forest[T]]:
+    """Parses buffer from start in all possible ways, and returns the forest
+    of the parses ending where the longest ones do, or the failure at the
+    furthest position."""
+    engine = _Engine(parser, buffer)
+    key = 0, 0, start
+    engine.run(key)
+    ends = engine.ends[key]
+    if not ends:
+        position, message = engine.failure or (start, 'no parse')
+        return Failure(buffer, position, message)
+    stop = max(ends)
+    return Success(buffer, stop, Forest(engine, (key, stop)))
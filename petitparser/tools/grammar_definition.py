@@ -28,7 +28,7 @@ class GrammarDefinitionMeta(type):
     def __new__(cls, name, bases, classdict):
         if META_DISABLE:
             return type.__new__(cls, name, bases, classdict)
-        result = type.__new__(cls, name, bases, {})
+        result = type.__new__(cls, name, bases, dict(classdict))
         result._parsers = {}
         tasks = []
         for base in bases:
@@ -83,6 +83,9 @@ class Reference(Parser):
 
 
 class GrammarDefinition(metaclass=GrammarDefinitionMeta):
+    # Whitespace and comments skipped between tokens, see tools.layout.
+    _layout = None
+
     @classmethod
     def ref(cls, name: str):
         return Reference(name)
@@ -107,7 +110,11 @@ class GrammarDefinition(metaclass=GrammarDefinitionMeta):
 
     @classmethod
     def build(cls, name: str = 'start') -> Parser:
-        return cls._resolve(Reference(name))
+        parser = cls._resolve(Reference(name))
+        if cls._layout is not None:
+            from .layout import with_layout
+            parser = with_layout(parser, cls._layout)
+        return parser
 
     @classmethod
     def _dereference(cls, mapping: Dict[Reference, Parser], reference: Reference):
@@ -0,0 +1,161 @@
+"""Implicit layout: whitespace and comments skipped between the tokens of a
+grammar with a single regular expression scan.
+
+Terminals, and flatten() and token() parsers, are the tokens of a grammar.
+Layout is skipped before every token and at the end of the input, so the
+characters of a token are whatever its flatten() or token() parser spans."""
+
+from __future__ import annotations
+import re
+from typing import Dict, Generic, Iterable, List, Pattern, Tuple, TypeVar, Union
+
+from ..context import Context, Result, memo_tables
+from ..parser import Parser, _WHITESPACE
+from ..parser.actions import FlattenParser, TokenParser, TrimmingParser
+from ..parser.combinators import DelegateParser, EndOfInputParser, EndParser
+from ..parser.primitive import CharacterParser, StringParser
+
+T = TypeVar('T', covariant=True)
+
+_TOKENS = (CharacterParser, StringParser, FlattenParser, TokenParser, EndOfInputParser)
+
+
+class Layout:
+    """Skips any number of matches of a regular expression.
+
+    The last skip of the parse in progress on a thread is remembered with its
+    memo tables, so skipping again from the same position, or from where it
+    stopped, does not scan the input again."""
+
+    __slots__ = '_pattern', '_match'
+
+    def __init__(self, pattern: Union[str, Pattern]):
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+        self._pattern = pattern
+        self._match = re.compile(f'(?:{pattern.pattern})*', pattern.flags).match
+
+    @property
+    def pattern(self) -> Pattern:
+        return self._pattern
+
+    def skip(self, buffer: str, position: int) -> int:
+        """Returns the position after the layout starting at position."""
+        memos = memo_tables
+        if buffer is not memos.buffer:
+            memos.start(buffer)
+        last = memos.skips.get(self)
+        if last is not None:
+            if position == last[0]:
+                return last[1]
+            if position == last[1]:
+                return position
+        stop = self._match(buffer, position).end()
+        memos.skips[self] = position, stop
+        return stop
+
+    def __reduce__(self):
+        return Layout, (self._pattern,)
+
+    def __repr__(self):
+        return f'Layout({self._pattern.pattern!r})'
+
+
+def layout(comments: Iterable[Union[str, Tuple[str, str]]] = (), whitespace: str = r'\s+') -> Layout:
+    """Returns the layout of whitespace and comments.
+
+    A comment is either the string starting a line comment, or the pair of
+    strings opening and closing a block comment."""
+    alternatives = [whitespace]
+    for comment in comments:
+        if isinstance(comment, str):
+            alternatives.append(re.escape(comment) + r'[^\n]*')
+        else:
+            start, stop = comment
+            alternatives.append(re.escape(start) + r'(?s:.*?)' + re.escape(stop))
+    return Layout('|'.join(alternatives))
+
+
+class LayoutParser(DelegateParser[T], Generic[T]):
+    """Skips layout before the delegate, or after it when after is set."""
+
+    __slots__ = '_layout', '_after'
+
+    def __init__(self, delegate: Parser[T], layout: Layout, after: bool = False):
+        super().__init__(delegate)
+        self._layout = layout
+        self._after = after
+
+    def parse_on(self, context: Context) -> Result[T]:
+        if self._after:
+            result = self._delegate.parse_on(context)
+            if result.is_failure:
+                return result
+            position = self._layout.skip(result.buffer, result.position)
+            return result if position == result.position else result.success(result.value, position)
+
+        position = self._layout.skip(context.buffer, context.position)
+        if position != context.position:
+            context = Context(context.buffer, position)
+        return self._delegate.parse_on(context)
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        if self._after:
+            position = self._delegate.fast_parse_on(buffer, position)
+            return position if position < 0 else self._layout.skip(buffer, position)
+        return self._delegate.fast_parse_on(buffer, self._layout.skip(buffer, position))
+
+    def has_equal_properties(self, other: Parser) -> bool:
+        return (super().has_equal_properties(other)
+                and self._layout is other._layout
+                and self._after == other._after)
+
+    def copy(self) -> Parser[T]:
+        return LayoutParser(self._delegate, self._layout, self._after)
+
+    def __str__(self):
+        return super().__str__() + '[' + self._layout._pattern.pattern + ']'
+
+
+def _is_whitespace_trim(parser: Parser) -> bool:
+    return isinstance(parser, TrimmingParser) and parser._left is _WHITESPACE and parser._right is _WHITESPACE
+
+
+def with_layout(parser: Parser[T], layout: Union[Layout, str, Pattern]) -> Parser[T]:
+    """Returns a copy of parser which skips layout before its tokens and at
+    the end of the input.
+
+    The tokens themselves are shared with parser. Whitespace trim()s are
+    dropped, since the layout skips the same whitespace."""
+    if not isinstance(layout, Layout):
+        layout = Layout(layout)
+    copies: Dict[Parser, Parser] = {}
+    todo: List[Tuple[Parser, Parser]] = []
+
+    def convert(original: Parser) -> Parser:
+        target = copies.get(original)
+        if target is not None:
+            return target
+        current = original
+        while _is_whitespace_trim(current) and current._delegate is not original:
+            current = current._delegate
+        if isinstance(current, _TOKENS):
+            target = LayoutParser(current, layout)
+        elif current is not original and current in copies:
+            target = copies[current]
+        else:
+            target = current.copy()
+            todo.append((current, target))
+            copies[current] = target
+        copies[original] = target
+        return target
+
+    root = convert(parser)
+    while todo:
+        original, target = todo.pop()
+        for child in original.get_children():
+            replacement = convert(child)
+            if isinstance(original, EndParser):
+                replacement = LayoutParser(replacement, layout, after=True)
+            target.replace(child, replacement)
+    return root
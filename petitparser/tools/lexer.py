@@ -0,0 +1,140 @@
+"""Two-phase parsing: the input is split into tokens once, and the grammar
+parses the token stream with integer token positions."""
+
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, List, Tuple, Union
+
+from ..context import Failure, ParseError, Token
+from ..parser import Parser
+from ..parser.primitive import TokenKindParser, TokenTextParser
+
+
+class TokenStream:
+    """The tokens of a text, in arrays of kinds and character offsets.
+
+    Parsers over a token stream see one position per token. Slicing the
+    stream returns the source text covered by the sliced tokens, so
+    flatten() works as it does on text."""
+
+    __slots__ = 'text', 'kinds', 'starts', 'stops', 'kind_names', 'kind_ids'
+
+    def __init__(self, text: str, kinds: array, starts: array, stops: array, kind_names: List[str]):
+        self.text = text
+        self.kinds = kinds
+        self.starts = starts
+        self.stops = stops
+        self.kind_names = kind_names
+        self.kind_ids = {name: index for index, name in enumerate(kind_names)}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self.kinds))
+            if start >= stop:
+                return ''
+            return self.text[self.starts[start]:self.stops[stop - 1]]
+        start, stop = self.starts[index], self.stops[index]
+        return Token(self.text, start, stop, self.text[start:stop])
+
+    def kind(self, index: int) -> str:
+        return self.kind_names[self.kinds[index]]
+
+    def has_text(self, index: int, text: str) -> bool:
+        start = self.starts[index]
+        return self.stops[index] - start == len(text) and self.text.startswith(text, start)
+
+    def offset(self, position: int) -> int:
+        """Returns the character offset of a token position."""
+        return self.starts[position] if position < len(self.kinds) else len(self.text)
+
+    def __repr__(self):
+        return f'TokenStream({len(self)} tokens)'
+
+
+class Lexer:
+    """Splits text into tokens with the longest match among the rules.
+
+    Rules are tried in order and the first of the longest matches wins, so
+    keywords go before identifiers. Text matched by a skip parser between
+    tokens is dropped."""
+
+    def __init__(self, rules: Union[Dict[str, Parser], Iterable[Tuple[str, Parser]]], skip: Iterable[Parser] = ()):
+        from .analyzer import Analyzer, first_char_table
+        from ..parser.combinators import ChoiceParser
+
+        rules = list(rules.items() if isinstance(rules, dict) else rules)
+        if not rules:
+            raise ValueError('a lexer needs at least one rule')
+        self._kind_names = []
+        for kind, _ in rules:
+            if kind not in self._kind_names:
+                self._kind_names.append(kind)
+        self._rules = [(self._kind_names.index(kind), parser) for kind, parser in rules]
+        self._skip = list(skip)
+
+        analyzer = Analyzer(ChoiceParser(*(parser for _, parser in rules), *self._skip))
+        self._table = first_char_table(analyzer, self._rules, _rule_parser)
+        self._typecode = 'B' if len(self._kind_names) <= 256 else 'H'
+
+    @property
+    def kinds(self) -> List[str]:
+        return list(self._kind_names)
+
+    def tokenize(self, text: str) -> TokenStream:
+        """Splits text into tokens, raising a ParseError where no rule matches."""
+        kinds = array(self._typecode)
+        starts = array('q')
+        stops = array('q')
+        add_kind, add_start, add_stop = kinds.append, starts.append, stops.append
+        skippers = [parser.fast_parse_on for parser in self._skip]
+        by_char, other = self._table.by_char, self._table.other
+
+        position = 0
+        length = len(text)
+        while True:
+            skipped = True
+            while skipped and position < length:
+                skipped = False
+                for skipper in skippers:
+                    stop = skipper(text, position)
+                    if stop > position:
+                        position = stop
+                        skipped = True
+                        break
+            if position >= length:
+                break
+
+            best, best_stop = -1, position
+            for kind, parser in by_char.get(text[position], other):
+                stop = parser.fast_parse_on(text, position)
+                if stop > best_stop:
+                    best, best_stop = kind, stop
+            if best < 0:
+                raise ParseError(Failure(text, position, 'unexpected character'))
+            add_kind(best)
+            add_start(position)
+            add_stop(best_stop)
+            position = best_stop
+
+        return TokenStream(text, kinds, starts, stops, self._kind_names)
+
+    def parse(self, parser: Parser, text: str):
+        """Tokenizes text and parses the token stream."""
+        return parser.parse(self.tokenize(text))
+
+
+def _rule_parser(rule: Tuple[int, Parser]) -> Parser:
+    return rule[1]
+
+
+def token_kind(kind: str, message: str = None) -> Parser[Token]:
+    """Parses a token of the given kind."""
+    return TokenKindParser(kind, message or f'{kind} expected')
+
+
+def token_text(text: str, message: str = None) -> Parser[Token]:
+    """Parses a token with the given text."""
+    return TokenTextParser(text, message or f'{text!r} expected')
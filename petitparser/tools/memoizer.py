@@ -0,0 +1,158 @@
+"""Plans which parsers of a grammar are worth memoizing.
+
+Training parses a sample workload and counts, for every parser, how often
+it is evaluated again at a position it was already evaluated at in the
+same input. Such a re-evaluation would be a memo hit, and it saves the
+steps (parser invocations) the evaluation made, unless it happens within
+another hit, whose parser is the one to memoize instead. Every invocation of a
+memoized parser pays for a lookup and every first evaluation at a position
+for storing its result, so only the parsers whose savings exceed their
+bookkeeping cost are memoized."""
+
+from __future__ import annotations
+from itertools import count
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, TypeVar
+
+from ..parser import Parser
+from ..parser.caching import MemoParser
+from ..utils import Mirror
+from .analyzer import _solve
+from .optimizer import _impure_rule
+from .profiler import instrument
+
+T = TypeVar('T', covariant=True)
+
+# Bookkeeping costs in steps: a lookup costs about as much as invoking a
+# parser, and storing a result about as much again, counting its memory.
+LOOKUP_COST = 1.0
+STORE_COST = 1.0
+
+# How an evaluation would have been answered by memoizing its parser. A hit
+# is nested when memoizing an enclosing parser would already have saved it.
+MISS, HIT, NESTED_HIT = range(3)
+
+
+class MemoEstimate(NamedTuple):
+    invocations: int
+    stores: int
+    hits: int
+    savings: float
+    cost: float
+
+    @property
+    def profitable(self) -> bool:
+        return self.hits > 0 and self.savings > self.cost
+
+
+class MemoPlan(NamedTuple):
+    """The parsers to memoize, by their index in Mirror order, with the
+    estimates of every parser.
+
+    Since parsers are identified by index, a plan applies to any graph of
+    the same shape, e.g. every build of the same grammar definition."""
+
+    nodes: FrozenSet[int]
+    estimates: Tuple[MemoEstimate, ...]
+
+    def transformer(self) -> Callable[[Parser], Parser]:
+        """Returns the transformer applying the plan with Mirror(grammar).transform,
+        which visits the parsers in Mirror order."""
+        indexes = count()
+        nodes = self.nodes
+        return lambda parser: MemoParser(parser) if next(indexes) in nodes else parser
+
+    def apply(self, parser: Parser[T]) -> Parser[T]:
+        """Returns a copy of parser with the planned parsers memoized."""
+        size = sum(1 for _ in Mirror(parser))
+        if size != len(self.estimates):
+            raise ValueError(f'plan of a graph of {len(self.estimates)} parsers applied to one of {size}')
+        return Mirror(parser).transform(self.transformer())
+
+
+class MemoTrainer:
+    """Counts the re-evaluations of the parsers of a graph.
+
+    Parsing with trainer.parser charges the parsers of the original graph,
+    which is left untouched:
+
+        trainer = MemoTrainer(grammar)
+        for text in sample:
+            trainer.parser.parse(text)
+        memoized = trainer.plan().apply(grammar)
+    """
+
+    def __init__(self, parser: Parser):
+        self._parsers, self.parser = instrument(parser, self)
+        parents: Dict[Parser, List[Parser]] = {p: [] for p in self._parsers}
+        for p in self._parsers:
+            for child in p.get_children():
+                parents[child].append(p)
+        impure = _solve(self._parsers, parents, _impure_rule, False)
+        self._pure = [not impure[p] for p in self._parsers]
+        self.reset()
+
+    def reset(self):
+        size = len(self._parsers)
+        self._steps = 0
+        self._buffer: Optional[str] = None
+        self._seen: Dict[Tuple[int, int], bool] = {}
+        self._invocations = [0] * size
+        self._stores = [0] * size
+        self._hits = [0] * size
+        self._savings = [0] * size
+        self._stack: List[int] = []
+        self._shadows = 0
+
+    def enter(self, index: int, buffer: str, position: int, full: bool) -> int:
+        """Records an evaluation of the parser at index, full when its result is
+        needed and not only where it stops, and returns the steps made so far."""
+        if buffer is not self._buffer:
+            self._buffer = buffer
+            self._seen = {}
+        self._invocations[index] += 1
+        key = index, position
+        seen = self._seen.get(key)
+        # A memo answers parse_on from results only, and fast_parse_on from both.
+        hit = seen is not None and (seen or not full)
+        if not hit:
+            self._seen[key] = full or bool(seen)
+            self._stores[index] += 1
+            self._stack.append(MISS)
+        elif self._shadows:
+            self._stack.append(NESTED_HIT)
+        else:
+            self._stack.append(HIT)
+        if hit and self._pure[index]:
+            self._shadows += 1
+        self._steps += 1
+        return self._steps - 1
+
+    def leave(self, index: int, start: int, success: bool):
+        state = self._stack.pop()
+        if state != MISS:
+            self._hits[index] += 1
+            if state == HIT:
+                self._savings[index] += self._steps - start
+            if self._pure[index]:
+                self._shadows -= 1
+
+    def estimates(self, lookup_cost: float = LOOKUP_COST, store_cost: float = STORE_COST) -> List[MemoEstimate]:
+        return [MemoEstimate(invocations, stores, hits, savings, lookup_cost * invocations + store_cost * stores)
+                for invocations, stores, hits, savings
+                in zip(self._invocations, self._stores, self._hits, self._savings)]
+
+    def plan(self, lookup_cost: float = LOOKUP_COST, store_cost: float = STORE_COST) -> MemoPlan:
+        """Returns the plan memoizing the profitable parsers without side effects."""
+        estimates = self.estimates(lookup_cost, store_cost)
+        nodes = frozenset(index for index, (pure, estimate) in enumerate(zip(self._pure, estimates))
+                          if pure and estimate.profitable)
+        return MemoPlan(nodes, tuple(estimates))
+
+
+def plan_memoization(parser: Parser, inputs: Iterable[str], lookup_cost: float = LOOKUP_COST,
+                     store_cost: float = STORE_COST) -> MemoPlan:
+    """Parses every input and returns the plan memoizing the parsers worth it."""
+    trainer = MemoTrainer(parser)
+    for inp in inputs:
+        trainer.parser.parse(inp)
+    return trainer.plan(lookup_cost, store_cost)
@@ -0,0 +1,186 @@
+"""Graph passes rewriting a grammar into an equivalent faster one."""
+
+from __future__ import annotations
+from functools import partial
+from operator import itemgetter
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple, TypeVar
+
+from ..parser import Parser, _permute
+from ..parser.actions import ActionParser, ContinuationParser, FlattenParser, RecognizerParser, TrimmingParser
+from ..parser.combinators import (ChoiceParser, NotParser, PickParser, ReorderedChoiceParser, SequenceParser,
+                                  _cut_index)
+from ..parser.primitive import CutParser
+from ..parser.repeating import LimitedRepeatingParser, SeparatedParser
+from ..utils import Mirror
+from .analyzer import Analyzer, _solve, is_disjoint
+from .profiler import ParserProfile
+
+T = TypeVar('T', covariant=True)
+
+# How a parser uses a child: for its value, only for where it stops (through
+# parse_on, which a recognizer can replace), or only through fast_parse_on.
+VALUE, RECOGNIZE, FAST = 'value', 'recognize', 'fast'
+
+
+def _picked(parser: Parser) -> Optional[Tuple[SequenceParser, Tuple[int, ...], bool]]:
+    """Returns the sequence, indexes and single flag of a pick() or permute()
+    of a sequence without cuts."""
+    if type(parser) is not ActionParser or parser._has_side_effects:
+        return None
+    sequence = parser._delegate
+    if type(sequence) is not SequenceParser or _cut_index(sequence._parsers) is not None:
+        return None
+    function = parser._function
+    if type(function) is itemgetter:
+        _, indexes = function.__reduce__()
+        if len(indexes) == 1 and isinstance(indexes[0], int):
+            return sequence, indexes, True
+    elif isinstance(function, partial) and function.func is _permute and not function.keywords:
+        indexes, = function.args
+        if all(isinstance(index, int) for index in indexes):
+            return sequence, tuple(indexes), False
+    return None
+
+
+def _uses(parser: Parser) -> List[Tuple[Parser, str]]:
+    """Returns the children of parser with how it uses them."""
+    if isinstance(parser, FlattenParser):
+        return [(parser._delegate, RECOGNIZE if parser._message is None else FAST)]
+    if isinstance(parser, NotParser):
+        return [(parser._delegate, FAST)]
+    if isinstance(parser, TrimmingParser):
+        return [(parser._delegate, VALUE), (parser._left, FAST), (parser._right, FAST)]
+    if isinstance(parser, LimitedRepeatingParser):
+        return [(parser._delegate, VALUE), (parser._limit, FAST)]
+    if isinstance(parser, SeparatedParser) and not parser._keep_separators:
+        return [(parser._delegate, VALUE), (parser._separator, RECOGNIZE)]
+    return [(child, VALUE) for child in parser.get_children()]
+
+
+def _impure_rule(parser: Parser, impure: Dict[Parser, bool]) -> bool:
+    if isinstance(parser, ActionParser) and parser._has_side_effects or isinstance(parser, ContinuationParser):
+        return True
+    return any(impure[child] for child in parser.get_children())
+
+
+def _commits_rule(parser: Parser, commits: Dict[Parser, bool]) -> bool:
+    # Choices turn committed failures of their alternatives into plain ones.
+    if isinstance(parser, CutParser):
+        return True
+    return not isinstance(parser, ChoiceParser) and any(commits[child] for child in parser.get_children())
+
+
+def _parents(parsers: List[Parser]) -> Dict[Parser, List[Parser]]:
+    parents: Dict[Parser, List[Parser]] = {p: [] for p in parsers}
+    for p in parsers:
+        for child in p.get_children():
+            parents[child].append(p)
+    return parents
+
+
+class ChoiceOrder(NamedTuple):
+    """The order to try the alternatives of a choice in, as indexes into
+    the alternatives as listed, with how often each succeeded."""
+
+    choice: Parser
+    order: Tuple[int, ...]
+    successes: Tuple[int, ...]
+
+    def __str__(self):
+        alternatives = self.choice.get_children()
+        return f'{self.choice}: ' + ', '.join(f'{alternatives[index]} #{index} ({self.successes[index]} successes)'
+                                               for index in self.order)
+
+
+def choice_orders(parser: Parser, profile: Mapping[Parser, ParserProfile]) -> List[ChoiceOrder]:
+    """Returns the choices of the graph whose alternatives should be tried in
+    another order, the most often successful ones first, for review.
+
+    Two alternatives are only swapped when they cannot succeed at the same
+    position: neither is nullable and their first sets are disjoint. Nor
+    are alternatives with side effects or cuts moved. The profile, e.g.
+    from tools.profiler.profile(), counts the successes of a parser in all
+    the places it is used."""
+    analyzer = Analyzer(parser)
+    parsers = analyzer.parsers
+    parents = _parents(parsers)
+    impure = _solve(parsers, parents, _impure_rule, False)
+    commits = _solve(parsers, parents, _commits_rule, False)
+
+    orders = []
+    for choice in parsers:
+        if type(choice) is not ChoiceParser:
+            continue
+        alternatives = choice.get_children()
+        successes = tuple(profile[p].successes if p in profile else 0 for p in alternatives)
+        movable = [not (analyzer.is_nullable(p) or impure[p] or commits[p]) for p in alternatives]
+        order = list(range(len(alternatives)))
+        # Insertion sort swapping only adjacent alternatives which exclude each other.
+        for end in range(1, len(order)):
+            current = end
+            while current > 0:
+                later, earlier = order[current], order[current - 1]
+                if not (movable[later] and movable[earlier] and successes[later] > successes[earlier]
+                        and is_disjoint(analyzer.first_set(alternatives[later]),
+                                        analyzer.first_set(alternatives[earlier]))):
+                    break
+                order[current - 1], order[current] = later, earlier
+                current -= 1
+        if order != sorted(order):
+            orders.append(ChoiceOrder(choice, tuple(order), successes))
+    return orders
+
+
+def optimize(parser: Parser[T], profile: Mapping[Parser, ParserProfile] = None) -> Parser[T]:
+    """Returns an optimized copy of parser.
+
+    Values that are thrown away are not built: children whose values are
+    not used (the delegates of flatten() and not_(), repetition limits,
+    dropped separators and the elements pick() and permute() drop) are
+    recognized with fast_parse_on, and sequences are fused with pick() and
+    permute().
+    Subgraphs with side effects are left alone.
+
+    Given the profile of a typical workload, the alternatives of choices
+    are also reordered as choice_orders() reports."""
+    parsers = list(Mirror(parser))
+    parents = _parents(parsers)
+    impure = _solve(parsers, parents, _impure_rule, False)
+    orders = {} if profile is None else {order.choice: order.order for order in choice_orders(parser, profile)}
+
+    copies: Dict[Parser, Parser] = {}
+    for original in parsers:
+        if original in orders:
+            order = orders[original]
+            alternatives = original.get_children()
+            listed = tuple(sorted(range(len(order)), key=order.__getitem__))
+            copies[original] = ReorderedChoiceParser([alternatives[index] for index in order], listed)
+            continue
+        picked = _picked(original)
+        if picked is not None:
+            sequence, indexes, single = picked
+            children = sequence._parsers
+            values = {index % len(children) for index in indexes}
+            demanded = tuple(index in values or impure[child] for index, child in enumerate(children))
+            copies[original] = PickParser(children, indexes, single, demanded)
+            continue
+        copy = original.copy()
+        uses: Dict[Parser, set] = {}
+        for child, use in _uses(original):
+            uses.setdefault(child, set()).add(use)
+        for child, kinds in uses.items():
+            if kinds == {RECOGNIZE} and not impure[child]:
+                copy.replace(child, RecognizerParser(child))
+        copies[original] = copy
+
+    todo = list(copies.values())
+    seen = set(todo)
+    while todo:
+        node = todo.pop()
+        for child in node.get_children():
+            if child in copies:
+                node.replace(child, copies[child])
+            elif child not in seen:
+                seen.add(child)
+                todo.append(child)
+    return copies[parser]
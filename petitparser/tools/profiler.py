@@ -0,0 +1,101 @@
+"""Counts how often each parser of a grammar is invoked and succeeds."""
+
+from __future__ import annotations
+from itertools import count
+from typing import Dict, Generic, Iterable, List, NamedTuple, Tuple, TypeVar
+
+from ..context import Context, Result
+from ..parser import Parser
+from ..parser.combinators import DelegateParser
+from ..utils import Mirror
+
+T = TypeVar('T', covariant=True)
+
+
+class ParserProfile(NamedTuple):
+    invocations: int
+    successes: int
+
+
+class ProbeParser(DelegateParser[T], Generic[T]):
+    """Reports the invocations of the copy of a node it wraps to a probe.
+
+    probe.enter(index, buffer, position, full) is called before the
+    delegate, full when its value is needed and not only where it stops,
+    and probe.leave(index, token, success) after it, with what enter
+    returned."""
+
+    __slots__ = '_probe', '_index'
+
+    def __init__(self, delegate: Parser[T], probe, index: int):
+        super().__init__(delegate)
+        self._probe = probe
+        self._index = index
+
+    def parse_on(self, context: Context) -> Result[T]:
+        probe = self._probe
+        token = probe.enter(self._index, context.buffer, context.position, True)
+        result = self._delegate.parse_on(context)
+        probe.leave(self._index, token, result.is_success)
+        return result
+
+    def fast_parse_on(self, buffer: str, position: int) -> int:
+        probe = self._probe
+        token = probe.enter(self._index, buffer, position, False)
+        stop = self._delegate.fast_parse_on(buffer, position)
+        probe.leave(self._index, token, stop >= 0)
+        return stop
+
+    def copy(self) -> Parser[T]:
+        return ProbeParser(self._delegate, self._probe, self._index)
+
+
+def instrument(parser: Parser[T], probe) -> Tuple[List[Parser], Parser[T]]:
+    """Returns the parsers of the graph in Mirror order, and a copy of the
+    graph reporting each of them to probe by its index in that order. The
+    original graph is left untouched."""
+    parsers = list(Mirror(parser))
+    indexes = count()
+    return parsers, Mirror(parser).transform(lambda copy: ProbeParser(copy, probe, next(indexes)))
+
+
+class Profiler:
+    """Profiles a parser graph.
+
+    Parsing with profiler.parser counts invocations against the parsers of
+    the original graph, which is left untouched:
+
+        profiler = Profiler(grammar)
+        profiler.parser.parse(text)
+        print(Mirror(grammar).to_dot(profiler.invocations()))
+    """
+
+    def __init__(self, parser: Parser):
+        self._parsers, self.parser = instrument(parser, self)
+        self.reset()
+
+    def enter(self, index: int, buffer: str, position: int, full: bool):
+        self._invocations[index] += 1
+
+    def leave(self, index: int, token, success: bool):
+        if success:
+            self._successes[index] += 1
+
+    def invocations(self) -> Dict[Parser, int]:
+        return dict(zip(self._parsers, self._invocations))
+
+    def profiles(self) -> Dict[Parser, ParserProfile]:
+        return {p: ParserProfile(invocations, successes)
+                for p, invocations, successes in zip(self._parsers, self._invocations, self._successes)}
+
+    def reset(self):
+        self._invocations = [0] * len(self._parsers)
+        self._successes = [0] * len(self._parsers)
+
+
+def profile(parser: Parser, inputs: Iterable[str]) -> Dict[Parser, ParserProfile]:
+    """Parses every input and returns the profile of each parser of the graph."""
+    profiler = Profiler(parser)
+    for inp in inputs:
+        profiler.parser.parse(inp)
+    return profiler.profiles()
@@ -1,4 +1,5 @@
-from typing import Callable, Iterable, Iterator, List, Set
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Set
 from .parser import Parser
 
 
@@ -18,6 +19,15 @@ class ParserIterator(Iterator[Parser]):
         return current
 
 
+class GraphStats(NamedTuple):
+    nodes: int
+    by_type: Dict[str, int]
+    shared: int
+    max_depth: int
+    cycles: int
+    memory: int
+
+
 class Mirror(Iterable[Parser]):
     def __init__(self, parser: Parser):
         self._parser = parser
@@ -43,3 +53,86 @@ class Mirror(Iterable[Parser]):
                     seen.add(child)
                     todo.append(child)
         return mapping[self._parser]
+
+    def stats(self) -> GraphStats:
+        """Returns the size and shape of the parser graph.
+
+        A node is shared when it has more than one parent, cycles counts the
+        back edges of a depth-first traversal, and max_depth is the longest
+        path from the root once those are removed. memory estimates the
+        footprint of the nodes and of the values in their slots."""
+        from .parser import _resolve_slots
+
+        parents: Dict[Parser, int] = {}
+        by_type: Dict[str, int] = {}
+        memory = 0
+        measured = set()
+        for p in self:
+            name = type(p).__name__
+            by_type[name] = by_type.get(name, 0) + 1
+            memory += sys.getsizeof(p)
+            for slot in _resolve_slots(type(p)):
+                value = getattr(p, slot, None)
+                if value is not None and not isinstance(value, Parser) and id(value) not in measured:
+                    measured.add(id(value))
+                    memory += sys.getsizeof(value)
+            for child in p.get_children():
+                parents[child] = parents.get(child, 0) + 1
+
+        # Iterative depth-first search, ordering nodes by finishing time.
+        active = {self._parser}
+        finished: List[Parser] = []
+        done: Set[Parser] = set()
+        cycles = 0
+        stack = [(self._parser, iter(self._parser.get_children()))]
+        while stack:
+            parent, children = stack[-1]
+            for child in children:
+                if child in active:
+                    cycles += 1
+                elif child not in done:
+                    active.add(child)
+                    stack.append((child, iter(child.get_children())))
+                    break
+            else:
+                stack.pop()
+                active.discard(parent)
+                done.add(parent)
+                finished.append(parent)
+
+        depths = {}
+        for p in finished:
+            depths[p] = 1 + max((depths[c] for c in p.get_children() if c in depths), default=0)
+
+        return GraphStats(
+            nodes=len(finished),
+            by_type=by_type,
+            shared=sum(1 for count in parents.values() if count > 1),
+            max_depth=depths[self._parser],
+            cycles=cycles,
+            memory=memory)
+
+    def to_dot(self, counts: Mapping[Parser, int] = None) -> str:
+        """Returns the parser graph in the Graphviz dot language.
+
+        If counts maps parsers to their invocation counts (see
+        petitparser.tools.profiler), nodes are labeled with them and colored
+        from white to red as they get hotter."""
+        ids = {p: i for i, p in enumerate(self)}
+        hottest = max(counts.values(), default=0) if counts else 0
+
+        lines = ['digraph parser {', '    node [shape=box, style=filled, fillcolor=white];']
+        for p, i in ids.items():
+            label = str(p).replace('\\', '\\\\').replace('"', '\\"')
+            attributes = ''
+            if counts is not None:
+                count = counts.get(p, 0)
+                label += f'\\n{count} calls'
+                if hottest:
+                    attributes = f', fillcolor="0.0 {count / hottest:.3f} 1.0"'
+            lines.append(f'    n{i} [label="{label}"{attributes}];')
+        for p, i in ids.items():
+            for child in p.get_children():
+                lines.append(f'    n{i} -> n{ids[child]};')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
@@ -17,6 +17,7 @@ setup(
     license='MIT',
     packages=find_packages(include=['petitparser', 'petitparser.*']),
     install_requires=[],
+    extras_require={'numpy': ['numpy']},
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Science/Research',
@@ -1,5 +1,8 @@
+import importlib.util
+import time
 import unittest
-from petitparser import character, Parser, string
+from petitparser import character, cut, Parser, SettableParser, string
+from petitparser.context import CommittedFailure, Context, ParseTimeout, Span
 
 of = character.of
 
@@ -47,6 +50,97 @@ class ParsingTest(unittest.TestCase):
         self.assertTrue(parser.accept('a'))
         self.assertFalse(parser.accept('b'))
 
+    def test_parse_max_steps(self):
+        parser = character.of('a').star()
+        self.assertEqual(['a'] * 10, parser.parse('a' * 10, max_steps=100).value)
+        result = parser.parse('a' * 100, max_steps=20)
+        self.assertIsInstance(result, ParseTimeout)
+        self.assertTrue(result.is_failure)
+        self.assertEqual('step budget exhausted', result.message)
+        self.assertEqual(19, result.position)
+        self.assertEqual(21, result.steps)
+
+    def test_parse_deadline(self):
+        parser = character.of('a').star()
+        result = parser.parse('a' * 10000, deadline=time.monotonic() - 1)
+        self.assertIsInstance(result, ParseTimeout)
+        self.assertEqual('deadline exceeded', result.message)
+        result = parser.parse('a' * 10000, deadline=time.monotonic() + 60)
+        self.assertEqual(['a'] * 10000, result.value)
+
+    def test_accept_max_steps(self):
+        parser = character.of('a').star().end()
+        self.assertTrue(parser.accept('a' * 10, max_steps=100))
+        self.assertFalse(parser.accept('a' * 100, max_steps=100))
+
+    def test_budget_reuses_instrumented_graph(self):
+        from petitparser.parser import limits
+
+        inner = character.of('a').settable()
+        parser = inner.star()
+        self.assertEqual(['a'] * 3, parser.parse('aaa', max_steps=100).value)
+        instrumented = limits._instrumented[parser]
+        self.assertTrue(parser.accept('aa', max_steps=100))
+        self.assertIs(instrumented, limits._instrumented[parser])
+        self.assertEqual(7, instrumented.budget.steps)
+        inner.set(character.of('b'))
+        self.assertEqual(['b'], parser.parse('b', max_steps=100).value)
+        self.assertIsNot(instrumented, limits._instrumented[parser])
+
+    def test_accept_allocation_free(self):
+        from petitparser.parser.combinators import DelegateParser, EndOfInputParser
+        from petitparser.statics import epsilon
+
+        word = (character.letter() & character.word().star()).flatten().trim()
+        number = character.digit().plus().flatten('number expected').map(int)
+        text = string.of('"') & character.any().star_lazy(string.of('"')).span() & string.of('"')
+        keyword = string.of_ignoring_case('let').token() & character.word().not_()
+        rest = character.of('(').neg().plus_greedy(character.of(';') | EndOfInputParser('end expected'))
+        value = DelegateParser(number | text | rest)
+        statement = (keyword.optional() & word & character.of('=').trim() & value.settable()).pick(1)
+        parser = (statement.separated_by(character.of(';').trim()) & epsilon().and_()
+                  & EndOfInputParser('end expected')).end()
+
+        inp = 'let x = 12; y = "a;b"; z = w+1'
+        created = []
+        original = Context.__init__
+
+        def counting(self, buffer, position):
+            created.append(position)
+            original(self, buffer, position)
+        Context.__init__ = counting
+        try:
+            self.assertTrue(parser.accept(inp))
+            self.assertFalse(parser.accept(inp + '('))
+        finally:
+            Context.__init__ = original
+        self.assertEqual([], created)
+        self.assertTrue(parser.parse(inp).is_success)
+
+    def test_scan_spans(self):
+        word = character.letter().plus()
+        number = character.digit().plus()
+        columns = word.scan_spans('ab 12 c3', [word, number])
+        self.assertEqual([0, 3, 6, 7], list(columns.starts))
+        self.assertEqual([2, 5, 7, 8], list(columns.stops))
+        self.assertEqual([0, 1, 0, 1], list(columns.kinds))
+        self.assertEqual('q', columns.starts.typecode)
+        self.assertEqual(['ab', '12', 'c', '3'], [str(s) for s in columns.spans('ab 12 c3')])
+
+    def test_scan_spans_self(self):
+        columns = character.digit().plus().scan_spans('a1b22')
+        self.assertEqual(2, len(columns))
+        self.assertEqual([(1, 2, 0), (3, 5, 0)], list(columns))
+        self.assertEqual([2, 5], list(columns.stops))
+        self.assertEqual([1, 3], list(columns.starts))
+        self.assertEqual([0, 0], list(columns.kinds))
+
+    @unittest.skipUnless(importlib.util.find_spec('numpy'), 'numpy is not installed')
+    def test_scan_spans_numpy(self):
+        columns = character.digit().plus().scan_spans('a1b22', numpy=True)
+        self.assertEqual([1, 3], columns.starts.tolist())
+        self.assertEqual([2, 5], columns.stops.tolist())
+
     def test_matches(self):
         parser = character.digit().seq(character.digit()).flatten()
         expected = ['12', '23', '45']
@@ -89,6 +183,61 @@ class ParsersTest(Assertions):
         self.assert_success(parser, 'a', 'a')
         self.assert_failure(parser, 'aa', 1)
 
+    def test_end_message(self):
+        parser = character.of('a').end('done')
+        self.assertEqual('done', parser.parse('ab').message)
+        self.assertEqual(1, len(parser.get_children()))
+
+    def test_deep_copy(self):
+        parser = SettableParser.undefined()
+        shared = character.of('a')
+        parser.set((shared & parser) | shared.end())
+        copy = parser.deep_copy()
+        self.assertIsNot(parser, copy)
+        self.assertTrue(copy.is_equal_to(parser))
+        sequence, end = copy.get_children()[0].get_children()
+        self.assertIs(copy, sequence.get_children()[1])
+        self.assertIs(sequence.get_children()[0], end.get_children()[0])
+        self.assert_success(copy, 'aaa', ['a', ['a', 'a']])
+
+    def test_cut(self):
+        parser = (of('a') & cut() & of('b')) | (of('a') & of('c')) | of('x')
+        self.assert_success(parser, 'ab', ['a', None, 'b'])
+        self.assert_success(parser, 'x', 'x')
+        self.assert_failure(parser, 'ac', 1, "'b' expected")
+        self.assertNotIsInstance(parser.parse('ac'), CommittedFailure)
+        self.assert_failure(parser, 'y', 0)
+
+    def test_cut_propagates(self):
+        pair = of('(') & cut() & of(')')
+        for parser in [pair.star(), pair.optional(), pair.plus_greedy(of(';')),
+                       pair.star_lazy(of(';')), pair.flatten('pair expected').trim().map(len)]:
+            self.assertIsInstance(parser.parse('(x'), CommittedFailure)
+            self.assertEqual(-2, parser.fast_parse_on('(x', 0))
+            self.assertFalse(parser.accept('(x'))
+            self.assertFalse((parser | of('(')).accept('(x'))
+        self.assertEqual([['(', None, ')']], pair.star().parse('()x').value)
+
+    def test_cut_through_fallback(self):
+        pair = of('(') & cut() & of(')')
+        parser = (pair.map_with_side_effects(lambda value: value) | of('(')).seq(of('x'))
+        self.assertTrue(parser.parse('(x').is_failure)
+        self.assertFalse(parser.accept('(x'))
+        self.assertEqual(-2, pair.map_with_side_effects(len).fast_parse_on('(x', 0))
+
+    def test_cut_not_through_optional(self):
+        for wrapped in [cut().optional(), cut().repeat(0, 2), cut().not_(), cut().and_()]:
+            parser = (of('a') & wrapped & of('b')) | of('a').seq(of('c'))
+            self.assertEqual(['a', 'c'], parser.parse('ac').value)
+            self.assertTrue(parser.accept('ac'))
+
+    def test_cut_under_budget(self):
+        parser = (of('a') & cut().map(str) & of('b')) | of('a')
+        result = parser.parse('ac', max_steps=100)
+        self.assertTrue(result.is_failure)
+        self.assertEqual("'b' expected", result.message)
+        self.assertEqual('a', of('a').or_(parser).parse('ac', max_steps=100).value)
+
     def test_settable(self):
         parser = character.of('a').settable()
         self.assert_success(parser, 'a', 'a')
@@ -107,6 +256,44 @@ class ParsersTest(Assertions):
         self.assert_success(parser, '123', '123')
         self.assert_success(parser, '1234', '1234')
 
+    def test_span(self):
+        parser = character.digit().plus().span()
+        self.assert_success(parser, '123', '123')
+        self.assert_failure(parser, 'a', 0, 'digit expected')
+        span = parser.parse('12a').value
+        self.assertIsInstance(span, Span)
+        self.assertEqual((0, 2), (span.start, span.stop))
+        self.assertEqual('12', str(span))
+
+    def test_flatten_lazy(self):
+        parser = character.digit().repeat(2, -1).flatten('gimme a number', lazy=True)
+        self.assert_failure(parser, '1a', 0, 'gimme a number')
+        self.assert_success(parser, '123', '123')
+        self.assertIsInstance(parser.parse('12').value, Span)
+
+    def test_span_value(self):
+        buffer = 'foo bar foo'
+        first, second, third = Span(buffer, 0, 3), Span(buffer, 4, 7), Span(buffer, 8, 11)
+        self.assertEqual(first, third)
+        self.assertNotEqual(first, second)
+        self.assertEqual('foo', first)
+        self.assertNotEqual('fo', first)
+        self.assertEqual(hash('foo'), hash(third))
+        self.assertEqual({'foo': 1}[third], 1)
+        self.assertLess(second, first)
+        self.assertGreater(first, 'bar')
+        self.assertEqual(3, len(first))
+
+    def test_string_literal(self):
+        literal = 'foo'
+        parser = string.of(literal)
+        self.assert_success(parser, 'foo', 'foo')
+        self.assert_failure(parser, 'fob', 0, "'foo' expected")
+        self.assertIs(literal, parser.parse('foobar').value)
+        parser = string.of_ignoring_case('foo')
+        self.assert_success(parser, 'FoO', 'FoO')
+        self.assert_failure(parser, 'fob', 0, "'foo' expected")
+
     def test_map(self):
         parser = character.digit().map(int)
         self.assert_success(parser, '1', 1)
@@ -396,6 +583,25 @@ class ParsersTest(Assertions):
         self.assert_success(parser, "ab123", asList('a', 'b'), 2)
         self.assert_success(parser, "abc123", asList('a', 'b', 'c'), 3)
 
+    def testLimitFilter(self):
+        from petitparser.tools.profiler import Profiler
+
+        text = '/*' + 'x * y ' * 10 + '*/'
+        for repeat in ['star_lazy', 'star_greedy']:
+            limit = string.of('*/')
+            body = getattr(character.any(), repeat)(limit)
+            profiler = Profiler(string.of('/*') & body.flatten() & string.of('*/'))
+            self.assertEqual(['/*', text[2:-2], '*/'], profiler.parser.parse(text).value)
+            self.assertEqual(len(text), profiler.parser.fast_parse_on(text, 0))
+            # The limit is only tried where a '*' is.
+            self.assertEqual(22 if repeat == 'star_lazy' else 2, profiler.invocations()[limit])
+            self.assert_failure(body, 'x *', 3 if repeat == 'star_lazy' else 0, "'*/' expected")
+        self.assertEqual(2, character.any().star_greedy(character.digit() & of('.')).fast_parse_on('ab1.', 0))
+        self.assert_success(of('a').star_lazy(string.of('')), 'a', [], 0)
+        self.assert_success(character.any().star_lazy(of('→')), 'ab→', ['a', 'b'], 2)
+        self.assert_success(character.any().star_greedy(of('→')), 'ab→c', ['a', 'b'], 2)
+        self.assert_success(character.any().star_greedy(string.of('→→')), 'a→→→b', ['a', '→'], 2)
+
     def testToken(self):
         parser = of('a').star().token().trim()
         token = parser.parse(" aa ").value
@@ -443,6 +649,20 @@ class ParsersTest(Assertions):
         self.assert_success(parser, "ababab", asList(
             'a', 'b', 'a', 'b', 'a'), 5)
 
+    def testSeparatedByWithoutSeparators(self):
+        parser = of('a').separated_by(of('b'), keep_separators=False)
+        self.assert_success(parser, "a", asList('a'))
+        self.assert_success(parser, "abab", asList('a', 'a'), 3)
+        parser = of('a').separated_by(of('b'), keep_separators=False, trailing=True)
+        self.assert_success(parser, "abab", asList('a', 'a'))
+        self.assert_failure(parser, "b", "'a' expected")
+
+    def testSeparatedByCut(self):
+        parser = (of('a') & cut() & of('x')).separated_by(of(',')) | of('a').plus()
+        self.assert_success(parser, "ax,ax", [['a', None, 'x'], ',', ['a', None, 'x']])
+        self.assert_failure(parser, "ax,a", 4, "'x' expected")
+        self.assert_failure(parser, "aa", 1, "'x' expected")
+
     def testDelimitedBy(self):
         parser = of('a').delimited_by(of('b'))
         self.assert_failure(parser, "")
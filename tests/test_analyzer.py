@@ -0,0 +1,112 @@
+import time
+import unittest
+
+from petitparser import SettableParser, analyze, character, epsilon, string
+from petitparser.tools.analyzer import Analyzer, first_char_table, is_disjoint
+
+
+class AnalyzerTest(unittest.TestCase):
+    def test_nullable(self):
+        a = character.of('a')
+        parser = a.optional() & character.of('b').star()
+        analyzer = Analyzer(parser)
+        self.assertTrue(analyzer.is_nullable(parser))
+        self.assertFalse(analyzer.is_nullable(a))
+        sequence = a & parser
+        self.assertFalse(Analyzer(sequence).is_nullable(sequence))
+
+    def test_nullable_recursive(self):
+        parser = SettableParser.undefined()
+        parser.set((character.of('a') & parser) | epsilon())
+        self.assertTrue(Analyzer(parser).is_nullable(parser))
+
+    def test_first_set(self):
+        parser = character.of('a').optional() & string.of('bc') | character.any_of('xy')
+        analyzer = Analyzer(parser)
+        self.assertEqual(frozenset('abxy'), analyzer.first_set(parser))
+
+    def test_first_set_recursive(self):
+        parser = SettableParser.undefined()
+        parser.set((character.of('(') & parser & character.of(')')) | character.digit())
+        first = Analyzer(parser).first_set(parser)
+        self.assertIn('(', first)
+        self.assertIn(str.isdigit, first)
+
+    def test_disjoint(self):
+        self.assertTrue(is_disjoint(frozenset('ab'), frozenset('cd')))
+        self.assertFalse(is_disjoint(frozenset('ab'), frozenset('bc')))
+        self.assertTrue(is_disjoint(frozenset('ab'), frozenset([str.isdigit])))
+        self.assertFalse(is_disjoint(frozenset('a1'), frozenset([str.isdigit])))
+        self.assertTrue(is_disjoint(frozenset([str.isalpha]), frozenset([str.isdigit])))
+
+    def test_first_char_table(self):
+        arrow, letter, blank = character.of('→'), character.letter(), epsilon()
+        parsers = [arrow, string.of('ab'), letter, blank]
+        table = first_char_table(Analyzer(character.any().or_(*parsers)), parsers)
+        self.assertEqual((parsers[1], letter, blank), table.by_char['a'])
+        self.assertEqual((blank,), table.by_char['1'])
+        self.assertEqual((arrow, letter, blank), table.other)
+        self.assertEqual((blank,), table.at_end)
+
+
+class LinterTest(unittest.TestCase):
+    def assert_warnings(self, parser, *kinds):
+        self.assertEqual(list(kinds), [w.kind for w in analyze(parser)])
+
+    def test_clean(self):
+        self.assert_warnings(
+            (character.letter() & character.word().star()).flatten().trim()
+            | character.digit().plus_greedy(character.of(';')))
+
+    def test_nullable_repetition(self):
+        self.assert_warnings(epsilon().star(), 'nullable-repetition')
+        self.assert_warnings(character.of('a').optional().plus(), 'nullable-repetition')
+        self.assert_warnings(epsilon().repeat(0, 5))
+        self.assert_warnings(character.of('a').trim(epsilon()), 'nullable-repetition')
+        self.assert_warnings(epsilon().separated_by(character.of(',').optional()), 'nullable-repetition')
+        self.assert_warnings(epsilon().separated_by(character.of(',')))
+
+    def test_unreachable_alternative(self):
+        self.assert_warnings(
+            character.of('a').optional() | character.of('b'), 'unreachable-alternative')
+        self.assert_warnings(
+            string.of('a') | string.of('ab'), 'unreachable-alternative')
+        self.assert_warnings(
+            (character.of('a') & character.of('b')) | (character.of('a') & character.of('b')),
+            'unreachable-alternative')
+        self.assert_warnings(
+            (character.of('a') & character.of('b')) | (character.of('a') & character.of('c')))
+
+    def test_nested_repetition(self):
+        inner = character.word().plus_lazy(character.of(';'))
+        self.assert_warnings(inner.plus_lazy(character.of(';')), 'nested-repetition')
+        self.assert_warnings(inner.plus_lazy(character.of('.')))
+
+    def test_path(self):
+        loop = epsilon().star()
+        parser = character.of('a') & (character.of('b') | loop)
+        [warning] = analyze(parser)
+        self.assertIs(loop, warning.parser)
+        self.assertEqual((parser, parser.get_children()[1], loop), warning.path)
+
+    def test_large_grammar(self):
+        expression = SettableParser.undefined()
+        keywords = [
+            (string.of(f'keyword{i}').trim() & expression.optional() & character.of(';')).map(len)
+            for i in range(2000)]
+        expression.set(keywords[0].or_(*keywords[1:]))
+        start = time.perf_counter()
+        self.assertEqual([], analyze(expression))
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_many_repetitions(self):
+        expression = SettableParser.undefined()
+        word = character.word().plus_lazy(character.of(';'))
+        items = [string.of(f'k{i}') & (expression | word | character.any()).star_lazy(character.of(';'))
+                 for i in range(1500)]
+        expression.set(items[0].or_(*items[1:]))
+        start = time.perf_counter()
+        warnings = analyze(expression)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(1500, len(warnings))
+        self.assertEqual(1500, len({w.parser for w in warnings}))
@@ -0,0 +1,71 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from petitparser import character
+from petitparser.context import ExceptionFailure
+
+number = character.digit().plus().flatten().map(int).end()
+inputs = ['1', '22', 'x', '333', '4a'] * 7
+expected = [1, 22, None, 333, None] * 7
+
+
+def values(results):
+    return [result.value if result.is_success else None for result in results]
+
+
+class ParseManyTest(unittest.TestCase):
+    def test_inline(self):
+        results = number.parse_many(inputs, chunksize=3)
+        self.assertEqual(expected, values(results))
+
+    def test_streaming(self):
+        results = number.parse_many(iter(inputs))
+        self.assertEqual(1, next(results).value)
+
+    def test_exceptions(self):
+        parser = character.digit().map(lambda d: 1 // int(d))
+        results = list(parser.parse_many(['1', '0', 'x']))
+        self.assertEqual(1, results[0].value)
+        self.assertIsInstance(results[1], ExceptionFailure)
+        self.assertIsInstance(results[1].exception, ZeroDivisionError)
+        self.assertTrue(results[1].is_failure)
+        self.assertFalse(isinstance(results[2], ExceptionFailure))
+
+    def test_threads(self):
+        self.assertEqual(expected, values(number.parse_many(inputs, 'thread', chunksize=2, workers=3)))
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(expected, values(number.parse_many(inputs, executor, chunksize=4)))
+
+    def test_processes(self):
+        self.assertEqual(expected, values(number.parse_many(inputs, 'process', chunksize=5, workers=2)))
+        with ProcessPoolExecutor(2) as executor:
+            self.assertEqual(expected, values(number.parse_many(inputs, executor, chunksize=4)))
+
+    def test_lazy_pool(self):
+        from petitparser.parser import batch
+        created = []
+        original = batch.ThreadPoolExecutor
+        batch.ThreadPoolExecutor = lambda *args: created.append(args) or original(*args)
+        try:
+            results = number.parse_many(inputs, 'thread', chunksize=2)
+            self.assertEqual([], created)
+            self.assertEqual(1, next(results).value)
+            results.close()
+            self.assertEqual(1, len(created))
+        finally:
+            batch.ThreadPoolExecutor = original
+
+    def test_worker_grammars(self):
+        import pickle
+        from petitparser.parser import batch
+        payload = pickle.dumps(number)
+        digests = [bytes([index]) for index in range(batch.WORKER_GRAMMARS + 2)]
+        for digest in digests:
+            self.assertEqual([22], values(batch._parse_chunk_with_payload(digest, payload, ['22'])))
+        self.assertEqual(batch.WORKER_GRAMMARS, len(batch._worker_parsers))
+        self.assertIsNone(batch._parse_chunk_by_digest(digests[0], ['1']))
+        self.assertEqual([1], values(batch._parse_chunk_by_digest(digests[-1], ['1'])))
+        batch._worker_parsers.clear()
+
+    def test_unknown_executor(self):
+        self.assertRaises(ValueError, number.parse_many, inputs, 'fiber')
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from petitparser import GrammarDefinition, character, ref
+from petitparser.tools.cache import GrammarCache, fingerprint
+
+
+def _list_grammar():
+    class ListGrammar(GrammarDefinition):
+        start = ref('list').end()
+        list = (ref('element') & character.of(',') & ref('list')).pick(2) | ref('element')
+        element = character.digit().plus().flatten().trim()
+    return ListGrammar
+
+
+class GrammarCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = GrammarCache(self.directory.name)
+        self.builds = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build(self, definition, name):
+        self.builds += 1
+        return definition.build(name)
+
+    def test_warm_start(self):
+        definition = _list_grammar()
+        cold = self.cache.load(definition, build=self.build)
+        warm = self.cache.load(definition, build=self.build)
+        self.assertEqual(1, self.builds)
+        self.assertIsNot(cold.parser, warm.parser)
+        self.assertEqual('3', warm.parser.parse('1, 2 ,3').value)
+        self.assertTrue(warm.analyzer.first_set(warm.parser))
+        self.assertFalse(warm.analyzer.is_nullable(warm.parser))
+
+    def test_fingerprint(self):
+        first, second = _list_grammar(), _list_grammar()
+        self.assertEqual(fingerprint(first), fingerprint(second))
+        key = fingerprint(first)
+        first.build()
+        self.assertEqual(key, fingerprint(first))
+
+        class OtherGrammar(GrammarDefinition):
+            start = ref('list').end()
+            list = (ref('element') & character.of(';') & ref('list')).pick(2) | ref('element')
+            element = character.digit().plus().flatten().trim()
+        self.assertNotEqual(key, fingerprint(OtherGrammar))
+
+    def test_fingerprint_recursive_closure(self):
+        def flatten(value):
+            return [w for v in value for w in flatten(v)] if isinstance(value, list) else [value]
+
+        class NestedGrammar(GrammarDefinition):
+            start = (character.digit() & character.digit().star()).map(flatten)
+        self.assertEqual(fingerprint(NestedGrammar), fingerprint(NestedGrammar))
+        self.assertEqual(['1', '2', '3'], self.cache.load(NestedGrammar).parser.parse('123').value)
+
+    def test_fingerprint_empty_cell(self):
+        class LateGrammar(GrammarDefinition):
+            start = character.digit().map(lambda digit: convert(digit))
+        key = fingerprint(LateGrammar)
+        convert = int
+        self.assertNotEqual(key, fingerprint(LateGrammar))
+        self.assertEqual(7, LateGrammar.build().parse('7').value)
+
+    def test_stale(self):
+        definition = _list_grammar()
+        self.cache.load(definition, build=self.build)
+        path = self.cache.path_of(definition)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data.replace(fingerprint(definition, build=self.build).encode(), b'0' * 64))
+        self.cache.load(definition, build=self.build)
+        self.assertEqual(2, self.builds)
+        self.cache.load(definition, build=self.build)
+        self.assertEqual(2, self.builds)
+
+    def test_corrupt(self):
+        definition = _list_grammar()
+        self.cache.load(definition, build=self.build)
+        path = self.cache.path_of(definition)
+        with open(path, 'r+b') as f:
+            f.seek(-10, os.SEEK_END)
+            f.write(b'garbage')
+        entry = self.cache.load(definition, build=self.build)
+        self.assertEqual(2, self.builds)
+        self.assertEqual('1', entry.parser.parse('1').value)
+
+    def test_unpicklable(self):
+        class LambdaGrammar(GrammarDefinition):
+            start = character.digit().map(lambda x: int(x))
+        with self.assertWarns(UserWarning):
+            entry = self.cache.load(LambdaGrammar)
+        self.assertEqual(1, entry.parser.parse('1').value)
+        self.assertFalse(os.path.exists(self.cache.path_of(LambdaGrammar)))
@@ -0,0 +1,110 @@
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from petitparser import character, cut
+from petitparser.context import Context, memo_tables
+from petitparser.parser.caching import CacheInfo
+
+
+class CachedTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.parser = character.digit().plus().flatten().map(self.calls.append).end()
+
+    def test_hits(self):
+        parser = self.parser.cached()
+        first = parser.parse('12')
+        self.assertIs(first, parser.parse('12'))
+        parser.parse('34')
+        self.assertEqual(['12', '34'], self.calls)
+        self.assertEqual(CacheInfo(1, 2, 128, 2), parser.cache_info())
+        self.assertTrue(parser.accept('12'))
+        self.assertEqual(2, parser.cache_info().hits)
+
+    def test_lru(self):
+        parser = self.parser.cached(maxsize=2)
+        for inp in ['1', '2', '1', '3', '1', '2']:
+            parser.parse(inp)
+        self.assertEqual(['1', '2', '3', '2'], self.calls)
+        self.assertEqual(CacheInfo(2, 4, 2, 2), parser.cache_info())
+        parser.cache_clear()
+        self.assertEqual(CacheInfo(0, 0, 2, 0), parser.cache_info())
+
+    def test_key(self):
+        parser = character.letter().plus().flatten().cached(key=str.lower)
+        self.assertEqual('abc', parser.parse('abc').value)
+        self.assertEqual('abc', parser.parse('ABC').value)
+
+    def test_successes_only(self):
+        parser = self.parser.cached(successes_only=True)
+        parser.parse('x')
+        parser.parse('x')
+        self.assertEqual(CacheInfo(0, 2, 128, 0), parser.cache_info())
+        self.assertFalse(parser.accept('x'))
+
+    def test_only_at_start(self):
+        parser = self.parser.cached()
+        self.assertEqual(3, parser.fast_parse_on('x12', 1))
+        self.assertEqual(CacheInfo(0, 0, 128, 0), parser.cache_info())
+
+    def test_threads(self):
+        parser = character.digit().plus().flatten().map(int).end().cached(maxsize=10)
+        inputs = [str(i % 20) for i in range(2000)]
+        with ThreadPoolExecutor(8) as executor:
+            values = list(executor.map(lambda inp: parser.parse(inp).value, inputs))
+        self.assertEqual([int(i) for i in inputs], values)
+        info = parser.cache_info()
+        self.assertEqual(2000, info.hits + info.misses)
+        self.assertEqual(10, info.currsize)
+
+
+class MemoizeTest(unittest.TestCase):
+    def test_results_by_position(self):
+        calls = []
+        digits = character.digit().plus().flatten().map(calls.append).memoize()
+        parser = (digits & character.of('+')) | (digits & character.of('-')) | digits
+        self.assertEqual(None, parser.parse('12').value)
+        self.assertEqual(['12'], calls)
+        self.assertEqual([None, '-'], parser.parse('12-').value)
+        self.assertEqual(['12', '12'], calls)
+        self.assertEqual(2, parser.fast_parse_on('12', 0))
+        self.assertEqual(['12', '12'], calls)
+
+    def test_new_input(self):
+        parser = character.digit().plus().flatten().memoize()
+        self.assertEqual('12', parser.parse('12').value)
+        self.assertEqual('345', parser.parse('345').value)
+        self.assertEqual(-1, parser.fast_parse_on('x', 0))
+        parser.clear()
+        self.assertEqual(2, parser.fast_parse_on('x1', 1))
+        self.assertEqual('1', parser.copy().parse_on(Context('x1', 1)).value)
+
+    def test_released_after_parse(self):
+        parser = character.digit().plus().flatten().memoize().star()
+        self.assertEqual(['12'], parser.parse('12').value)
+        self.assertIsNone(memo_tables.buffer)
+        self.assertTrue(parser.accept('34'))
+        self.assertEqual({}, memo_tables.positions)
+
+    def test_frozen_threads(self):
+        number = character.digit().plus().flatten().memoize()
+        parser = ((number & character.of('+')) | (number & character.of('-')) | number).star().end()
+        frozen = parser.freeze()
+        inputs = [(str(i % 4) * 3 + '+') * 50 + str(i % 4) * 3 for i in range(400)]
+        expected = [parser.parse(inp).value for inp in inputs]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(4) as executor:
+                values = list(executor.map(lambda inp: frozen.parse(inp).value, inputs))
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(expected, values)
+
+    def test_committed_failures(self):
+        item = (character.of('a') & cut() & character.of('b')).memoize()
+        parser = item | character.of('a')
+        self.assertTrue(parser.parse('ac').is_failure)
+        self.assertEqual(-2, item.fast_parse_on('ac', 0))
+        self.assertEqual(-1, parser.fast_parse_on('ac', 0))
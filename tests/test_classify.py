@@ -0,0 +1,62 @@
+import importlib.util
+import unittest
+
+from petitparser import character
+from petitparser.utils import Mirror
+
+numpy_available = importlib.util.find_spec('numpy') is not None
+if numpy_available:
+    from petitparser.tools.classify import CharacterRunParser, accelerate, parse_accelerated
+
+
+@unittest.skipUnless(numpy_available, 'numpy is not installed')
+class ClassifyTest(unittest.TestCase):
+    def setUp(self):
+        word = character.letter().plus().flatten()
+        number = character.digit().repeat(2, 3).flatten()
+        space = character.whitespace().star()
+        self.parser = ((word | number) & space).star().end()
+
+    def test_accelerated_same_results(self):
+        text = 'abc 123  de 45 f 678'
+        expected = self.parser.parse(text)
+        accelerated = accelerate(self.parser, text)
+        self.assertEqual(expected.value, accelerated.parse(text).value)
+        self.assertTrue(accelerated.accept(text))
+
+    def test_accelerated_failure(self):
+        text = 'abc 1 x'
+        expected = self.parser.parse(text)
+        actual = accelerate(self.parser, text).parse(text)
+        self.assertTrue(actual.is_failure)
+        self.assertEqual(expected.position, actual.position)
+        self.assertFalse(accelerate(self.parser, text).accept(text))
+
+    def test_repeat_limits(self):
+        parser = character.digit().repeat(2, 3)
+        text = '1234'
+        accelerated = accelerate(parser, text)
+        self.assertIsInstance(accelerated, CharacterRunParser)
+        self.assertEqual(['1', '2', '3'], accelerated.parse(text).value)
+        self.assertEqual(3, accelerated.fast_parse_on(text, 0))
+        self.assertEqual(-1, accelerated.fast_parse_on(text, 3))
+        self.assertEqual(4, accelerated.fast_parse_on(text, 2))
+
+    def test_other_buffers(self):
+        text = 'abc 123'
+        accelerated = accelerate(self.parser, text)
+        self.assertEqual(
+            self.parser.parse('xy 12').value, accelerated.parse('xy 12').value)
+
+    def test_bytes(self):
+        result = parse_accelerated(self.parser, b'abc 123')
+        self.assertEqual([['abc', [' ']], ['123', []]], result.value)
+
+    def test_frozen(self):
+        text = 'abc 123  de 45 f 678'
+        accelerated = accelerate(self.parser.freeze(), text)
+        self.assertTrue(any(isinstance(p, CharacterRunParser) for p in Mirror(accelerated)))
+        self.assertEqual(self.parser.parse(text).value, accelerated.parse(text).value)
+
+    def test_non_latin(self):
+        self.assertRaises(ValueError, lambda: accelerate(self.parser, 'abš'))
@@ -1,10 +1,13 @@
 import builtins
+import random
 import unittest
 from petitparser import ExpressionBuilder, string
 from petitparser.character import *
 
 
 class ExpressionBuilderTest(unittest.TestCase):
+    engine = 'peg'
+
     def setUp(self) -> None:
         builder = ExpressionBuilder()
         builder.group()\
@@ -23,7 +26,7 @@ class ExpressionBuilderTest(unittest.TestCase):
         builder.group()\
             .left(of('+').trim())\
             .left(of('-').trim())
-        self.parser = builder.build().end()
+        self.parser = builder.build(self.engine).end()
 
         builder = ExpressionBuilder()
 
@@ -44,11 +47,12 @@ class ExpressionBuilderTest(unittest.TestCase):
             .left(of('+').trim(), lambda x, _, y: x + y)\
             .left(of('-').trim(), lambda x, _, y: x - y)
 
-        self.evaluator = builder.build().end()
+        self.evaluator = builder.build(self.engine).end()
 
     def assertParse(self, inp, expected):
         actual = self.parser.parse(inp).value
         self.assertEqual(expected, actual)
+        self.assertTrue(self.parser.accept(inp))
 
     def assertEvaluate(self, inp, expected):
         actual = self.evaluator.parse(inp).value
@@ -220,5 +224,57 @@ class ExpressionBuilderTest(unittest.TestCase):
         self.assertEvaluate("--1", 1)
         self.assertEvaluate("---1", -1)
 
+    def testFailure(self):
+        for inp in ['', '1 +', '(1', '1 2', '-', '1 ^ ^ 2']:
+            self.assertTrue(self.parser.parse(inp).is_failure, inp)
+            self.assertFalse(self.parser.accept(inp), inp)
+
+
+class PrattExpressionBuilderTest(ExpressionBuilderTest):
+    engine = 'pratt'
+
+    def testSingleNode(self):
+        from petitparser.tools.expression_builder import ExpressionParser
+        self.assertIsInstance(self.parser.get_children()[0], ExpressionParser)
+
+    def testCopy(self):
+        copy = self.evaluator.deep_copy()
+        self.assertTrue(copy.is_equal_to(self.evaluator))
+        self.assertAlmostEqual(14, copy.parse('2 * (3 + 4)').value)
+        self.assertAlmostEqual(14, self.evaluator.parse('2 * (3 + 4)', max_steps=1000).value)
+
+    def testUnknownEngine(self):
+        self.assertRaises(ValueError, ExpressionBuilder().build, 'yacc')
+
+
+class EngineComparisonTest(unittest.TestCase):
+    def assertSameResults(self, peg, pratt, inputs):
+        for inp in inputs:
+            expected, actual = peg.parse(inp), pratt.parse(inp)
+            self.assertEqual(expected.is_success, actual.is_success, inp)
+            self.assertEqual(expected.position, actual.position, inp)
+            if expected.is_success:
+                self.assertEqual(expected.value, actual.value, inp)
+            self.assertEqual(peg.accept(inp), pratt.accept(inp), inp)
+
+    def testRandomInputs(self):
+        peg, pratt = ExpressionBuilderTest(), PrattExpressionBuilderTest()
+        peg.setUp()
+        pratt.setUp()
+        rnd = random.Random(7)
+        inputs = [''.join(rnd.choice(' 12.()-+*/^') for _ in builtins.range(rnd.randrange(9)))
+                  for _ in builtins.range(3000)]
+        self.assertSameResults(peg.parser, pratt.parser, inputs)
+
+    def testNonLatin1Operator(self):
+        def build(engine):
+            builder = ExpressionBuilder()
+            builder.group().primitive(digit().plus().flatten())
+            builder.group().left(of('→'))
+            return builder.build(engine).end()
+        inputs = ['1→2', '1→2→3', '→', '1→', '1 →2', '1→→2']
+        self.assertSameResults(build('peg'), build('pratt'), inputs)
+        self.assertEqual([['1', '→', '2'], '→', '3'], build('pratt').parse('1→2→3').value)
+
 
 def asList(*x): return list(x)
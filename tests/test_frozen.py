@@ -0,0 +1,76 @@
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from petitparser import ExpressionBuilder, Mirror, character, cut, fail, string
+from petitparser.parser.combinators import DelegateParser, SettableParser
+from petitparser.tools.analyzer import INFINITE
+
+
+def add(a, _, b):
+    return a + b
+
+
+def number_grammar():
+    number = character.digit().plus().flatten().map(int).trim()
+    builder = ExpressionBuilder()
+    builder.group().primitive(number)
+    builder.group().left(character.of('+').trim(), add)
+    return builder.build(engine='pratt').end()
+
+
+class FreezeTest(unittest.TestCase):
+    def test_parses(self):
+        parser = (string.of('if') & cut() & character.letter()) | character.letter().plus().flatten()
+        frozen = parser.freeze()
+        self.assertEqual(['if', None, 'x'], frozen.parse('ifx').value)
+        self.assertTrue(frozen.parse('if1').is_failure)
+        self.assertEqual('abc', frozen.parse('abc').value)
+        self.assertIs(frozen, frozen.freeze())
+
+    def test_immutable(self):
+        settable = SettableParser.undefined()
+        parser = settable & character.digit()
+        frozen = parser.freeze()
+        self.assertRaises(TypeError, frozen.replace, frozen.nodes[0], parser)
+        self.assertRaises(TypeError, frozen.nodes[0].replace, parser, parser)
+        frozen_settable = next(n for n in frozen.nodes if isinstance(n, SettableParser))
+        self.assertRaises(TypeError, frozen_settable.set, character.letter())
+        settable.set(character.letter())
+        self.assertTrue(parser.accept('a1'))
+        self.assertFalse(frozen.accept('a1'))
+
+    def test_nodes(self):
+        digit = character.digit()
+        parser = (digit & digit.optional()) | string.of('abc')
+        frozen = parser.freeze()
+        self.assertEqual(len(list(Mirror(parser))), len(frozen.nodes))
+        self.assertEqual(list(range(len(frozen.nodes))), [frozen.node_id(n) for n in frozen.nodes])
+        root = frozen.node_id(frozen._delegate)
+        self.assertEqual(1, frozen.min_length(root))
+        self.assertFalse(frozen.is_nullable(root))
+        self.assertEqual(frozenset('a') | frozen.first_set(frozen.children_of(root)[0]), frozen.first_set(root))
+        self.assertIsInstance(frozen.nodes[root].get_children(), tuple)
+        never = (character.digit() & fail()).freeze()
+        self.assertEqual(INFINITE, never.min_length(never._delegate))
+
+    def test_copies_are_mutable(self):
+        frozen = character.digit().plus().freeze()
+        thawed = Mirror(frozen).transform(lambda p: p)
+        self.assertIsInstance(thawed, DelegateParser)
+        thawed.replace(thawed._delegate, character.letter())
+        self.assertTrue(thawed.accept('a'))
+
+    def test_pickle(self):
+        frozen = number_grammar().freeze()
+        copy = pickle.loads(pickle.dumps(frozen))
+        self.assertEqual(6, copy.parse('1 + 2+3').value)
+        self.assertEqual(list(range(len(copy.nodes))), [copy.node_id(n) for n in copy.nodes])
+        self.assertRaises(TypeError, copy.nodes[0].replace, copy, copy)
+
+    def test_threads(self):
+        frozen = number_grammar().freeze()
+        inputs = ['+'.join(str(j) for j in range(i % 50 + 1)) for i in range(500)]
+        with ThreadPoolExecutor(8) as executor:
+            values = list(executor.map(lambda s: frozen.parse(s).value, inputs))
+        self.assertEqual([sum(range(i % 50 + 1)) for i in range(500)], values)
@@ -0,0 +1,90 @@
+import unittest
+
+from petitparser import SettableParser, character, string
+from petitparser.tools.fuzzer import EXPONENTIAL, LINEAR, POLYNOMIAL, Fuzzer, classify, find_worst_case
+
+
+def backtracking_expression():
+    term, expression = SettableParser.undefined(), SettableParser.undefined()
+    term.set(character.of('(') & expression & character.of(')') | character.digit().plus().flatten())
+    expression.set(term & character.of('+') & expression | term & character.of('-') & expression | term)
+    return expression.end()
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_curves(self):
+        self.assertEqual(LINEAR, classify([(8, 40), (16, 80), (32, 161)])[0])
+        growth, degree = classify([(8, 64), (16, 256), (32, 1024)])
+        self.assertEqual(POLYNOMIAL, growth)
+        self.assertAlmostEqual(2.0, degree)
+        self.assertEqual(EXPONENTIAL, classify([(4, 16), (8, 256), (16, 65536)])[0])
+        self.assertEqual((LINEAR, 1.0), classify([(4, 3000), (8, 100000)], max_steps=100000))
+        self.assertEqual(EXPONENTIAL, classify([(2, 4), (4, 16), (8, 256), (16, 65536), (32, 100000)],
+                                               max_steps=100000)[0])
+        self.assertEqual((LINEAR, 1.0), classify([(8, 10)]))
+
+
+class FuzzerTest(unittest.TestCase):
+    def test_vocabulary_and_seeds(self):
+        parser = (string.of('let') & character.whitespace() & character.digit().plus()).end()
+        fuzzer = Fuzzer(parser, seed=0)
+        self.assertEqual(['let'], fuzzer.literals)
+        self.assertTrue({'0', '9', 'l', 'e', 't', '~'} <= set(fuzzer.alphabet))
+        self.assertTrue(any(parser.accept(seed) for seed in fuzzer.seeds()))
+
+    def test_cost(self):
+        fuzzer = Fuzzer(character.digit().star(), max_steps=10, seed=0)
+        cost, features = fuzzer.cost('123')
+        self.assertEqual(5, cost)
+        self.assertIn((1, -3), features)
+        self.assertEqual(10, fuzzer.cost('1' * 20)[0])
+
+    def test_cost_of_exceptions(self):
+        fuzzer = Fuzzer(character.digit().map(lambda digit: 1 // int(digit)), seed=0)
+        self.assertEqual(2, fuzzer.cost('0')[0])
+        fuzzer.cost('00')
+        self.assertEqual('0', fuzzer.errors[ZeroDivisionError][0])
+
+    def test_pump(self):
+        fuzzer = Fuzzer(character.digit(), seed=0)
+        for _ in range(20):
+            pumped = fuzzer.pump('(1)', 12)
+            self.assertGreater(len(pumped), 3)
+            self.assertTrue(set(pumped) <= set('(1)'))
+
+
+class WorstCaseTest(unittest.TestCase):
+    def test_linear(self):
+        parser = (character.letter().plus().flatten() | character.digit().plus() | character.whitespace()).star().end()
+        worst = find_worst_case(parser, lengths=(8, 16, 32), iterations=100, seed=1)
+        self.assertEqual(LINEAR, worst.growth)
+        self.assertEqual(3, len(worst.points))
+        for point, length in zip(worst.points, [8, 16, 32]):
+            self.assertEqual(len(point.input), point.length)
+            self.assertLessEqual(point.length, length)
+
+    def test_polynomial(self):
+        a = character.of('a')
+        parser = ((a.star() & character.of('b')) | a).star().end()
+        worst = find_worst_case(parser, lengths=(8, 16, 32), iterations=100, seed=1)
+        self.assertEqual(POLYNOMIAL, worst.growth)
+        self.assertIn('polynomial growth', str(worst))
+
+    def test_exceptions(self):
+        parser = character.digit().plus().flatten().map(lambda digits: 10 // int(digits)).end()
+        worst = find_worst_case(parser, lengths=(4, 8), iterations=100, seed=1)
+        self.assertEqual(LINEAR, worst.growth)
+        (text, error), = worst.errors
+        self.assertIsInstance(error, ZeroDivisionError)
+        self.assertEqual(0, int(text))
+        self.assertIn('ZeroDivisionError', str(worst))
+
+    def test_exponential(self):
+        worst = find_worst_case(backtracking_expression(), lengths=(2, 3, 4, 5, 6, 8), iterations=100,
+                                max_steps=20000, seed=1)
+        self.assertEqual(EXPONENTIAL, worst.growth)
+        self.assertEqual(20000, worst.points[-1].cost)
+        self.assertTrue(worst.points[-1].capped)
+        self.assertFalse(any(point.capped for point in worst.points[:-1]))
+        self.assertIn('at least 20000', str(worst))
+        self.assertIn('((', worst.points[0].input)
@@ -0,0 +1,72 @@
+import itertools
+import unittest
+
+from petitparser import SettableParser, character, cut, string
+from petitparser.tools.generalized import parse_all
+from petitparser.tools.layout import layout, with_layout
+
+
+def ambiguous_sum():
+    expression = SettableParser.undefined()
+    expression.set((expression & character.of('+') & expression).map(lambda v: (v[0], v[2])) | character.digit())
+    return expression.end()
+
+
+class ParseAllTest(unittest.TestCase):
+    def test_ambiguous(self):
+        result = ambiguous_sum().parse_all('1+2+3')
+        self.assertTrue(result.is_success)
+        forest = result.value
+        self.assertEqual((0, 5), (forest.start, forest.stop))
+        self.assertTrue(forest.ambiguous)
+        self.assertEqual([(('1', '2'), '3'), ('1', ('2', '3'))], list(forest))
+
+    def test_catalan(self):
+        forest = ambiguous_sum().parse_all('+'.join('1' * 30)).value
+        self.assertEqual(1002242216651368, forest.count())
+        self.assertLess(forest.symbols, 4 * 30 ** 2)
+        trees = list(itertools.islice(forest, 3))
+        self.assertEqual(3, len(trees))
+        self.assertEqual(3, len(set(map(repr, trees))))
+
+    def test_left_recursion(self):
+        count = SettableParser.undefined()
+        count.set((count & character.of('a')).map(lambda v: v[0] + 1) | character.of('a').map(lambda _: 1))
+        forest = count.end().parse_all('aaaa').value
+        self.assertEqual([4], list(forest))
+        self.assertFalse(forest.ambiguous)
+
+    def test_repetitions(self):
+        runs = character.of('a').plus().flatten().star().end()
+        self.assertEqual([['aaa'], ['a', 'aa'], ['a', 'a', 'a'], ['aa', 'a']], list(runs.parse_all('aaa').value))
+        self.assertEqual(3, character.of('a').repeat(1, 2).star().end().parse_all('aaa').value.count())
+        words = character.letter().plus().flatten().separated_by(character.of(','), keep_separators=False).end()
+        self.assertEqual([['ab', 'c']], list(words.parse_all('ab,c').value))
+        self.assertEqual([['a', 'b']], list((character.of('a') & character.of('b').optional()).parse_all('ab x').value))
+        self.assertEqual([['a', None]], list((character.of('a') & character.of('b').optional()).parse_all('a').value))
+
+    def test_longest(self):
+        parser = character.of('a') | string.of('ab') | (character.of('a') & character.of('b')).flatten()
+        result = parser.parse_all('abc')
+        self.assertEqual(2, result.position)
+        self.assertEqual(['ab', 'ab'], list(result.value))
+
+    def test_layout_and_cuts(self):
+        keyword = (string.of('if') & cut() & character.letter()).flatten()
+        parser = with_layout((keyword | character.letter().plus().flatten()).star().end(), layout())
+        # The cut only commits within its sequence, and the keyword is a word too.
+        self.assertEqual([['ifx', 'y'], ['ifx', 'y']], [trees for trees in parser.parse_all(' ifx  y ').value
+                                                        if len(trees) == 2 and trees[0] == 'ifx'])
+        self.assertEqual(9, parser.parse_all('ifxy').value.count())
+
+    def test_failure(self):
+        result = parse_all(ambiguous_sum(), '1+2+')
+        self.assertTrue(result.is_failure)
+        self.assertEqual((4, 'digit expected'), (result.position, result.message))
+        self.assertTrue(character.digit().parse_all('').is_failure)
+
+    def test_nullable_cycles(self):
+        loop = SettableParser.undefined()
+        loop.set(loop | character.of('a') | loop.seq(string.of('')).pick(0))
+        forest = loop.end().parse_all('a').value
+        self.assertEqual(['a'], list(forest))
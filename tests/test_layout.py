@@ -0,0 +1,77 @@
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from petitparser import GrammarDefinition, analyze, character, ref, string
+from petitparser.context import memo_tables
+from petitparser.tools.analyzer import Analyzer
+from petitparser.tools.layout import Layout, LayoutParser, layout, with_layout
+
+
+class ListGrammar(GrammarDefinition):
+    _layout = layout(['#', ('/*', '*/')])
+
+    start = ref('list').end()
+    list = character.of('[') & ref('element').star() & character.of(']')
+    element = ref('number') | ref('word') | ref('list')
+    number = character.digit().plus().flatten()
+    word = string.of('nil') | (character.letter() & character.word().star()).flatten()
+
+
+class LayoutTest(unittest.TestCase):
+    def test_grammar(self):
+        parser = ListGrammar.build()
+        self.assertEqual(['[', ['1', 'nil', ['[', ['x2'], ']']], ']'],
+                         parser.parse(' [1 nil # note\n [ /* a\nb */ x2]] # end').value)
+        self.assertTrue(parser.accept('[12]'))
+        self.assertFalse(parser.accept('[1 2 3'))
+        self.assertEqual(['1', '2'], parser.parse('[1 2]').value[1])
+
+    def test_tokens(self):
+        parser = ListGrammar.build()
+        self.assertEqual(['12'], parser.parse('[12]').value[1])
+        self.assertEqual(['n', 'il'], parser.parse('[n il]').value[1])
+        self.assertEqual(4, parser.parse('[1  $]').position)
+
+        parser = with_layout(character.letter().plus().token().star(), ' +')
+        self.assertEqual([(1, 3), (5, 6)], [(t.start, t.stop) for t in parser.parse(' ab  c').value])
+
+    def test_drops_whitespace_trim(self):
+        parser = with_layout(character.of('a').trim().plus().end(), r'\s+|;')
+        self.assertEqual(['a', 'a'], parser.parse(' a ;a ;').value)
+        types = {type(p) for p in Analyzer(parser).parsers}
+        self.assertNotIn('TrimmingParser', {t.__name__ for t in types})
+        self.assertIn(LayoutParser, types)
+
+    def test_shares_nodes(self):
+        item = character.digit()
+        parser = with_layout((item & item).end(), r'\s+')
+        self.assertEqual(['1', '2'], parser.parse('1 2').value)
+        self.assertEqual(1, len({p for p in Analyzer(parser).parsers if isinstance(p, LayoutParser)
+                                 and not p._after}))
+
+    def test_skip(self):
+        spaces = Layout(' +')
+        text = 'a   b'
+        self.assertEqual(4, spaces.skip(text, 1))
+        self.assertEqual(4, spaces.skip(text, 4))
+        self.assertEqual(4, spaces.skip(text, 1))
+        self.assertEqual(0, spaces.skip(text, 0))
+        self.assertEqual(5, spaces.skip('a    b', 1))
+
+    def test_skip_per_parse(self):
+        parser = ListGrammar.build()
+        self.assertTrue(parser.accept('[ 1 ]'))
+        self.assertIsNone(memo_tables.buffer)
+        self.assertEqual({}, memo_tables.skips)
+        inputs = [' [' + ' ' * (i % 7) + str(i) + ' ] ' for i in range(500)]
+        with ThreadPoolExecutor(4) as executor:
+            values = list(executor.map(lambda inp: parser.parse(inp).value[1], inputs))
+        self.assertEqual([[str(i)] for i in range(500)], values)
+
+    def test_pickle(self):
+        parser = pickle.loads(pickle.dumps(ListGrammar.build()))
+        self.assertTrue(parser.accept('[ 1 ]'))
+
+    def test_analyze(self):
+        self.assertEqual([], analyze(ListGrammar.build()))
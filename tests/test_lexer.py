@@ -0,0 +1,50 @@
+import unittest
+
+from petitparser import Lexer, analyze, character, string, token_kind, token_text
+from petitparser.context import ParseError
+
+lexer = Lexer([
+    ('IF', string.of('if')),
+    ('IDENT', (character.letter() & character.word().star()).flatten()),
+    ('NUMBER', character.digit().plus()),
+    ('OP', string.of('==') | character.any_of('=+()')),
+], skip=[character.whitespace().plus(), string.of('#') & character.of('\n').neg().star()])
+
+
+class LexerTest(unittest.TestCase):
+    def test_tokenize(self):
+        tokens = lexer.tokenize('if iffy == 12 # note\n+x')
+        self.assertEqual(['IF', 'IDENT', 'OP', 'NUMBER', 'OP', 'IDENT'],
+                         [tokens.kind(i) for i in range(len(tokens))])
+        self.assertEqual(['if', 'iffy', '==', '12', '+', 'x'], [tokens[i].value for i in range(len(tokens))])
+        self.assertEqual('B', tokens.kinds.typecode)
+        self.assertEqual('iffy == 12', tokens[1:4])
+        self.assertEqual(2, tokens[5].line)
+
+    def test_error(self):
+        with self.assertRaises(ParseError) as cm:
+            lexer.tokenize('a $ b')
+        self.assertEqual(2, cm.exception.failure.position)
+
+    def test_non_latin1(self):
+        arrows = Lexer([('ARROW', character.of('→')), ('ID', character.letter())])
+        tokens = arrows.tokenize('a→b')
+        self.assertEqual(['ID', 'ARROW', 'ID'], [tokens.kind(i) for i in range(len(tokens))])
+
+    def test_parse_tokens(self):
+        expression = token_kind('IDENT') | token_kind('NUMBER')
+        statement = (token_text('if') & token_text('(') & expression & token_text('==') & expression
+                     & token_text(')')).flatten()
+        parser = (statement | expression.map(lambda t: t.value)).star().end()
+
+        result = lexer.parse(parser, 'if (a == 1) b\nif (c == d)')
+        self.assertEqual(['if (a == 1)', 'b', 'if (c == d)'], result.value)
+        self.assertTrue(parser.accept(lexer.tokenize('a b 1')))
+
+        result = lexer.parse(parser, 'a\nif (b ==')
+        self.assertTrue(result.is_failure)
+        self.assertEqual(1, result.position)
+        self.assertIn('[2:1]', str(result))
+
+    def test_analyze(self):
+        self.assertEqual([], analyze(token_kind('IDENT').star()))
@@ -0,0 +1,60 @@
+import unittest
+
+from petitparser import GrammarDefinition, Mirror, character, ref
+from petitparser.parser.caching import MemoParser
+from petitparser.tools.memoizer import MemoTrainer, plan_memoization
+from petitparser.tools.profiler import profile
+
+
+class ExpressionGrammar(GrammarDefinition):
+    start = ref('expression').end()
+    expression = (ref('term') & character.of('+') & ref('expression')
+                  | ref('term') & character.of('-') & ref('expression')
+                  | ref('term'))
+    term = character.of('(') & ref('expression') & character.of(')') | character.digit().plus().flatten()
+
+
+class MemoPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.grammar = ExpressionGrammar.build()
+        self.parsers = list(Mirror(self.grammar))
+
+    def test_plan(self):
+        plan = plan_memoization(self.grammar, ['((1))+2', '(((3)-1))'])
+        self.assertEqual(len(self.parsers), len(plan.estimates))
+        # Only term is re-evaluated outside of other re-evaluations.
+        self.assertEqual(1, len(plan.nodes))
+        index, = plan.nodes
+        self.assertEqual(['(', '1', ')'], self.parsers[index].parse('(1)+2').value)
+        estimate = plan.estimates[index]
+        self.assertTrue(estimate.profitable)
+        self.assertGreater(estimate.hits, 0)
+        self.assertEqual(estimate.invocations + estimate.stores, estimate.cost)
+
+    def test_apply(self):
+        plan = plan_memoization(self.grammar, ['((1))+2'])
+        memoized = plan.apply(ExpressionGrammar.build())
+        self.assertEqual(1, sum(isinstance(p, MemoParser) for p in Mirror(memoized)))
+        text = '(' * 8 + '1-2' + ')' * 8
+        self.assertEqual(self.grammar.parse(text).value, memoized.parse(text).value)
+        plain = sum(p.invocations for p in profile(self.grammar, [text]).values())
+        planned = sum(p.invocations for p in profile(memoized, [text]).values())
+        self.assertGreater(plain, 100 * planned)
+        with self.assertRaises(ValueError):
+            plan.apply(character.digit())
+
+    def test_costs(self):
+        trainer = MemoTrainer(self.grammar)
+        trainer.parser.parse('(1)+2')
+        self.assertEqual(frozenset(), trainer.plan(lookup_cost=100).nodes)
+        trainer.reset()
+        self.assertEqual(frozenset(), trainer.plan().nodes)
+
+    def test_side_effects(self):
+        calls = []
+        digits = character.digit().plus().flatten().map_with_side_effects(calls.append)
+        parser = (digits & character.of('+')) | (digits & character.of('-')) | digits
+        parsers = list(Mirror(parser))
+        plan = plan_memoization(parser, ['12345', '123-4'])
+        self.assertGreater(plan.estimates[parsers.index(digits)].hits, 0)
+        self.assertEqual({parsers.index(digits._delegate)}, plan.nodes)
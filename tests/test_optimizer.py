@@ -0,0 +1,109 @@
+import unittest
+
+from petitparser import Mirror, character, cut, epsilon, string
+from petitparser.parser.actions import RecognizerParser
+from petitparser.parser.combinators import PickParser, ReorderedChoiceParser
+from petitparser.tools.optimizer import choice_orders, optimize
+from petitparser.tools.profiler import profile
+
+
+class OptimizeTest(unittest.TestCase):
+    def assertSameResults(self, parser, inputs):
+        optimized = optimize(parser)
+        for inp in inputs:
+            expected, actual = parser.parse(inp), optimized.parse(inp)
+            self.assertEqual(expected.is_success, actual.is_success, inp)
+            self.assertEqual(expected.position, actual.position, inp)
+            if expected.is_success:
+                self.assertEqual(expected.value, actual.value, inp)
+            else:
+                self.assertEqual(expected.message, actual.message, inp)
+            self.assertEqual(parser.fast_parse_on(inp, 0), optimized.fast_parse_on(inp, 0), inp)
+        return optimized
+
+    def test_pick_fusion(self):
+        pair = (character.letter().plus().flatten() & character.of('=') & character.digit().plus()).permute(2, 0)
+        parser = (character.of('(') & pair & character.of(')')).pick(-2)
+        optimized = self.assertSameResults(parser, ['(a=12)', '(a=12', '(a=)', '(=1)', 'x', ''])
+        picks = [p for p in Mirror(optimized) if isinstance(p, PickParser)]
+        self.assertEqual(2, len(picks))
+        self.assertEqual((False, True, False), picks[0]._demanded)
+
+    def test_recognizers(self):
+        identifier = (character.letter() & character.word().star()).flatten()
+        parser = (identifier & character.digit().neg()).star() & character.any().star_lazy(string.of('end'))
+        optimized = self.assertSameResults(parser, ['ab c1 x end', 'a1 end', '', 'ab'])
+        recognizers = [p for p in Mirror(optimized) if isinstance(p, RecognizerParser)]
+        self.assertEqual(1, len(recognizers))
+
+    def test_parsed_once(self):
+        parser = (string.of('end').not_() & character.any()).star() & character.any().star_lazy(string.of('.'))
+        optimized = self.assertSameResults(parser, ['a.', 'ab', 'end'])
+        sample = ['abcdef.' * 20]
+        invocations = sum(p.invocations for p in profile(optimized, sample).values())
+        self.assertLessEqual(invocations, sum(p.invocations for p in profile(parser, sample).values()))
+
+    def test_dropped_separators(self):
+        separator = (character.of(',') & character.whitespace().star()).flatten()
+        parser = character.digit().separated_by(separator, keep_separators=False, trailing=True)
+        optimized = self.assertSameResults(parser, ['1, 2,3,', '1,', 'x'])
+        self.assertIsInstance(optimized._separator, RecognizerParser)
+
+    def test_side_effects(self):
+        seen = []
+        parser = (character.digit().map_with_side_effects(seen.append) & character.letter()).pick(1)
+        optimized = self.assertSameResults(parser, ['1a', '1', 'a'])
+        seen.clear()
+        optimized.parse('2b')
+        self.assertEqual(['2'], seen)
+
+    def test_cut(self):
+        parser = (string.of('if') & cut() & character.letter()).pick(2) | character.letter().plus().flatten()
+        optimized = self.assertSameResults(parser, ['ifx', 'if1', 'abc'])
+        self.assertEqual([], [p for p in Mirror(optimized) if isinstance(p, PickParser)])
+
+    def test_shared(self):
+        digit = character.digit()
+        parser = (digit & character.of('.') & digit).pick(0) & digit.flatten()
+        optimized = self.assertSameResults(parser, ['1.23', '1.2', '1,2'])
+        self.assertEqual(['1', '3'], optimized.parse('1.23').value)
+
+
+class ReorderTest(unittest.TestCase):
+    def test_disjoint_alternatives(self):
+        keyword = string.of('let') | string.of('if') | character.digit().plus().flatten()
+        parser = keyword.trim().star().end()
+        stats = profile(parser, ['1 2 let 3 if 4 5'])
+        orders = choice_orders(parser, stats)
+        self.assertEqual([(2, 0, 1)], [order.order for order in orders])
+        self.assertIn('#2 (5 successes)', str(orders[0]))
+
+        optimized = optimize(parser, profile=stats)
+        reordered, = [p for p in Mirror(optimized) if isinstance(p, ReorderedChoiceParser)]
+        self.assertEqual('let', reordered.listed_parsers()[0]._literal)
+        for inp in ['1 let 2 if', 'x', 'le', '']:
+            expected, actual = parser.parse(inp), optimized.parse(inp)
+            self.assertEqual((expected.is_success, expected.position), (actual.is_success, actual.position))
+            if expected.is_success:
+                self.assertEqual(expected.value, actual.value)
+            else:
+                self.assertEqual(expected.message, actual.message)
+        self.assertEqual(keyword.parse('x').message, reordered.parse('x').message)
+
+    def test_overlapping_alternatives(self):
+        word = character.letter().plus().flatten()
+        parser = string.of('let') | character.digit() | word
+        # Words may start with 'let', but never with a digit.
+        self.assertEqual([(0, 2, 1)], [order.order for order in choice_orders(parser, profile(parser, ['abc', 'de']))])
+        parser = string.of('let') | character.digit() | epsilon()
+        self.assertEqual([], choice_orders(parser, profile(parser, ['abc', 'de'])))
+
+    def test_blocked_alternatives(self):
+        seen = []
+        tagged = character.of('b').map_with_side_effects(seen.append)
+        committed = (character.of('c') & cut() & character.of('d')).flatten()
+        for alternative in [tagged, committed]:
+            parser = (character.of('a') | alternative | character.digit()).star()
+            self.assertEqual([], choice_orders(parser, profile(parser, ['12345'])))
+        parser = (character.of('a') | (committed | character.of('b')) | character.digit()).star()
+        self.assertEqual([(2, 0, 1)], [order.order for order in choice_orders(parser, profile(parser, ['12345']))])
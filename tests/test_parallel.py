@@ -0,0 +1,61 @@
+import multiprocessing
+import unittest
+from unittest import mock
+
+from petitparser import character
+from petitparser.parser import parallel
+from petitparser.parser.parallel import Record
+
+field = (character.of('"') & character.of('"').neg().star() & character.of('"')).flatten() \
+    | character.none_of(',\n').star().flatten()
+
+
+def without_separators(values):
+    return values[::2]
+
+
+row = field.separated_by(character.of(',')).map(without_separators)
+newline = character.of('\n')
+
+
+class ParseParallelTest(unittest.TestCase):
+    def rows(self, count):
+        return ''.join(f'{i},"a\nb",x{i}\n' if i % 3 == 0 else f'{i},y,z\n' for i in range(count))
+
+    def test_inline(self):
+        result = row.parse_parallel('a,b\nc\n', newline, workers=1, chunksize=2)
+        self.assertEqual([Record(0, 3, ['a', 'b']), Record(4, 5, ['c'])], result.value)
+        self.assertEqual(6, result.position)
+
+    def test_repairs_misaligned_chunks(self):
+        text = self.rows(200)
+        expected = [r.value for r in row.parse_parallel(text, newline, workers=1).value]
+        self.assertEqual(200, len(expected))
+        for chunksize in [1, 5, 7, 16, 100]:
+            records = row.parse_parallel(text, newline, workers=1, chunksize=chunksize).value
+            self.assertEqual(expected, [r.value for r in records])
+            self.assertEqual(text[records[3].start:records[3].stop], '3,"a\nb",x3')
+
+    def test_processes(self):
+        text = self.rows(1000)
+        result = row.parse_parallel(text, newline, workers=2, chunksize=1000)
+        self.assertEqual(1000, len(result.value))
+        self.assertEqual(['999', '"a\nb"', 'x999'], result.value[-1].value)
+
+    def test_failure(self):
+        parser = character.digit().plus().flatten()
+        result = parser.parse_parallel('12\n34\nx5\n67', newline, workers=1, chunksize=4)
+        self.assertTrue(result.is_failure)
+        self.assertEqual(6, result.position)
+        self.assertTrue(parser.parse_parallel('12\n34', character.of(';'), workers=1).is_failure)
+
+    def test_shared_memory(self):
+        text = self.rows(300).replace('y', 'ÿ').replace('z', '𝔷')
+        spawn = multiprocessing.get_context('spawn')
+        with mock.patch.object(parallel.multiprocessing, 'get_context', return_value=spawn):
+            result = row.parse_parallel(text, newline, workers=2, chunksize=1000)
+        self.assertEqual(300, len(result.value))
+        self.assertEqual(['298', 'ÿ', '𝔷'], result.value[-2].value)
+
+    def test_nullable_boundary(self):
+        self.assertRaises(ValueError, row.parse_parallel, 'a\nb', newline.optional(), workers=1)
@@ -0,0 +1,62 @@
+import unittest
+
+from petitparser import Mirror, SettableParser, character
+from petitparser.tools.profiler import ParserProfile, Profiler, profile
+
+
+class StatsTest(unittest.TestCase):
+    def test_tree(self):
+        a, b = character.of('a'), character.of('b')
+        parser = (a & b.star()).flatten()
+        stats = Mirror(parser).stats()
+        self.assertEqual(5, stats.nodes)
+        self.assertEqual({'FlattenParser': 1, 'SequenceParser': 1,
+                          'PossesiveRepeatingParser': 1, 'CharacterParser': 2}, stats.by_type)
+        self.assertEqual(0, stats.shared)
+        self.assertEqual(4, stats.max_depth)
+        self.assertEqual(0, stats.cycles)
+        self.assertGreater(stats.memory, 0)
+
+    def test_shared_and_cycles(self):
+        parser = SettableParser.undefined()
+        a = character.of('a')
+        parser.set((a & parser) | a)
+        stats = Mirror(parser).stats()
+        self.assertEqual(4, stats.nodes)
+        self.assertEqual(1, stats.shared)
+        self.assertEqual(1, stats.cycles)
+        self.assertEqual(4, stats.max_depth)
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_counts(self):
+        a, b = character.of('a'), character.of('b')
+        parser = (a | b).star()
+        profiler = Profiler(parser)
+        self.assertEqual(['a', 'b', 'a'], profiler.parser.parse('aba').value)
+        self.assertEqual(ParserProfile(4, 2), profiler.profiles()[a])
+        self.assertEqual(ParserProfile(2, 1), profiler.profiles()[b])
+        self.assertEqual(1, profiler.invocations()[parser])
+        profiler.reset()
+        self.assertEqual(0, profiler.invocations()[a])
+
+    def test_profile(self):
+        a = character.of('a')
+        parser = a.plus()
+        profiles = profile(parser, ['aa', 'b'])
+        self.assertEqual(ParserProfile(4, 2), profiles[a])
+        self.assertEqual(ParserProfile(2, 1), profiles[parser])
+
+    def test_to_dot(self):
+        a = character.of('"')
+        parser = a.star()
+        dot = Mirror(parser).to_dot()
+        self.assertTrue(dot.startswith('digraph parser {'))
+        self.assertIn('n0 -> n1;', dot)
+        self.assertIn('\\"', dot)
+
+        profiler = Profiler(parser)
+        profiler.parser.parse('""')
+        dot = Mirror(parser).to_dot(profiler.invocations())
+        self.assertIn('3 calls", fillcolor="0.0 1.000 1.0"', dot)
+        self.assertIn('1 calls", fillcolor="0.0 0.333 1.0"', dot)
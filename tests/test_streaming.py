@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+from petitparser import character, string
+from petitparser.context import ParseError
+from petitparser.tools.layout import Layout
+
+record = (character.letter().plus().flatten() & character.of('=') & character.digit().plus().flatten().map(int)
+          & character.of(';')).map(lambda v: (v[0], v[2]))
+layout = Layout(r'\s+')
+
+
+class ChunkReader:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def read(self, n):
+        await asyncio.sleep(0)
+        return self.chunks.pop(0) if self.chunks else b''
+
+
+class PushParserTest(unittest.TestCase):
+    def test_feed(self):
+        push = record.push(layout=layout)
+        self.assertEqual([], push.feed('ab=1'))
+        self.assertEqual([('ab', 12)], [r.value for r in push.feed('2; c=3;')])
+        self.assertEqual(7, push.offset)
+        self.assertEqual([], push.feed(' '))
+        self.assertEqual([('c', 3)], [r.value for r in push.close()])
+        self.assertEqual(12, push.offset)
+
+    def test_lookahead(self):
+        push = character.digit().plus().flatten().push()
+        self.assertEqual([], push.feed('12'))
+        self.assertEqual(['1234'], [r.value for r in push.feed('34,')][:1])
+        self.assertEqual(1, push.pending)
+
+    def test_ordered_choice(self):
+        push = (string.of('abcd') | string.of('ab')).push()
+        self.assertEqual([], push.feed('abc'))
+        self.assertEqual(['abcd'], [r.value for r in push.feed('dab')])
+        self.assertEqual(['ab'], [r.value for r in push.close()])
+
+    def test_end(self):
+        push = character.digit().plus().flatten().end().push()
+        self.assertEqual([], push.feed('12'))
+        self.assertEqual([], push.feed('34'))
+        self.assertEqual(['1234'], [r.value for r in push.close()])
+
+    def test_close(self):
+        push = record.push(layout=layout)
+        self.assertEqual([('a', 1)], [r.value for r in push.feed('a=1;  b=2')])
+        results = push.close()
+        self.assertEqual(1, len(results))
+        self.assertTrue(results[0].is_failure)
+        self.assertRaises(ValueError, push.feed, 'x')
+
+    def test_retry(self):
+        calls = []
+        counting = character.any().map(calls.append).star() & character.of(';')
+        push = counting.push()
+        for _ in range(64):
+            push.feed('x')
+        self.assertLess(len(calls), 4 * 64)
+        self.assertEqual(1, len(push.close()))
+
+    def test_max_size(self):
+        push = record.push(max_size=4)
+        self.assertRaises(ParseError, push.feed, 'abcdef')
+
+    def test_aparse(self):
+        async def collect():
+            reader = ChunkReader([b'a=1;b', b'=2;', 'ü'.encode()[:1], 'ü'.encode()[1:] + b'=3;'])
+            return [result async for result in record.aparse(reader, layout=layout)]
+
+        results = asyncio.run(collect())
+        self.assertEqual([('a', 1), ('b', 2)], [r.value for r in results[:2]])
+        self.assertEqual([('ü', 3)], [r.value for r in results[2:]])